@@ -0,0 +1,29 @@
+"""
+Maintenance commands
+Run with: flask --app index <command>
+"""
+import click
+from api.repositories import get_task_repository, get_refresh_token_repository
+from api.utils.config import Config
+
+def register_commands(app):
+    """Register maintenance commands on the Flask CLI"""
+    
+    @app.cli.command('reconcile-stats')
+    @click.option('--user-id', type=int, default=None, help='Only rebuild this user')
+    def reconcile_stats(user_id):
+        """Rebuild task_stats counters from the tasks table"""
+        count = get_task_repository().rebuild_statistics(user_id)
+        click.echo(f"✅ Task statistics rebuilt for {count} user(s)")
+    
+    @app.cli.command('prune-refresh-tokens')
+    def prune_refresh_tokens():
+        """Delete expired refresh tokens"""
+        count = get_refresh_token_repository().delete_expired()
+        click.echo(f"✅ {count} expired refresh token(s) deleted")
+    
+    @app.cli.command('prune-tombstones')
+    def prune_tombstones():
+        """Delete tombstones older than TOMBSTONE_RETENTION_DAYS (sync tokens that old get 410)"""
+        count = get_task_repository().prune_tombstones(Config.TOMBSTONE_RETENTION_DAYS)
+        click.echo(f"✅ {count} task tombstone(s) deleted")
@@ -2,14 +2,17 @@
 Authentication Controller
 Handles HTTP requests for authentication
 """
+import logging
 from flask import request
-from api.workers.auth_worker import AuthWorker
+from api.workers import get_auth_worker
+from api.utils.passwords import HasherBusyError
 from api.utils.responses import (
     success_response, error_response, created_response,
-    validation_error_response, server_error_response
+    validation_error_response, server_error_response,
+    service_unavailable_response
 )
 
-auth_worker = AuthWorker()
+logger = logging.getLogger(__name__)
 
 def register():
     """Register a new user"""
@@ -35,14 +38,16 @@ def register():
             return validation_error_response(errors)
         
         # Register user
-        result = auth_worker.register(email, password, name)
+        result = get_auth_worker().register(email, password, name)
         
         return created_response(result, "User registered successfully")
         
     except ValueError as e:
         return error_response(str(e), status_code=409)
+    except HasherBusyError as e:
+        return service_unavailable_response(str(e), e.retry_after)
     except Exception as e:
-        print(f"Registration error: {e}")
+        logger.exception("Registration error: %s", e)
         return server_error_response("Registration failed")
 
 def login():
@@ -64,19 +69,55 @@ def login():
             return validation_error_response(errors)
         
         # Login user
-        result = auth_worker.login(email, password)
-        print(f"[Login] User logged in: {email}")
-        print(f"[Login] Token generated: {result['token'][:20]}...")
-        print(f"[Login] Response structure: token={bool(result.get('token'))}, user={bool(result.get('user'))}")
+        result = get_auth_worker().login(email, password)
+        logger.info("User logged in", extra={"user_id": result['user']['id']})
         
         return success_response(result, "Login successful")
         
     except ValueError as e:
         return error_response(str(e), status_code=401)
+    except HasherBusyError as e:
+        return service_unavailable_response(str(e), e.retry_after)
     except Exception as e:
-        print(f"Login error: {e}")
+        logger.exception("Login error: %s", e)
         return server_error_response("Login failed")
 
+def refresh():
+    """Exchange a refresh token for a new token pair"""
+    try:
+        data = request.get_json(silent=True) or {}
+        refresh_token = data.get('refresh_token') or ''
+        
+        if not isinstance(refresh_token, str) or not refresh_token.strip():
+            return validation_error_response({"refresh_token": "Refresh token is required"})
+        
+        result = get_auth_worker().refresh(refresh_token.strip())
+        
+        return success_response(result, "Token refreshed successfully")
+        
+    except ValueError as e:
+        return error_response(str(e), status_code=401)
+    except Exception as e:
+        logger.exception("Token refresh error: %s", e)
+        return server_error_response("Token refresh failed")
+
+def logout():
+    """Revoke the session of a refresh token"""
+    try:
+        data = request.get_json(silent=True) or {}
+        refresh_token = data.get('refresh_token') or ''
+        
+        if not isinstance(refresh_token, str) or not refresh_token.strip():
+            return validation_error_response({"refresh_token": "Refresh token is required"})
+        
+        get_auth_worker().logout(refresh_token.strip())
+        
+        return success_response(None, "Logged out successfully")
+        
+    except Exception as e:
+        logger.exception("Logout error: %s", e)
+        return server_error_response("Logout failed")
+
 def me(current_user):
     """Get current user info"""
     try:
@@ -89,7 +130,7 @@ def me(current_user):
             }
         }, "User info retrieved successfully")
     except Exception as e:
-        print(f"Error getting user info: {e}")
+        logger.exception("Error getting user info: %s", e)
         return server_error_response()
 
 def update_profile(current_user):
@@ -115,7 +156,7 @@ def update_profile(current_user):
             return validation_error_response(errors)
         
         # Update profile
-        result = auth_worker.update_profile(
+        result = get_auth_worker().update_profile(
             user_id, 
             name, 
             email, 
@@ -127,6 +168,8 @@ def update_profile(current_user):
         
     except ValueError as e:
         return error_response(str(e), status_code=400)
+    except HasherBusyError as e:
+        return service_unavailable_response(str(e), e.retry_after)
     except Exception as e:
-        print(f"Error updating profile: {e}")
+        logger.exception("Error updating profile: %s", e)
         return server_error_response("Failed to update profile")
@@ -2,39 +2,235 @@
 Task Controller
 Handles HTTP requests for task management
 """
+import logging
+from datetime import datetime
 from flask import request
-from api.workers.task_worker import TaskWorker
+from api.repositories import TASK_COLUMNS
+from api.repositories.task_query import SORT_COLUMNS, TaskQuery, normalize_fields
+from api.workers import get_task_worker
+from api.workers.task_worker import VALID_STATUSES, SyncTokenExpired
+from api.utils.config import Config
+from api.utils.pagination import decode_cursor, decode_offset_cursor, decode_sync_token, parse_limit
 from api.utils.responses import (
-    success_response, error_response, created_response,
-    validation_error_response, server_error_response, not_found_response
+    success_response, rows_response, stream_response, error_response, created_response,
+    validation_error_response, server_error_response, not_found_response, gone_response,
+    not_modified_response, with_etag
 )
 
-task_worker = TaskWorker()
+logger = logging.getLogger(__name__)
+
+# Date range filters of GET /api/tasks (*_after inclusive, *_before exclusive)
+DATE_FILTERS = ('created_after', 'created_before', 'completed_after', 'completed_before')
+
+def _parse_datetime(value):
+    """ISO 8601 date or datetime without timezone (stored times are naive)"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        raise ValueError
+    return parsed
+
+def _parse_fields(args, errors):
+    """Sparse fieldset from ?fields=id,title (id is always returned), problems go to errors"""
+    fields = [field.strip() for field in args.get('fields', '').split(',') if field.strip()]
+    try:
+        return normalize_fields(fields)
+    except ValueError:
+        errors['fields'] = f"Fields must be among: {', '.join(TASK_COLUMNS)}"
+        return None
+
+def _parse_task_query(args, errors):
+    """TaskQuery from the list filters in the query string, problems go to errors"""
+    statuses = [s.strip() for value in args.getlist('status') for s in value.split(',') if s.strip()]
+    if any(status not in VALID_STATUSES for status in statuses):
+        errors['status'] = f"Status must be one of: {', '.join(VALID_STATUSES)}"
+    
+    dates = {}
+    for name in DATE_FILTERS:
+        value = args.get(name)
+        if value:
+            try:
+                dates[name] = _parse_datetime(value)
+            except ValueError:
+                errors[name] = "Expected an ISO 8601 date or datetime (YYYY-MM-DD[THH:MM:SS])"
+    
+    sort = args.get('sort', 'created_at')
+    if sort not in SORT_COLUMNS:
+        errors['sort'] = f"Sort must be one of: {', '.join(SORT_COLUMNS)}"
+    
+    order = args.get('order', 'desc').lower()
+    if order not in ('asc', 'desc'):
+        errors['order'] = "Order must be asc or desc"
+    
+    fields = _parse_fields(args, errors)
+    
+    if errors:
+        return None
+    return TaskQuery(statuses=dict.fromkeys(statuses), sort=sort, descending=order == 'desc', fields=fields, **dates)
 
 def get_all_tasks(current_user):
-    """Get all tasks for current user"""
+    """Get a page of tasks for current user (or all of them with ?stream=1)"""
     try:
         user_id = current_user['id']
-        tasks = task_worker.get_all_tasks(user_id)
         
-        return success_response({"tasks": tasks})
+        # Validation (before the ETag: bad parameters get 422, never 304)
+        errors = {}
+        query = _parse_task_query(request.args, errors)
+        stream = request.args.get('stream', '').lower() in ('1', 'true')
+        
+        limit = None
+        after = None
+        if not stream:
+            try:
+                limit = parse_limit(request.args.get('limit'))
+            except ValueError as e:
+                errors['limit'] = str(e)
+            
+            cursor = request.args.get('cursor')
+            if cursor:
+                try:
+                    sort, descending, key, last_id = decode_cursor(cursor)
+                    after = (key, last_id)
+                    # A cursor only makes sense for the sort it was issued for
+                    if query and (sort, descending) != (query.sort, query.descending):
+                        errors['cursor'] = "Cursor does not match the requested sort"
+                except ValueError as e:
+                    errors['cursor'] = str(e)
+        
+        if errors:
+            return validation_error_response(errors)
+        
+        # Unchanged since the client's copy: skip the task query entirely
+        etag = get_task_worker().get_etag(
+            user_id, request.path, query.key(), stream, limit, after
+        )
+        if request.if_none_match.contains_weak(etag):
+            return not_modified_response(etag)
+        
+        if stream:
+            tasks = get_task_worker().stream_all_tasks(user_id, Config.TASKS_STREAM_BATCH_SIZE, query)
+            response = stream_response(
+                "tasks", tasks, chunk_size=Config.TASKS_STREAM_BATCH_SIZE, columns=query.fields
+            )
+            return with_etag(response, etag)
+        
+        result = get_task_worker().get_all_tasks(user_id, limit, after, query)
+        response = rows_response(
+            "tasks", result["columns"], result["tasks"], {"next_cursor": result["next_cursor"]}
+        )
         
+        return with_etag(response, etag)
+    
     except Exception as e:
-        print(f"Error fetching tasks: {e}")
+        logger.exception("Error fetching tasks: %s", e)
+        return server_error_response()
+
+# Longest accepted search query (titles are VARCHAR(200))
+SEARCH_MAX_LENGTH = 200
+
+def search_tasks(current_user):
+    """Search the current user's tasks by title (?q=, prefix matching)"""
+    try:
+        user_id = current_user['id']
+        
+        # Validation
+        text = request.args.get('q', '').strip()
+        limit = None
+        offset = 0
+        errors = {}
+        if not text:
+            errors['q'] = "Search query is required"
+        elif len(text) > SEARCH_MAX_LENGTH:
+            errors['q'] = f"Search query must be at most {SEARCH_MAX_LENGTH} characters"
+        
+        fields = _parse_fields(request.args, errors)
+        
+        try:
+            limit = parse_limit(request.args.get('limit'))
+        except ValueError as e:
+            errors['limit'] = str(e)
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                offset = decode_offset_cursor(cursor)
+            except ValueError as e:
+                errors['cursor'] = str(e)
+        
+        if errors:
+            return validation_error_response(errors)
+        
+        result = get_task_worker().search_tasks(user_id, text, limit, offset, fields)
+        return rows_response(
+            "tasks", result["columns"], result["tasks"], {"next_cursor": result["next_cursor"]}
+        )
+    
+    except ValueError as e:
+        return validation_error_response({"q": str(e)})
+    except Exception as e:
+        logger.exception("Error searching tasks: %s", e)
+        return server_error_response()
+
+def get_changes(current_user):
+    """Tasks created, updated or deleted since ?since=<next_token> (everything without it)"""
+    try:
+        user_id = current_user['id']
+        
+        # Validation
+        errors = {}
+        fields = _parse_fields(request.args, errors)
+        
+        limit = None
+        try:
+            limit = parse_limit(request.args.get('limit'))
+        except ValueError as e:
+            errors['limit'] = str(e)
+        
+        token = None
+        since = request.args.get('since')
+        if since:
+            try:
+                token = decode_sync_token(since)
+            except ValueError as e:
+                errors['since'] = str(e)
+        
+        if errors:
+            return validation_error_response(errors)
+        
+        result = get_task_worker().get_changes(user_id, limit, token, fields)
+        return rows_response(
+            "tasks", result["columns"], result["tasks"],
+            {"deleted": result["deleted"], "next_token": result["next_token"], "has_more": result["has_more"]}
+        )
+    
+    except SyncTokenExpired as e:
+        return gone_response(str(e))
+    except Exception as e:
+        logger.exception("Error fetching task changes: %s", e)
         return server_error_response()
 
 def get_task(task_id, current_user):
     """Get a specific task"""
     try:
         user_id = current_user['id']
-        task = task_worker.get_task(task_id, user_id)
         
-        return success_response({"task": task})
+        errors = {}
+        fields = _parse_fields(request.args, errors)
+        if errors:
+            return validation_error_response(errors)
+        
+        # Resolved first: a missing task is a 404 whatever the client sends
+        task = get_task_worker().get_task(task_id, user_id, fields)
         
+        etag = get_task_worker().get_etag(user_id, request.path, fields)
+        if request.if_none_match.contains_weak(etag):
+            return not_modified_response(etag)
+        
+        return with_etag(success_response({"task": task}), etag)
+    
     except ValueError as e:
         return not_found_response(str(e))
     except Exception as e:
-        print(f"Error fetching task: {e}")
+        logger.exception("Error fetching task: %s", e)
         return server_error_response()
 
 def create_task(current_user):
@@ -50,21 +246,67 @@ def create_task(current_user):
         errors = {}
         if not title:
             errors['title'] = "Title is required"
-        if status not in ['pending', 'in_progress', 'completed']:
+        if status not in VALID_STATUSES:
             errors['status'] = "Invalid status"
         
         if errors:
             return validation_error_response(errors)
         
         # Create task
-        result = task_worker.create_task(user_id, title, status)
+        result = get_task_worker().create_task(user_id, title, status)
         
         return created_response({"task": result}, "Task created successfully")
+    
+    except ValueError as e:
+        return error_response(str(e))
+    except Exception as e:
+        logger.exception("Error creating task: %s", e)
+        return server_error_response()
+
+def create_tasks(current_user):
+    """Create several tasks in one request"""
+    try:
+        data = request.get_json()
+        user_id = current_user['id']
+        
+        # Validation
+        if not isinstance(data, list) or not data:
+            return validation_error_response({"tasks": "Expected a non-empty array of tasks"})
+        if len(data) > Config.TASKS_BATCH_MAX_SIZE:
+            return validation_error_response({
+                "tasks": f"At most {Config.TASKS_BATCH_MAX_SIZE} tasks per request"
+            })
+        
+        tasks = []
+        errors = {}
+        for index, item in enumerate(data):
+            if not isinstance(item, dict):
+                errors[str(index)] = "Expected an object"
+                continue
+            
+            title = item.get('title')
+            title = title.strip() if isinstance(title, str) else ''
+            status = item.get('status', 'pending')
+            
+            if not title:
+                errors[f"{index}.title"] = "Title is required"
+            if status not in VALID_STATUSES:
+                errors[f"{index}.status"] = "Invalid status"
+            
+            tasks.append((title, status))
+        
+        if errors:
+            return validation_error_response(errors)
         
+        # Create tasks
+        result = get_task_worker().create_tasks(user_id, tasks)
+        
+        return created_response({"tasks": result}, f"{len(result)} tasks created successfully")
+    
     except ValueError as e:
         return error_response(str(e))
     except Exception as e:
-        print(f"Error creating task: {e}")
+        logger.exception("Error creating tasks: %s", e)
         return server_error_response()
 
 def update_task(task_id, current_user):
@@ -84,14 +326,14 @@ def update_task(task_id, current_user):
             return validation_error_response(errors)
         
         # Update task
-        result = task_worker.update_task(task_id, user_id, title)
+        result = get_task_worker().update_task(task_id, user_id, title)
         
         return success_response({"task": result}, "Task updated successfully")
-        
+    
     except ValueError as e:
         return not_found_response(str(e))
     except Exception as e:
-        print(f"Error updating task: {e}")
+        logger.exception("Error updating task: %s", e)
         return server_error_response()
 
 def update_task_status(task_id, current_user):
@@ -103,18 +345,73 @@ def update_task_status(task_id, current_user):
         # Validation
         status = data.get('status', '').strip()
         
-        if status not in ['pending', 'in_progress', 'completed']:
+        if status not in VALID_STATUSES:
             return validation_error_response({"status": "Invalid status"})
         
         # Update status
-        result = task_worker.update_status(task_id, user_id, status)
+        result = get_task_worker().update_status(task_id, user_id, status)
         
         return success_response({"task": result}, "Status updated successfully")
-        
+    
     except ValueError as e:
         return not_found_response(str(e))
     except Exception as e:
-        print(f"Error updating status: {e}")
+        logger.exception("Error updating status: %s", e)
+        return server_error_response()
+
+def update_status_many(current_user):
+    """Update the status of several tasks"""
+    try:
+        data = request.get_json() or {}
+        user_id = current_user['id']
+        
+        # Validation
+        status = data.get('status')
+        errors = {}
+        if status not in VALID_STATUSES:
+            errors['status'] = "Invalid status"
+        task_ids, current_status = _parse_bulk_scope(data, errors)
+        
+        if errors:
+            return validation_error_response(errors)
+        
+        # Update statuses
+        result = get_task_worker().update_status_many(user_id, status, task_ids, current_status)
+        
+        return success_response(result, "Statuses updated successfully")
+    
+    except ValueError as e:
+        return error_response(str(e))
+    except Exception as e:
+        logger.exception("Error updating statuses: %s", e)
+        return server_error_response()
+
+def delete_many(current_user):
+    """Delete several tasks"""
+    try:
+        data = request.get_json(silent=True) or {}
+        user_id = current_user['id']
+        
+        # ?status=completed works as a filter too, DELETE bodies are optional
+        if 'status' in request.args and 'filter' not in data:
+            data['filter'] = {"status": request.args.get('status')}
+        
+        # Validation
+        errors = {}
+        task_ids, current_status = _parse_bulk_scope(data, errors)
+        
+        if errors:
+            return validation_error_response(errors)
+        
+        # Delete tasks
+        result = get_task_worker().delete_many(user_id, task_ids, current_status)
+        
+        return success_response(result, "Tasks deleted successfully")
+    
+    except ValueError as e:
+        return error_response(str(e))
+    except Exception as e:
+        logger.exception("Error deleting tasks: %s", e)
         return server_error_response()
 
 def delete_task(task_id, current_user):
@@ -123,24 +420,57 @@ def delete_task(task_id, current_user):
         user_id = current_user['id']
         
         # Delete task
-        task_worker.delete_task(task_id, user_id)
+        get_task_worker().delete_task(task_id, user_id)
         
         return success_response(message="Task deleted successfully")
-        
+    
     except ValueError as e:
         return not_found_response(str(e))
     except Exception as e:
-        print(f"Error deleting task: {e}")
+        logger.exception("Error deleting task: %s", e)
         return server_error_response()
 
 def get_statistics(current_user):
     """Get task statistics"""
     try:
         user_id = current_user['id']
-        stats = task_worker.get_statistics(user_id)
         
-        return success_response({"statistics": stats})
+        etag = get_task_worker().get_etag(user_id, request.path)
+        if request.if_none_match.contains_weak(etag):
+            return not_modified_response(etag)
+        
+        stats = get_task_worker().get_statistics(user_id)
         
+        return with_etag(success_response({"statistics": stats}), etag)
+    
     except Exception as e:
-        print(f"Error fetching statistics: {e}")
+        logger.exception("Error fetching statistics: %s", e)
         return server_error_response()
+
+def _parse_bulk_scope(data, errors):
+    """Returns (task_ids, current_status) for bulk endpoints, filling errors"""
+    task_ids = None
+    current_status = None
+    
+    ids = data.get('ids')
+    filters = data.get('filter')
+    
+    if (ids is None) == (filters is None):
+        errors['scope'] = "Provide either ids or filter"
+        return task_ids, current_status
+    
+    if ids is not None:
+        if (not isinstance(ids, list) or not ids
+                or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)):
+            errors['ids'] = "Expected a non-empty array of task ids"
+        elif len(ids) > Config.TASKS_BATCH_MAX_SIZE:
+            errors['ids'] = f"At most {Config.TASKS_BATCH_MAX_SIZE} ids per request"
+        else:
+            task_ids = list(dict.fromkeys(ids))
+    else:
+        current_status = filters.get('status') if isinstance(filters, dict) else None
+        if current_status not in VALID_STATUSES:
+            errors['filter'] = "Filter must have a valid status"
+            current_status = None
+    
+    return task_ids, current_status
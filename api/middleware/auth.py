@@ -1,12 +1,13 @@
 """
 Authentication Middleware
 """
+import logging
 from functools import wraps
 from flask import request
-from api.workers.auth_worker import AuthWorker
+from api.workers import get_auth_worker
 from api.utils.responses import unauthorized_response, error_response
 
-auth_worker = AuthWorker()
+logger = logging.getLogger(__name__)
 
 def token_required(f):
     """
@@ -19,7 +20,6 @@ def token_required(f):
         
         # Get token from Authorization header
         auth_header = request.headers.get('Authorization')
-        print(f"[Auth Middleware] Authorization header: {auth_header[:50] + '...' if auth_header and len(auth_header) > 50 else auth_header}")
         
         if auth_header:
             try:
@@ -27,20 +27,20 @@ def token_required(f):
                 parts = auth_header.split()
                 if len(parts) == 2 and parts[0].lower() == 'bearer':
                     token = parts[1]
-                    print(f"[Auth Middleware] Token extraído: {token[:20]}...")
                 else:
-                    print(f"[Auth Middleware] Formato inválido: {len(parts)} partes, primeira: {parts[0] if parts else 'N/A'}")
+                    # Never log the header itself, it may hold a valid token
+                    logger.debug("Malformed Authorization header (%d parts)", len(parts))
             except Exception as e:
-                print(f"[Auth Middleware] Erro ao processar header: {e}")
+                logger.debug("Could not parse Authorization header: %s", e)
                 return unauthorized_response("Invalid authorization header format")
         
         if not token:
-            print("[Auth Middleware] ERRO: Token não encontrado no header!")
+            logger.debug("Bearer token missing on %s", request.path)
             return unauthorized_response("Token is missing")
         
         try:
             # Verify token and get user
-            current_user = auth_worker.get_user_from_token(token)
+            current_user = get_auth_worker().get_user_from_token(token)
             
             # Add user to request context
             request.current_user = current_user
@@ -48,7 +48,7 @@ def token_required(f):
         except ValueError as e:
             return unauthorized_response(str(e))
         except Exception as e:
-            print(f"Authentication error: {e}")
+            logger.exception("Authentication error: %s", e)
             return error_response("Authentication failed", status_code=401)
         
         return f(*args, **kwargs)
@@ -0,0 +1,138 @@
+"""
+Response compression
+gzip always, br and zstd when the optional Brotli / zstandard packages
+are installed. The encoding is negotiated from Accept-Encoding (client q
+values first, then COMPRESSION_ENCODINGS order). Bodies under
+COMPRESSION_MIN_SIZE go out as they are; streamed responses have no size
+up front and are compressed chunk by chunk, each chunk flushed so the
+client still receives rows as they are produced.
+"""
+import logging
+import zlib
+from flask import request
+from api.utils.config import Config
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Worth compressing: JSON, text (Prometheus metrics) and friends
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/javascript', 'application/xml')
+
+class _GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    
+    def chunk(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finish(self, data=b''):
+        return self._compressor.compress(data) + self._compressor.flush()
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+    
+    def chunk(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+    
+    def finish(self, data=b''):
+        return self._compressor.process(data) + self._compressor.finish()
+
+class _ZstdStream:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    
+    def chunk(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    
+    def finish(self, data=b''):
+        return self._compressor.compress(data) + self._compressor.flush()
+
+class Compressor:
+    """Compresses eligible responses in an after_request hook"""
+    
+    def __init__(self):
+        self.enabled = Config.COMPRESSION_ENABLED
+        self.min_size = Config.COMPRESSION_MIN_SIZE
+        # Content-Encoding -> (stream class, level), only what is installed
+        available = {'gzip': (_GzipStream, Config.COMPRESSION_GZIP_LEVEL)}
+        if brotli is not None:
+            available['br'] = (_BrotliStream, Config.COMPRESSION_BROTLI_LEVEL)
+        if zstandard is not None:
+            available['zstd'] = (_ZstdStream, Config.COMPRESSION_ZSTD_LEVEL)
+        self.codecs = {name: available[name] for name in Config.COMPRESSION_ENCODINGS if name in available}
+    
+    def init_app(self, app):
+        """Register the hook (after_request hooks run in reverse: register early to run late)"""
+        if self.enabled and self.codecs:
+            app.after_request(self._compress_response)
+            logger.debug("Response compression: %s", ', '.join(self.codecs))
+    
+    def negotiate(self, accept_encodings):
+        """Encoding to use for a request's Accept-Encoding, None for identity"""
+        return accept_encodings.best_match(list(self.codecs))
+    
+    def _eligible(self, response):
+        if request.method == 'HEAD' or response.direct_passthrough:
+            return False
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if 'Content-Encoding' in response.headers:
+            return False
+        mimetype = response.mimetype or ''
+        return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+    
+    def _compress_response(self, response):
+        if not self._eligible(response):
+            return response
+        
+        # The body depends on Accept-Encoding from here on, whatever this client gets
+        response.vary.add('Accept-Encoding')
+        
+        encoding = self.negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+        
+        stream_class, level = self.codecs[encoding]
+        if response.is_streamed:
+            self._compress_stream(response, stream_class(level))
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(stream_class(level).finish(data))
+        
+        response.headers['Content-Encoding'] = encoding
+        return response
+    
+    @staticmethod
+    def _compress_stream(response, stream):
+        """Swap the body iterable for one compressing (and flushing) each chunk"""
+        original = response.response
+        chunks = response.iter_encoded()
+        
+        def generate():
+            try:
+                for chunk in chunks:
+                    if chunk:
+                        yield stream.chunk(chunk)
+                yield stream.finish()
+            finally:
+                # Closing the original iterable ends its request context / cursor
+                if hasattr(original, 'close'):
+                    original.close()
+        
+        response.response = generate()
+        response.headers.pop('Content-Length', None)
+
+# Registered on the app by index.py
+compression = Compressor()
@@ -1 +1,67 @@
-# Empty file
+"""
+Repository factories
+Workers get their repositories from here so the storage backend can be
+switched with STORAGE_BACKEND ('mysql', 'sqlite' or 'memory'). Backends
+are imported lazily: only the selected one is loaded.
+"""
+from api.utils.config import Config
+
+BACKENDS = ('mysql', 'sqlite', 'memory')
+
+# Column order of the task row tuples returned by find_page_by_user and
+# iter_all_by_user (every backend)
+TASK_COLUMNS = ('id', 'title', 'status', 'created_at', 'completed_at')
+
+def get_backend():
+    """Configured backend name, raises ValueError if unknown"""
+    backend = Config.STORAGE_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND '{backend}', expected one of {', '.join(BACKENDS)}")
+    return backend
+
+def get_task_repository():
+    """Task repository of the configured backend"""
+    backend = get_backend()
+    if backend == 'memory':
+        from api.repositories.memory import MemoryTaskRepository
+        return MemoryTaskRepository()
+    if backend == 'sqlite':
+        from api.repositories.sqlite import SQLiteTaskRepository
+        return SQLiteTaskRepository()
+    from api.repositories.task_repository import TaskRepository
+    return TaskRepository()
+
+def get_user_repository():
+    """User repository of the configured backend"""
+    backend = get_backend()
+    if backend == 'memory':
+        from api.repositories.memory import MemoryUserRepository
+        return MemoryUserRepository()
+    if backend == 'sqlite':
+        from api.repositories.sqlite import SQLiteUserRepository
+        return SQLiteUserRepository()
+    from api.repositories.user_repository import UserRepository
+    return UserRepository()
+
+def get_refresh_token_repository():
+    """Refresh token repository of the configured backend"""
+    backend = get_backend()
+    if backend == 'memory':
+        from api.repositories.memory import MemoryRefreshTokenRepository
+        return MemoryRefreshTokenRepository()
+    if backend == 'sqlite':
+        from api.repositories.sqlite import SQLiteRefreshTokenRepository
+        return SQLiteRefreshTokenRepository()
+    from api.repositories.refresh_token_repository import RefreshTokenRepository
+    return RefreshTokenRepository()
+
+def test_storage_connection():
+    """True when the configured backend is reachable"""
+    backend = get_backend()
+    if backend == 'memory':
+        return True
+    if backend == 'sqlite':
+        from api.repositories.sqlite import SQLiteDatabase
+        return SQLiteDatabase.test_connection()
+    from api.utils.database import Database
+    return Database.test_connection()
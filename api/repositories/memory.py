@@ -0,0 +1,539 @@
+"""
+In-memory storage backend (STORAGE_BACKEND=memory)
+Same public methods and return values as the MySQL repositories, backed
+by one process-wide store guarded by a lock. Tasks are indexed by
+user_id and kept sorted by (created_at, id) so pages are bisect seeks;
+the change feed has its own per-user (change_seq, id) lists.
+Nothing is persisted and writes apply immediately (no rollback); meant
+for benchmarks, load tests and single-process demos.
+"""
+import logging
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from heapq import merge
+from itertools import islice
+from operator import itemgetter
+from api.repositories import TASK_COLUMNS
+from api.repositories.task_query import row_getter
+from api.repositories.task_search import title_indexes
+from api.utils.cache import user_cache
+from api.utils.passwords import password_hasher, HasherBusyError
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ('pending', 'in_progress', 'completed')
+# Stored task dict -> TASK_COLUMNS tuple
+_task_row = itemgetter(*TASK_COLUMNS)
+
+def _now():
+    """Current time truncated to whole seconds, like a MySQL TIMESTAMP"""
+    return datetime.now().replace(microsecond=0)
+
+class MemoryStore:
+    """All rows of the memory backend"""
+    
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.clear()
+    
+    def clear(self):
+        """Drop every row and reset the id sequences"""
+        with self.lock:
+            self.users = {}              # id -> row
+            self.user_ids_by_email = {}  # email -> id
+            self.tasks = {}              # id -> row (with user_id)
+            self.task_keys = {}          # user_id -> sorted [(created_at, id)]
+            self.task_stats = {}         # user_id -> {pending, in_progress, completed, version}
+            self.change_keys = {}        # user_id -> sorted [(change_seq, id)] of live tasks
+            self.tombstones = {}         # user_id -> sorted [(change_seq, task_id)]
+            self.deleted_at = {}         # task_id -> when its tombstone was written
+            self.refresh_tokens = {}     # id -> row
+            self.refresh_ids_by_hash = {}
+            self._sequences = {}
+        # Versions restart from zero: cached title indexes would look current
+        title_indexes.clear()
+    
+    def next_id(self, table):
+        """AUTO_INCREMENT equivalent (caller holds the lock)"""
+        value = self._sequences.get(table, 0) + 1
+        self._sequences[table] = value
+        return value
+
+# Shared by every memory repository in the process
+memory_store = MemoryStore()
+
+class MemoryTaskRepository:
+    """Task storage on the in-memory store"""
+    
+    def __init__(self, store=None):
+        self.store = store or memory_store
+    
+    def create_task(self, user_id, title, status='pending'):
+        """Create a new task and return it as stored"""
+        with self.store.lock:
+            task = self._insert(user_id, title, status)
+            self._record_change(user_id, {status: 1}, changed=[task])
+            return self._public(task)
+    
+    def find_all_by_user(self, user_id):
+        """Get all tasks for a user"""
+        return [dict(zip(TASK_COLUMNS, row)) for row in self.iter_all_by_user(user_id)]
+    
+    def create_tasks(self, user_id, tasks):
+        """Create several tasks at once, tasks is a list of (title, status)"""
+        with self.store.lock:
+            created = [self._insert(user_id, title, status) for title, status in tasks]
+            
+            delta = {}
+            for _, status in tasks:
+                delta[status] = delta.get(status, 0) + 1
+            self._record_change(user_id, delta, changed=created)
+            return [self._public(task) for task in created]
+    
+    def iter_all_by_user(self, user_id, batch_size=None, query=None):
+        """Yield all tasks of a user as query.fields tuples, newest first by default (snapshot taken up front)"""
+        get_row = row_getter(query.select_columns()) if query else _task_row
+        with self.store.lock:
+            if query is None or query.is_default:
+                keys = list(self.store.task_keys.get(user_id, ()))
+                rows = [get_row(self.store.tasks[task_id]) for _, task_id in reversed(keys)]
+            else:
+                rows = [get_row(task) for task in self._select(user_id, query)]
+        yield from rows
+    
+    def find_page_by_user(self, user_id, limit, after=None, query=None):
+        """
+        Get one page of tasks for a user, newest first by default
+        Same (sort key, id) keyset contract, TaskQuery filters and row
+        tuples as the MySQL repository
+        """
+        if query is not None and not query.is_default:
+            return self._select_page(user_id, limit, after, query)
+        
+        get_row = row_getter(query.select_columns(keyset=True)) if query else _task_row
+        with self.store.lock:
+            keys = self.store.task_keys.get(user_id, [])
+            end = bisect_left(keys, after) if after else len(keys)
+            start = max(end - limit, 0)
+            tasks = [get_row(self.store.tasks[task_id]) for _, task_id in reversed(keys[start:end])]
+            # The last row of the page is keys[start]: already its (created_at, id)
+            last_key = keys[start] if start > 0 and tasks else None
+        
+        return tasks, last_key
+    
+    def find_by_id(self, task_id, user_id):
+        """Get a specific task by ID for a user"""
+        with self.store.lock:
+            task = self._owned(task_id, user_id)
+            return self._public(task) if task else None
+    
+    def update_task(self, task_id, user_id, title):
+        """Update a task title, None when not found"""
+        with self.store.lock:
+            task = self._owned(task_id, user_id)
+            if not task:
+                return None
+            task['title'] = title
+            self._record_change(user_id, changed=[task])
+            return self._public(task)
+    
+    def update_status(self, task_id, user_id, status):
+        """Update task status, None when not found"""
+        with self.store.lock:
+            task = self._owned(task_id, user_id)
+            if not task:
+                return None
+            
+            delta = {task['status']: -1, status: 1} if task['status'] != status else None
+            task['status'] = status
+            task['completed_at'] = self._completed_at(status)
+            self._record_change(user_id, delta, changed=[task])
+            return self._public(task)
+    
+    def update_status_many(self, user_id, status, task_ids=None, current_status=None):
+        """Same scoping and return value as the MySQL repository"""
+        with self.store.lock:
+            completed_at = self._completed_at(status)
+            found = self._scope(user_id, task_ids, current_status)
+            
+            delta = {}
+            for task in found:
+                delta[task['status']] = delta.get(task['status'], 0) - 1
+                delta[status] = delta.get(status, 0) + 1
+                task['status'] = status
+                task['completed_at'] = completed_at
+            
+            if found:
+                self._record_change(user_id, delta, changed=found)
+            
+            if task_ids is None:
+                return len(found)
+            return [task['id'] for task in found]
+    
+    def delete_task(self, task_id, user_id):
+        """Delete a task"""
+        with self.store.lock:
+            task = self._owned(task_id, user_id)
+            if not task:
+                return False
+            self._remove(task)
+            self._record_change(user_id, {task['status']: -1}, removed=[task])
+            return True
+    
+    def delete_many(self, user_id, task_ids=None, current_status=None):
+        """Same scoping and return value as update_status_many"""
+        with self.store.lock:
+            found = self._scope(user_id, task_ids, current_status)
+            
+            delta = {}
+            for task in found:
+                delta[task['status']] = delta.get(task['status'], 0) - 1
+                self._remove(task)
+            
+            if found:
+                self._record_change(user_id, delta, removed=found)
+            
+            if task_ids is None:
+                return len(found)
+            return [task['id'] for task in found]
+    
+    def get_statistics(self, user_id):
+        """Get task statistics for a user"""
+        with self.store.lock:
+            stats = self.store.task_stats.get(user_id)
+            if not stats:
+                return {"total": 0, "pending": 0, "in_progress": 0, "completed": 0}
+            counts = {status: stats[status] for status in STATUSES}
+        return {"total": sum(counts.values()), **counts}
+    
+    def search_by_user(self, user_id, terms, limit, offset=0, columns=TASK_COLUMNS):
+        """Ranked title search through the in-process TitleIndex, returns (rows, has_more)"""
+        version = self.get_version(user_id)
+        index = title_indexes.get(user_id, version, lambda: list(self.iter_all_by_user(user_id)))
+        return index.search(terms, limit, offset, columns)
+    
+    def find_changes(self, user_id, since, upper, limit, after=None, columns=TASK_COLUMNS):
+        """One page of the user's change feed, same rows as the MySQL repository"""
+        get_row = row_getter(columns)
+        blank = (None,) * (len(columns) - 1)
+        # Seek past the last row sent (first page: past every row of change_seq since)
+        start = after if after is not None else (since if since is not None else -1, float('inf'))
+        end = (upper, float('inf'))
+        
+        with self.store.lock:
+            keys = self.store.change_keys.get(user_id, [])
+            tasks = ((seq, 0, task_id) for seq, task_id in
+                     keys[bisect_right(keys, start):bisect_right(keys, end)])
+            deleted = ()
+            if since is not None:
+                tombstones = self.store.tombstones.get(user_id, [])
+                deleted = ((seq, 1, task_id) for seq, task_id in
+                           tombstones[bisect_right(tombstones, start):bisect_right(tombstones, end)])
+            
+            rows = []
+            for seq, is_deleted, task_id in islice(merge(tasks, deleted), limit + 1):
+                if is_deleted:
+                    rows.append((seq, 1, task_id, *blank))
+                else:
+                    rows.append((seq, 0, *get_row(self.store.tasks[task_id])))
+        return rows
+    
+    def prune_tombstones(self, days):
+        """Delete tombstones older than days, returns how many were removed"""
+        cutoff = _now() - timedelta(days=days)
+        count = 0
+        with self.store.lock:
+            for user_id, tombstones in self.store.tombstones.items():
+                kept = []
+                for key in tombstones:
+                    if self.store.deleted_at[key[1]] < cutoff:
+                        del self.store.deleted_at[key[1]]
+                    else:
+                        kept.append(key)
+                count += len(tombstones) - len(kept)
+                self.store.tombstones[user_id] = kept
+        return count
+    
+    def get_version(self, user_id):
+        """Current change version of a user's tasks"""
+        with self.store.lock:
+            stats = self.store.task_stats.get(user_id)
+            return stats['version'] if stats else 0
+    
+    def rebuild_statistics(self, user_id=None):
+        """Recompute the counters from the tasks, returns users reconciled"""
+        with self.store.lock:
+            user_ids = [user_id] if user_id is not None else list(self.store.users)
+            user_ids = [uid for uid in user_ids if uid in self.store.users]
+            
+            for uid in user_ids:
+                counts = dict.fromkeys(STATUSES, 0)
+                for _, task_id in self.store.task_keys.get(uid, ()):
+                    counts[self.store.tasks[task_id]['status']] += 1
+                
+                stats = self.store.task_stats.get(uid)
+                version = stats['version'] + 1 if stats else 0
+                self.store.task_stats[uid] = {**counts, "version": version}
+            return len(user_ids)
+    
+    def _insert(self, user_id, title, status):
+        task = {
+            "id": self.store.next_id('tasks'),
+            "user_id": user_id,
+            "title": title,
+            "status": status,
+            "created_at": _now(),
+            "completed_at": None
+        }
+        self.store.tasks[task['id']] = task
+        insort(self.store.task_keys.setdefault(user_id, []), (task['created_at'], task['id']))
+        return task
+    
+    def _remove(self, task):
+        keys = self.store.task_keys[task['user_id']]
+        del keys[bisect_left(keys, (task['created_at'], task['id']))]
+        del self.store.tasks[task['id']]
+    
+    def _select(self, user_id, query, after=None):
+        """Tasks of a user passing query's filters, in its order (caller holds the lock)"""
+        tasks = [self.store.tasks[task_id] for _, task_id in self.store.task_keys.get(user_id, ())]
+        tasks = [task for task in tasks if query.matches(task)]
+        sort_key = query.sort_key
+        column = query.sort
+        tasks.sort(key=lambda task: sort_key(task[column], task['id']), reverse=query.descending)
+        
+        if after is not None:
+            pivot = sort_key(*after)
+            if query.descending:
+                tasks = [task for task in tasks if sort_key(task[column], task['id']) < pivot]
+            else:
+                tasks = [task for task in tasks if sort_key(task[column], task['id']) > pivot]
+        return tasks
+    
+    def _select_page(self, user_id, limit, after, query):
+        """find_page_by_user for filtered or re-sorted lists (a scan, no index)"""
+        get_row = row_getter(query.select_columns(keyset=True))
+        with self.store.lock:
+            selected = self._select(user_id, query, after)
+            tasks = [get_row(task) for task in selected[:limit]]
+            last = selected[limit - 1] if len(selected) > limit else None
+        
+        last_key = (last[query.sort], last['id']) if last else None
+        return tasks, last_key
+    
+    def _owned(self, task_id, user_id):
+        task = self.store.tasks.get(task_id)
+        return task if task and task['user_id'] == user_id else None
+    
+    def _scope(self, user_id, task_ids, current_status):
+        """Tasks selected by a bulk operation (ids owned by the user, or a status)"""
+        if task_ids is None:
+            return [
+                self.store.tasks[task_id]
+                for _, task_id in self.store.task_keys.get(user_id, ())
+                if self.store.tasks[task_id]['status'] == current_status
+            ]
+        found = [self._owned(task_id, user_id) for task_id in sorted(set(task_ids))]
+        return [task for task in found if task]
+    
+    def _record_change(self, user_id, delta=None, changed=(), removed=()):
+        """Adjust the status counters, bump the version and log the changed / removed tasks under it"""
+        stats = self.store.task_stats.get(user_id)
+        if stats is None:
+            stats = self.store.task_stats[user_id] = {**dict.fromkeys(STATUSES, 0), "version": 0}
+        for status, change in (delta or {}).items():
+            stats[status] += change
+        stats['version'] += 1
+        version = stats['version']
+        
+        # The new version is above every logged one: appending keeps the lists sorted
+        keys = self.store.change_keys.setdefault(user_id, [])
+        for task in sorted(changed, key=itemgetter('id')):
+            if 'change_seq' in task:
+                del keys[bisect_left(keys, (task['change_seq'], task['id']))]
+            task['change_seq'] = version
+            keys.append((version, task['id']))
+        
+        if removed:
+            now = _now()
+            tombstones = self.store.tombstones.setdefault(user_id, [])
+            for task in sorted(removed, key=itemgetter('id')):
+                del keys[bisect_left(keys, (task['change_seq'], task['id']))]
+                tombstones.append((version, task['id']))
+                self.store.deleted_at[task['id']] = now
+    
+    @staticmethod
+    def _public(task):
+        """Copy of a task without user_id, as the SELECTs return it"""
+        return {field: task[field] for field in TASK_COLUMNS}
+    
+    @staticmethod
+    def _completed_at(status):
+        return _now() if status == 'completed' else None
+
+class MemoryUserRepository:
+    """User storage on the in-memory store"""
+    
+    def __init__(self, store=None):
+        self.store = store or memory_store
+    
+    def create_user(self, email, password, name):
+        """Create a new user"""
+        hashed_password = password_hasher.hash(password).decode('utf-8')
+        with self.store.lock:
+            if email in self.store.user_ids_by_email:
+                raise ValueError("Email already registered")
+            user_id = self.store.next_id('users')
+            self.store.users[user_id] = {
+                "id": user_id,
+                "email": email,
+                "password": hashed_password,
+                "name": name,
+                "created_at": _now()
+            }
+            self.store.user_ids_by_email[email] = user_id
+            return user_id
+    
+    def find_by_email(self, email):
+        """Find user by email (with password hash)"""
+        with self.store.lock:
+            user_id = self.store.user_ids_by_email.get(email)
+            return dict(self.store.users[user_id]) if user_id else None
+    
+    def find_by_id(self, user_id):
+        """Find user by ID"""
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+            return self._public(user) if user else None
+    
+    def verify_password(self, plain_password, hashed_password):
+        """Verify password against hash"""
+        try:
+            return password_hasher.verify(plain_password, hashed_password)
+        except HasherBusyError:
+            raise
+        except Exception as e:
+            logger.error("Error verifying password: %s", e)
+            return False
+    
+    def needs_rehash(self, hashed_password):
+        """True when a stored hash was made with a different BCRYPT_ROUNDS"""
+        return password_hasher.needs_rehash(hashed_password)
+    
+    def release_connection(self):
+        """Nothing to hand back: the memory store holds no connections"""
+    
+    def update_password_hash(self, user_id, plain_password):
+        """Re-hash a password with the current cost and store it"""
+        hashed_password = password_hasher.hash(plain_password).decode('utf-8')
+        with self.store.lock:
+            if user_id in self.store.users:
+                self.store.users[user_id]['password'] = hashed_password
+    
+    def email_exists(self, email):
+        """Check if email already exists"""
+        with self.store.lock:
+            return email in self.store.user_ids_by_email
+    
+    def update_user(self, user_id, name, email, new_password=None):
+        """Update user information"""
+        hashed_password = password_hasher.hash(new_password).decode('utf-8') if new_password else None
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+            if not user:
+                return None
+            if email != user['email']:
+                if email in self.store.user_ids_by_email:
+                    raise ValueError("Email already in use")
+                del self.store.user_ids_by_email[user['email']]
+                self.store.user_ids_by_email[email] = user_id
+            user['name'] = name
+            user['email'] = email
+            if hashed_password:
+                user['password'] = hashed_password
+            updated_user = self._public(user)
+        
+        user_cache.invalidate(user_id)
+        return updated_user
+    
+    @staticmethod
+    def _public(user):
+        return {field: user[field] for field in ('id', 'email', 'name', 'created_at')}
+
+class MemoryRefreshTokenRepository:
+    """Refresh token storage on the in-memory store"""
+    
+    def __init__(self, store=None):
+        self.store = store or memory_store
+    
+    def create_token(self, user_id, token_hash, family_id, expires_at):
+        """Store a new refresh token (hash only)"""
+        with self.store.lock:
+            token_id = self.store.next_id('refresh_tokens')
+            self.store.refresh_tokens[token_id] = {
+                "id": token_id,
+                "user_id": user_id,
+                "token_hash": token_hash,
+                "family_id": family_id,
+                "expires_at": expires_at,
+                "revoked_at": None,
+                "created_at": _now()
+            }
+            self.store.refresh_ids_by_hash[token_hash] = token_id
+            return token_id
+    
+    def find_for_rotation(self, token_hash):
+        """Find a token with its user"""
+        with self.store.lock:
+            token = self.store.refresh_tokens.get(self.store.refresh_ids_by_hash.get(token_hash))
+            user = self.store.users.get(token['user_id']) if token else None
+            if not user:
+                return None
+            return {
+                "id": token['id'],
+                "user_id": token['user_id'],
+                "family_id": token['family_id'],
+                "expires_at": token['expires_at'],
+                "revoked_at": token['revoked_at'],
+                "email": user['email'],
+                "name": user['name'],
+                "created_at": user['created_at']
+            }
+    
+    def revoke_token(self, token_id):
+        """Revoke a single token, returns True if it was still active"""
+        with self.store.lock:
+            token = self.store.refresh_tokens.get(token_id)
+            if not token or token['revoked_at'] is not None:
+                return False
+            token['revoked_at'] = _now()
+            return True
+    
+    def revoke_family(self, family_id, commit=False):
+        """Revoke every token descended from the same login"""
+        return self._revoke(lambda token: token['family_id'] == family_id)
+    
+    def revoke_all_for_user(self, user_id):
+        """Revoke every active token of a user"""
+        return self._revoke(lambda token: token['user_id'] == user_id)
+    
+    def delete_expired(self):
+        """Delete expired tokens, returns how many were removed"""
+        now = datetime.now()
+        with self.store.lock:
+            expired = [token for token in self.store.refresh_tokens.values() if token['expires_at'] < now]
+            for token in expired:
+                del self.store.refresh_tokens[token['id']]
+                del self.store.refresh_ids_by_hash[token['token_hash']]
+            return len(expired)
+    
+    def _revoke(self, matches):
+        now = _now()
+        count = 0
+        with self.store.lock:
+            for token in self.store.refresh_tokens.values():
+                if token['revoked_at'] is None and matches(token):
+                    token['revoked_at'] = now
+                    count += 1
+        return count
@@ -0,0 +1,106 @@
+"""
+Refresh Token Repository - Database operations for refresh tokens
+"""
+import logging
+from api.utils.database import Database
+
+logger = logging.getLogger(__name__)
+
+class RefreshTokenRepository:
+    """Handles all database operations related to refresh tokens"""
+    
+    def __init__(self):
+        self.db = Database()
+    
+    def create_token(self, user_id, token_hash, family_id, expires_at):
+        """Store a new refresh token (hash only)"""
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                query = """
+                    INSERT INTO refresh_tokens (user_id, token_hash, family_id, expires_at)
+                    VALUES (%s, %s, %s, %s)
+                """
+                cursor.execute(query, (user_id, token_hash, family_id, expires_at))
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error("Error creating refresh token: %s", e)
+            raise
+    
+    def find_for_rotation(self, token_hash):
+        """
+        Find a token with its user, locking the row so two concurrent
+        refreshes of the same token cannot both succeed
+        """
+        try:
+            with self.db.connection() as conn, conn.cursor(dictionary=True) as cursor:
+                query = """
+                    SELECT r.id, r.user_id, r.family_id, r.expires_at, r.revoked_at,
+                           u.email, u.name, u.created_at
+                    FROM refresh_tokens r
+                    JOIN users u ON u.id = r.user_id
+                    WHERE r.token_hash = %s
+                    FOR UPDATE
+                """
+                cursor.execute(query, (token_hash,))
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error("Error finding refresh token: %s", e)
+            raise
+    
+    def revoke_token(self, token_id):
+        """Revoke a single token, returns True if it was still active"""
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                query = """
+                    UPDATE refresh_tokens SET revoked_at = NOW()
+                    WHERE id = %s AND revoked_at IS NULL
+                """
+                cursor.execute(query, (token_id,))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error("Error revoking refresh token: %s", e)
+            raise
+    
+    def revoke_family(self, family_id, commit=False):
+        """
+        Revoke every token descended from the same login
+        commit=True persists the revocation right away, for callers that
+        are about to answer with an error (which rolls the request back)
+        """
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                query = """
+                    UPDATE refresh_tokens SET revoked_at = NOW()
+                    WHERE family_id = %s AND revoked_at IS NULL
+                """
+                cursor.execute(query, (family_id,))
+                if commit:
+                    conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            logger.error("Error revoking refresh token family: %s", e)
+            raise
+    
+    def revoke_all_for_user(self, user_id):
+        """Revoke every active token of a user (password change)"""
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                query = """
+                    UPDATE refresh_tokens SET revoked_at = NOW()
+                    WHERE user_id = %s AND revoked_at IS NULL
+                """
+                cursor.execute(query, (user_id,))
+                return cursor.rowcount
+        except Exception as e:
+            logger.error("Error revoking refresh tokens: %s", e)
+            raise
+    
+    def delete_expired(self):
+        """Delete expired tokens, returns how many were removed"""
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                cursor.execute("DELETE FROM refresh_tokens WHERE expires_at < NOW()")
+                return cursor.rowcount
+        except Exception as e:
+            logger.error("Error deleting expired refresh tokens: %s", e)
+            raise
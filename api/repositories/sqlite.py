@@ -0,0 +1,830 @@
+"""
+SQLite storage backend (STORAGE_BACKEND=sqlite)
+Same public methods and return values as the MySQL repositories, on a
+single database file (SQLITE_PATH) in WAL mode with the schema of
+database.sql. Inside a Flask request all repository calls share one
+connection, finished by the same request hooks as MySQL (Database.init_app).
+Write methods open the transaction with BEGIN IMMEDIATE, which takes the
+write lock up front and plays the role of SELECT ... FOR UPDATE.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import g, has_request_context
+from api.repositories import TASK_COLUMNS
+from api.repositories.task_changes import build_changes_query
+from api.repositories.task_query import TaskQuery
+from api.repositories.task_search import title_indexes
+from api.utils.cache import user_cache
+from api.utils.config import Config
+from api.utils.database import Database
+from api.utils.metrics import metrics
+from api.utils.passwords import password_hasher, HasherBusyError
+from api.utils.profiler import profiler
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ('pending', 'in_progress', 'completed')
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Bound parameters per statement (SQLITE_MAX_VARIABLE_NUMBER default)
+MAX_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    name TEXT NOT NULL,
+    created_at DATETIME NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'in_progress', 'completed')),
+    created_at DATETIME NOT NULL,
+    completed_at DATETIME NULL,
+    change_seq INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS task_stats (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    pending INTEGER NOT NULL DEFAULT 0,
+    in_progress INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS task_tombstones (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    change_seq INTEGER NOT NULL,
+    task_id INTEGER NOT NULL,
+    deleted_at DATETIME NOT NULL,
+    PRIMARY KEY (user_id, change_seq, task_id)
+);
+CREATE INDEX IF NOT EXISTS idx_tombstone_deleted_at ON task_tombstones (deleted_at);
+
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    token_hash TEXT NOT NULL UNIQUE,
+    family_id TEXT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    revoked_at DATETIME NULL,
+    created_at DATETIME NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_family_id ON refresh_tokens (family_id);
+CREATE INDEX IF NOT EXISTS idx_refresh_user_id ON refresh_tokens (user_id);
+CREATE INDEX IF NOT EXISTS idx_expires_at ON refresh_tokens (expires_at);
+"""
+
+# Columns added after the first release: (table, column, definition)
+UPGRADES = (
+    ('tasks', 'change_seq', 'INTEGER NOT NULL DEFAULT 0'),
+)
+# Indexes on upgraded columns, created once the columns exist
+UPGRADE_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_user_change ON tasks (user_id, change_seq, id);
+DROP INDEX IF EXISTS idx_status;
+DROP INDEX IF EXISTS idx_created_at;
+"""
+# Task list indexes, one per sort, covering TASK_COLUMNS (see task_query).
+# Rebuilt when an older file has them with other columns.
+LIST_INDEXES = (
+    ('idx_user_created', 'user_id, created_at, id, status, completed_at, title'),
+    ('idx_user_status_created', 'user_id, status, created_at, id, completed_at, title'),
+    ('idx_user_completed', 'user_id, completed_at, id, status, created_at, title'),
+    ('idx_user_title', 'user_id, title COLLATE NOCASE, id, status, created_at, completed_at'),
+)
+
+# Version the current write will be recorded under (writes are serialized)
+NEXT_VERSION = "(SELECT COALESCE(MAX(version), 0) + 1 FROM task_stats WHERE user_id = ?)"
+
+# DATETIME columns round-trip as naive datetimes, like mysql-connector
+sqlite3.register_adapter(datetime, lambda value: value.strftime(DATETIME_FORMAT))
+sqlite3.register_converter('DATETIME', lambda value: datetime.strptime(value.decode('ascii'), DATETIME_FORMAT))
+
+def _now():
+    """Current time truncated to whole seconds, like a MySQL TIMESTAMP"""
+    return datetime.now().replace(microsecond=0)
+
+def _dict_factory(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Reports statements to metrics and the profiler, like the MySQL pool's on_query hook"""
+    
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        cursor = super().execute(sql, parameters)
+        # Transaction control and pragmas are not counted, as with MySQL
+        if not sql.startswith(('BEGIN', 'PRAGMA')):
+            seconds = time.perf_counter() - started
+            metrics.record_query(sql, seconds, cursor.rowcount)
+            profiler.record_query(sql, seconds, cursor.rowcount)
+        return cursor
+
+class SQLiteDatabase:
+    """Connections to the SQLite file, schema created on first use"""
+    
+    _initialized = False
+    _lock = threading.Lock()
+    
+    @classmethod
+    def connect(cls):
+        """Open a connection (autocommit: transactions are explicit)"""
+        conn = sqlite3.connect(
+            Config.SQLITE_PATH,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None,
+            check_same_thread=False,
+            timeout=Config.SQLITE_BUSY_TIMEOUT_SECONDS,
+            factory=InstrumentedConnection
+        )
+        conn.row_factory = _dict_factory
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        
+        if not cls._initialized:
+            with cls._lock:
+                if not cls._initialized:
+                    conn.execute("PRAGMA journal_mode = WAL")
+                    conn.executescript(SCHEMA)
+                    cls._upgrade(conn)
+                    cls._initialized = True
+                    logger.info("SQLite database ready at %s", Config.SQLITE_PATH)
+        return conn
+    
+    @staticmethod
+    def _upgrade(conn):
+        """Bring database files created by older versions up to SCHEMA"""
+        for table, column, definition in UPGRADES:
+            columns = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                logger.info("SQLite schema upgraded: %s.%s", table, column)
+        conn.executescript(UPGRADE_INDEXES)
+        # executescript: schema changes are not the current request's statements
+        for name, columns in LIST_INDEXES:
+            current = [row['name'] for row in conn.execute(f"PRAGMA index_info({name})")]
+            if current != [column.split()[0] for column in columns.split(', ')]:
+                if current:
+                    conn.executescript(f"DROP INDEX {name};")
+                    logger.info("SQLite schema upgraded: %s", name)
+                conn.executescript(f"CREATE INDEX {name} ON tasks ({columns});")
+    
+    @classmethod
+    @contextmanager
+    def connection(cls):
+        """Connection for one unit of work, same contract as Database.connection"""
+        if has_request_context():
+            conn = g.get('_db_connection')
+            if conn is None:
+                conn = cls.connect()
+                g._db_connection = conn
+            yield conn
+            return
+        
+        conn = cls.connect()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def after_commit(callback):
+        """Same contract as Database.after_commit (the request hooks are shared)"""
+        Database.after_commit(callback)
+    
+    @staticmethod
+    def release():
+        """Same contract as Database.release"""
+        Database.release()
+    
+    @staticmethod
+    def begin_write(conn):
+        """Start a write transaction unless one is already open"""
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+    
+    @classmethod
+    def test_connection(cls):
+        """Test database connection"""
+        try:
+            with cls.connection() as conn:
+                return conn.execute("SELECT 1 AS ok").fetchone() is not None
+        except Exception as e:
+            logger.error("SQLite connection test failed: %s", e)
+            return False
+
+class SQLiteTaskRepository:
+    """Task storage on SQLite"""
+    
+    def __init__(self):
+        self.db = SQLiteDatabase
+    
+    def create_task(self, user_id, title, status='pending'):
+        """Create a new task and return it as stored"""
+        created_at = _now()
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                cursor = conn.execute(
+                    "INSERT INTO tasks (user_id, title, status, created_at, change_seq) "
+                    f"VALUES (?, ?, ?, ?, {NEXT_VERSION})",
+                    (user_id, title, status, created_at, user_id)
+                )
+                self._record_change(conn, user_id, {status: 1})
+                return {
+                    "id": cursor.lastrowid,
+                    "title": title,
+                    "status": status,
+                    "created_at": created_at,
+                    "completed_at": None
+                }
+        except Exception as e:
+            logger.error("Error creating task: %s", e)
+            raise
+    
+    def find_all_by_user(self, user_id):
+        """Get all tasks for a user"""
+        return [dict(zip(TASK_COLUMNS, row)) for row in self.iter_all_by_user(user_id)]
+    
+    def create_tasks(self, user_id, tasks):
+        """Create several tasks in a single transaction"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                created_at = _now()
+                # Multi-row INSERTs; every row takes the version of this write
+                chunk_size = MAX_VARIABLES // 5
+                for start in range(0, len(tasks), chunk_size):
+                    chunk = tasks[start:start + chunk_size]
+                    values = []
+                    for title, status in chunk:
+                        values.extend((user_id, title, status, created_at, user_id))
+                    conn.execute(
+                        "INSERT INTO tasks (user_id, title, status, created_at, change_seq) VALUES "
+                        + ", ".join([f"(?, ?, ?, ?, {NEXT_VERSION})"] * len(chunk)),
+                        values
+                    )
+                
+                delta = {}
+                for _, status in tasks:
+                    delta[status] = delta.get(status, 0) + 1
+                self._record_change(conn, user_id, delta)
+                
+                # The batch is the only write recorded under that version
+                query = """
+                    SELECT id, title, status, created_at, completed_at
+                    FROM tasks
+                    WHERE user_id = ? AND change_seq = (SELECT version FROM task_stats WHERE user_id = ?)
+                    ORDER BY id ASC
+                """
+                return conn.execute(query, (user_id, user_id)).fetchall()
+        except Exception as e:
+            logger.error("Error creating tasks: %s", e)
+            raise
+    
+    def iter_all_by_user(self, user_id, batch_size=500, query=None):
+        """Yield all tasks of a user as query.fields tuples (query's order and filters) on a dedicated connection"""
+        query = query or TaskQuery()
+        where, params = query.build_where(user_id, placeholder='?', nocase_title=True)
+        
+        conn = self.db.connect()
+        try:
+            cursor = conn.execute(
+                f"""
+                SELECT {query.build_select()}
+                FROM tasks
+                WHERE {where}
+                ORDER BY {query.build_order(nocase_title=True)}
+                """,
+                params
+            )
+            cursor.row_factory = None
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        except Exception as e:
+            logger.error("Error streaming tasks: %s", e)
+            raise
+        finally:
+            conn.close()
+    
+    def find_page_by_user(self, user_id, limit, after=None, query=None):
+        """One page of query.select_columns(keyset=True) tuples ((sort key, id) keyset, TaskQuery filters)"""
+        query = query or TaskQuery()
+        sql, params = query.build_page(user_id, limit, after, placeholder='?', nocase_title=True)
+        
+        try:
+            with self.db.connection() as conn:
+                cursor = conn.execute(sql, params)
+                cursor.row_factory = None
+                tasks = cursor.fetchall()
+            
+            last_key = None
+            if len(tasks) > limit:
+                tasks = tasks[:limit]
+                last = tasks[-1]
+                last_key = (last[query.select_columns(keyset=True).index(query.sort)], last[0])  # (sort key, id)
+            return tasks, last_key
+        except Exception as e:
+            logger.error("Error fetching tasks page: %s", e)
+            raise
+    
+    def find_by_id(self, task_id, user_id):
+        """Get a specific task by ID for a user"""
+        try:
+            with self.db.connection() as conn:
+                return self._fetch_task(conn, task_id, user_id)
+        except Exception as e:
+            logger.error("Error finding task: %s", e)
+            raise
+    
+    def update_task(self, task_id, user_id, title):
+        """Update a task title, None when not found"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                cursor = conn.execute(
+                    f"UPDATE tasks SET title = ?, change_seq = {NEXT_VERSION} WHERE id = ? AND user_id = ?",
+                    (title, user_id, task_id, user_id)
+                )
+                if cursor.rowcount == 0:
+                    return None
+                self._record_change(conn, user_id)
+                return self._fetch_task(conn, task_id, user_id)
+        except Exception as e:
+            logger.error("Error updating task: %s", e)
+            raise
+    
+    def update_status(self, task_id, user_id, status):
+        """Update task status, None when not found"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                task = self._fetch_task(conn, task_id, user_id)
+                if not task:
+                    return None
+                
+                completed_at = self._completed_at(status)
+                conn.execute(
+                    f"UPDATE tasks SET status = ?, completed_at = ?, change_seq = {NEXT_VERSION} "
+                    "WHERE id = ? AND user_id = ?",
+                    (status, completed_at, user_id, task_id, user_id)
+                )
+                
+                delta = {task['status']: -1, status: 1} if task['status'] != status else None
+                self._record_change(conn, user_id, delta)
+                
+                task['status'] = status
+                task['completed_at'] = completed_at
+                return task
+        except Exception as e:
+            logger.error("Error updating task status: %s", e)
+            raise
+    
+    def update_status_many(self, user_id, status, task_ids=None, current_status=None):
+        """Same scoping and return value as the MySQL repository"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                completed_at = self._completed_at(status)
+                
+                if task_ids is None:
+                    cursor = conn.execute(
+                        f"UPDATE tasks SET status = ?, completed_at = ?, change_seq = {NEXT_VERSION} "
+                        "WHERE user_id = ? AND status = ?",
+                        (status, completed_at, user_id, user_id, current_status)
+                    )
+                    updated = cursor.rowcount
+                    if updated:
+                        delta = {current_status: -updated, status: updated} if current_status != status else None
+                        self._record_change(conn, user_id, delta)
+                    return updated
+                
+                found = self._find_tasks(conn, user_id, task_ids)
+                found_ids = [task_id for task_id, _ in found]
+                if found_ids:
+                    placeholders = ', '.join(['?'] * len(found_ids))
+                    conn.execute(
+                        f"UPDATE tasks SET status = ?, completed_at = ?, change_seq = {NEXT_VERSION} "
+                        f"WHERE user_id = ? AND id IN ({placeholders})",
+                        (status, completed_at, user_id, user_id, *found_ids)
+                    )
+                    delta = {status: len(found_ids)}
+                    for _, old_status in found:
+                        delta[old_status] = delta.get(old_status, 0) - 1
+                    self._record_change(conn, user_id, delta)
+                return found_ids
+        except Exception as e:
+            logger.error("Error updating task statuses: %s", e)
+            raise
+    
+    def delete_task(self, task_id, user_id):
+        """Delete a task"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                found = self._find_tasks(conn, user_id, [task_id])
+                if not found:
+                    return False
+                self._add_tombstones(conn, user_id, "id = ?", (task_id,))
+                conn.execute("DELETE FROM tasks WHERE id = ? AND user_id = ?", (task_id, user_id))
+                self._record_change(conn, user_id, {found[0][1]: -1})
+                return True
+        except Exception as e:
+            logger.error("Error deleting task: %s", e)
+            raise
+    
+    def delete_many(self, user_id, task_ids=None, current_status=None):
+        """Same scoping and return value as update_status_many"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                if task_ids is None:
+                    self._add_tombstones(conn, user_id, "status = ?", (current_status,))
+                    cursor = conn.execute(
+                        "DELETE FROM tasks WHERE user_id = ? AND status = ?",
+                        (user_id, current_status)
+                    )
+                    deleted = cursor.rowcount
+                    if deleted:
+                        self._record_change(conn, user_id, {current_status: -deleted})
+                    return deleted
+                
+                found = self._find_tasks(conn, user_id, task_ids)
+                found_ids = [task_id for task_id, _ in found]
+                if found_ids:
+                    placeholders = ', '.join(['?'] * len(found_ids))
+                    self._add_tombstones(conn, user_id, f"id IN ({placeholders})", found_ids)
+                    conn.execute(
+                        f"DELETE FROM tasks WHERE user_id = ? AND id IN ({placeholders})",
+                        (user_id, *found_ids)
+                    )
+                    delta = {}
+                    for _, old_status in found:
+                        delta[old_status] = delta.get(old_status, 0) - 1
+                    self._record_change(conn, user_id, delta)
+                return found_ids
+        except Exception as e:
+            logger.error("Error deleting tasks: %s", e)
+            raise
+    
+    def get_statistics(self, user_id):
+        """Get task statistics for a user"""
+        try:
+            with self.db.connection() as conn:
+                stats = conn.execute(
+                    """
+                    SELECT pending + in_progress + completed AS total,
+                           pending, in_progress, completed
+                    FROM task_stats
+                    WHERE user_id = ?
+                    """,
+                    (user_id,)
+                ).fetchone()
+            
+            if not stats:
+                return {"total": 0, "pending": 0, "in_progress": 0, "completed": 0}
+            return stats
+        except Exception as e:
+            logger.error("Error getting statistics: %s", e)
+            raise
+    
+    def search_by_user(self, user_id, terms, limit, offset=0, columns=TASK_COLUMNS):
+        """Ranked title search through the in-process TitleIndex, returns (rows, has_more)"""
+        version = self.get_version(user_id)
+        index = title_indexes.get(user_id, version, lambda: list(self.iter_all_by_user(user_id)))
+        return index.search(terms, limit, offset, columns)
+    
+    def find_changes(self, user_id, since, upper, limit, after=None, columns=TASK_COLUMNS):
+        """One page of the user's change feed, same rows as the MySQL repository"""
+        try:
+            with self.db.connection() as conn:
+                query, params = build_changes_query(user_id, since, upper, limit, after, columns, '?')
+                cursor = conn.execute(query, params)
+                cursor.row_factory = None
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error("Error fetching task changes: %s", e)
+            raise
+    
+    def prune_tombstones(self, days):
+        """Delete tombstones older than days, returns how many were removed"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                cursor = conn.execute(
+                    "DELETE FROM task_tombstones WHERE deleted_at < ?",
+                    (_now() - timedelta(days=days),)
+                )
+                return cursor.rowcount
+        except Exception as e:
+            logger.error("Error pruning task tombstones: %s", e)
+            raise
+    
+    def get_version(self, user_id):
+        """Current change version of a user's tasks"""
+        try:
+            with self.db.connection() as conn:
+                row = conn.execute("SELECT version FROM task_stats WHERE user_id = ?", (user_id,)).fetchone()
+            return row['version'] if row else 0
+        except Exception as e:
+            logger.error("Error getting task version: %s", e)
+            raise
+    
+    def rebuild_statistics(self, user_id=None):
+        """Recompute task_stats from the tasks table, returns users reconciled"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                scope = "WHERE u.id = ?" if user_id is not None else ""
+                params = (user_id,) if user_id is not None else ()
+                conn.execute(
+                    f"""
+                    INSERT INTO task_stats (user_id, pending, in_progress, completed)
+                    SELECT
+                        u.id,
+                        COALESCE(SUM(t.status = 'pending'), 0),
+                        COALESCE(SUM(t.status = 'in_progress'), 0),
+                        COALESCE(SUM(t.status = 'completed'), 0)
+                    FROM users u
+                    LEFT JOIN tasks t ON t.user_id = u.id
+                    {scope}
+                    GROUP BY u.id
+                    ON CONFLICT (user_id) DO UPDATE SET
+                        pending = excluded.pending,
+                        in_progress = excluded.in_progress,
+                        completed = excluded.completed,
+                        version = version + 1
+                    """,
+                    params
+                )
+                row = conn.execute(f"SELECT COUNT(*) AS users FROM users u {scope}", params).fetchone()
+                return row['users']
+        except Exception as e:
+            logger.error("Error rebuilding statistics: %s", e)
+            raise
+    
+    def _fetch_task(self, conn, task_id, user_id):
+        return conn.execute(
+            """
+            SELECT id, title, status, created_at, completed_at
+            FROM tasks
+            WHERE id = ? AND user_id = ?
+            """,
+            (task_id, user_id)
+        ).fetchone()
+    
+    def _find_tasks(self, conn, user_id, task_ids):
+        """Subset of task_ids owned by the user, as (id, status) pairs"""
+        placeholders = ', '.join(['?'] * len(task_ids))
+        rows = conn.execute(
+            f"SELECT id, status FROM tasks WHERE user_id = ? AND id IN ({placeholders}) ORDER BY id",
+            (user_id, *task_ids)
+        ).fetchall()
+        return [(row['id'], row['status']) for row in rows]
+    
+    def _add_tombstones(self, conn, user_id, condition, params):
+        """Tombstones for the user's tasks matching condition, before they are deleted"""
+        conn.execute(
+            f"""
+            INSERT INTO task_tombstones (user_id, change_seq, task_id, deleted_at)
+            SELECT user_id, {NEXT_VERSION}, id, ? FROM tasks
+            WHERE user_id = ? AND {condition}
+            """,
+            (user_id, _now(), user_id, *params)
+        )
+    
+    def _record_change(self, conn, user_id, delta=None):
+        """Adjust the status counters and bump the version (after the rows took NEXT_VERSION)"""
+        delta = delta or {}
+        changes = [delta.get(status, 0) for status in STATUSES]
+        conn.execute(
+            """
+            INSERT INTO task_stats (user_id, pending, in_progress, completed, version)
+            VALUES (?, ?, ?, ?, 1)
+            ON CONFLICT (user_id) DO UPDATE SET
+                pending = pending + excluded.pending,
+                in_progress = in_progress + excluded.in_progress,
+                completed = completed + excluded.completed,
+                version = version + 1
+            """,
+            (user_id, *changes)
+        )
+    
+    @staticmethod
+    def _completed_at(status):
+        return _now() if status == 'completed' else None
+
+class SQLiteUserRepository:
+    """User storage on SQLite"""
+    
+    def __init__(self):
+        self.db = SQLiteDatabase
+    
+    def create_user(self, email, password, name):
+        """Create a new user"""
+        try:
+            hashed_password = password_hasher.hash(password).decode('utf-8')
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                cursor = conn.execute(
+                    "INSERT INTO users (email, password, name, created_at) VALUES (?, ?, ?, ?)",
+                    (email, hashed_password, name, _now())
+                )
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error("Error creating user: %s", e)
+            raise
+    
+    def find_by_email(self, email):
+        """Find user by email"""
+        try:
+            with self.db.connection() as conn:
+                return conn.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+        except Exception as e:
+            logger.error("Error finding user by email: %s", e)
+            raise
+    
+    def find_by_id(self, user_id):
+        """Find user by ID"""
+        try:
+            with self.db.connection() as conn:
+                return conn.execute(
+                    "SELECT id, email, name, created_at FROM users WHERE id = ?", (user_id,)
+                ).fetchone()
+        except Exception as e:
+            logger.error("Error finding user by ID: %s", e)
+            raise
+    
+    def verify_password(self, plain_password, hashed_password):
+        """Verify password against hash"""
+        try:
+            return password_hasher.verify(plain_password, hashed_password)
+        except HasherBusyError:
+            raise
+        except Exception as e:
+            logger.error("Error verifying password: %s", e)
+            return False
+    
+    def needs_rehash(self, hashed_password):
+        """True when a stored hash was made with a different BCRYPT_ROUNDS"""
+        return password_hasher.needs_rehash(hashed_password)
+    
+    def release_connection(self):
+        """Hand the request's connection back before bcrypt (see Database.release)"""
+        self.db.release()
+    
+    def update_password_hash(self, user_id, plain_password):
+        """Re-hash a password with the current cost and store it"""
+        try:
+            hashed_password = password_hasher.hash(plain_password).decode('utf-8')
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                conn.execute("UPDATE users SET password = ? WHERE id = ?", (hashed_password, user_id))
+        except Exception as e:
+            logger.error("Error updating password hash: %s", e)
+            raise
+    
+    def email_exists(self, email):
+        """Check if email already exists"""
+        return self.find_by_email(email) is not None
+    
+    def update_user(self, user_id, name, email, new_password=None):
+        """Update user information"""
+        try:
+            hashed_password = password_hasher.hash(new_password).decode('utf-8') if new_password else None
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                if hashed_password:
+                    conn.execute(
+                        "UPDATE users SET name = ?, email = ?, password = ? WHERE id = ?",
+                        (name, email, hashed_password, user_id)
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE users SET name = ?, email = ? WHERE id = ?",
+                        (name, email, user_id)
+                    )
+                updated_user = conn.execute(
+                    "SELECT id, email, name, created_at FROM users WHERE id = ?", (user_id,)
+                ).fetchone()
+            
+            self.db.after_commit(lambda: user_cache.invalidate(user_id))
+            return updated_user
+        except Exception as e:
+            logger.error("Error updating user: %s", e)
+            raise
+
+class SQLiteRefreshTokenRepository:
+    """Refresh token storage on SQLite"""
+    
+    def __init__(self):
+        self.db = SQLiteDatabase
+    
+    def create_token(self, user_id, token_hash, family_id, expires_at):
+        """Store a new refresh token (hash only)"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                cursor = conn.execute(
+                    """
+                    INSERT INTO refresh_tokens (user_id, token_hash, family_id, expires_at, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (user_id, token_hash, family_id, expires_at, _now())
+                )
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error("Error creating refresh token: %s", e)
+            raise
+    
+    def find_for_rotation(self, token_hash):
+        """Find a token with its user (inside a write transaction, like FOR UPDATE)"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                return conn.execute(
+                    """
+                    SELECT r.id, r.user_id, r.family_id, r.expires_at, r.revoked_at,
+                           u.email, u.name, u.created_at
+                    FROM refresh_tokens r
+                    JOIN users u ON u.id = r.user_id
+                    WHERE r.token_hash = ?
+                    """,
+                    (token_hash,)
+                ).fetchone()
+        except Exception as e:
+            logger.error("Error finding refresh token: %s", e)
+            raise
+    
+    def revoke_token(self, token_id):
+        """Revoke a single token, returns True if it was still active"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                cursor = conn.execute(
+                    "UPDATE refresh_tokens SET revoked_at = ? WHERE id = ? AND revoked_at IS NULL",
+                    (_now(), token_id)
+                )
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error("Error revoking refresh token: %s", e)
+            raise
+    
+    def revoke_family(self, family_id, commit=False):
+        """Revoke every token descended from the same login (see the MySQL repository for commit)"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                cursor = conn.execute(
+                    "UPDATE refresh_tokens SET revoked_at = ? WHERE family_id = ? AND revoked_at IS NULL",
+                    (_now(), family_id)
+                )
+                if commit:
+                    conn.commit()
+                return cursor.rowcount
+        except Exception as e:
+            logger.error("Error revoking refresh token family: %s", e)
+            raise
+    
+    def revoke_all_for_user(self, user_id):
+        """Revoke every active token of a user (password change)"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                cursor = conn.execute(
+                    "UPDATE refresh_tokens SET revoked_at = ? WHERE user_id = ? AND revoked_at IS NULL",
+                    (_now(), user_id)
+                )
+                return cursor.rowcount
+        except Exception as e:
+            logger.error("Error revoking refresh tokens: %s", e)
+            raise
+    
+    def delete_expired(self):
+        """Delete expired tokens, returns how many were removed"""
+        try:
+            with self.db.connection() as conn:
+                self.db.begin_write(conn)
+                cursor = conn.execute("DELETE FROM refresh_tokens WHERE expires_at < ?", (_now(),))
+                return cursor.rowcount
+        except Exception as e:
+            logger.error("Error deleting expired refresh tokens: %s", e)
+            raise
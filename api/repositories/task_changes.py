@@ -0,0 +1,42 @@
+"""
+Task change feed (GET /api/tasks/changes)
+Every task write bumps the user's task_stats version once and stamps that
+version on the rows it touches (tasks.change_seq); deletes leave a row in
+task_tombstones with the version that removed the task. "What changed
+since version v" is then a range scan on (user_id, change_seq) over both
+tables, whose cost follows the number of changes, not of tasks.
+
+A sync reads the current version first (upper) and pages through
+v < change_seq <= upper in (change_seq, id) order. Rows written again
+meanwhile move above upper and come with the next sync.
+"""
+from api.repositories import TASK_COLUMNS
+
+def build_changes_query(user_id, since, upper, limit, after=None, columns=TASK_COLUMNS, placeholder='%s'):
+    """
+    SQL and parameters of one page of changes (limit + 1 rows)
+    Rows are (change_seq, deleted, *columns), tombstones with NULL for
+    everything but the id. since None is a full sync: every task, no
+    tombstones. after is the (change_seq, id) of the last row sent.
+    """
+    p = placeholder
+    clauses = [f"user_id = {p}", f"change_seq <= {p}"]
+    params = [user_id, upper]
+    if after is not None:
+        clauses.append(f"(change_seq > {p} OR (change_seq = {p} AND {{id}} > {p}))")
+        params.extend((after[0], after[0], after[1]))
+    elif since is not None:
+        clauses.append(f"change_seq > {p}")
+        params.append(since)
+    where = ' AND '.join(clauses)
+    
+    query = f"SELECT change_seq, 0 AS deleted, {', '.join(columns)} FROM tasks WHERE {where.format(id='id')}"
+    if since is not None:
+        values = ', '.join('task_id' if column == 'id' else 'NULL' for column in columns)
+        query += f"""
+            UNION ALL
+            SELECT change_seq, 1, {values} FROM task_tombstones WHERE {where.format(id='task_id')}
+        """
+        params = params * 2
+    query += f" ORDER BY change_seq, id LIMIT {p}"
+    return query, (*params, limit + 1)
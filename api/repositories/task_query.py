@@ -0,0 +1,214 @@
+"""
+Task list query: filters, sort and fields for GET /api/tasks
+TaskQuery is shared by every backend. The SQL backends compile it with
+build_select / build_where / build_order (parameterized, placeholders per
+driver); the memory backend evaluates it with matches / sort_key.
+
+Index support (database.sql, migration 005): each sort has a
+(user_id, ...) composite index that also carries every TASK_COLUMNS
+column, so a page is an ordered range read on one index with no lookup
+of the clustered row:
+- created_at, no status or one status: (user_id[, status], created_at, id)
+- several statuses by created_at: one such range per status, LIMIT'ed,
+  merged by a sort of at most len(statuses) * (limit + 1) rows
+  (build_page). A plain IN over the status index would sort every match.
+- completed_at / title: (user_id, <column>, id); a status or created_at
+  filter is checked on the index entries as the scan goes, so a very
+  selective filter reads further before it fills a page.
+Streams (iter_all_by_user) read everything they match: several statuses
+by created_at are sorted once on the server there.
+"""
+
+import copy
+from operator import itemgetter
+from api.repositories import TASK_COLUMNS
+
+SORT_COLUMNS = ('created_at', 'completed_at', 'title')
+
+def normalize_fields(fields):
+    """
+    Requested fields as a tuple in TASK_COLUMNS order, id always included
+    Raises ValueError for names outside TASK_COLUMNS.
+    """
+    if not fields:
+        return TASK_COLUMNS
+    unknown = [field for field in fields if field not in TASK_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    wanted = set(fields) | {'id'}
+    return tuple(column for column in TASK_COLUMNS if column in wanted)
+
+def row_getter(keys):
+    """Callable returning the tuple of item[key] for keys (itemgetter returns a bare value for one key)"""
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda item: (item[key],)
+    return itemgetter(*keys)
+
+class TaskQuery:
+    """Filters (all optional) and sort of a task list"""
+    
+    def __init__(self, statuses=None, created_after=None, created_before=None,
+                 completed_after=None, completed_before=None, sort='created_at', descending=True,
+                 fields=None):
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort column '{sort}'")
+        # Columns of the returned rows (TASK_COLUMNS order, id first)
+        self.fields = normalize_fields(fields)
+        # Ranges are half-open: *_after is inclusive, *_before exclusive
+        self.statuses = tuple(statuses) if statuses else ()
+        self.created_after = created_after
+        self.created_before = created_before
+        self.completed_after = completed_after
+        self.completed_before = completed_before
+        self.sort = sort
+        self.descending = descending
+    
+    def key(self):
+        """Canonical form of the query (status order ignored), for ETags"""
+        return (
+            tuple(sorted(self.statuses)), self.created_after, self.created_before,
+            self.completed_after, self.completed_before, self.sort, self.descending, self.fields
+        )
+    
+    @property
+    def is_default(self):
+        """No filters, newest first: the plain (user_id, created_at, id) seek"""
+        return self.sort == 'created_at' and self.descending and not self._ranges() and not self.statuses
+    
+    def _ranges(self):
+        """(column, operator, value) for the date bounds that are set"""
+        bounds = (
+            ('created_at', '>=', self.created_after),
+            ('created_at', '<', self.created_before),
+            ('completed_at', '>=', self.completed_after),
+            ('completed_at', '<', self.completed_before),
+        )
+        return [bound for bound in bounds if bound[2] is not None]
+    
+    def select_columns(self, keyset=False):
+        """
+        Columns to fetch: the fields, plus the sort column at the end when
+        the caller needs each row's (sort key, id) for the next cursor.
+        encode_rows ignores such trailing values.
+        """
+        if keyset and self.sort not in self.fields:
+            return self.fields + (self.sort,)
+        return self.fields
+    
+    # SQL backends
+    
+    def build_select(self, keyset=False):
+        """Column list of the SELECT"""
+        return ', '.join(self.select_columns(keyset))
+    
+    def build_where(self, user_id, after=None, placeholder='%s', nocase_title=False):
+        """
+        WHERE clause (without the keyword) and its parameters
+        after is the (sort key, id) of the last row of the previous page.
+        nocase_title compares titles with COLLATE NOCASE (SQLite; MySQL's
+        utf8mb4_unicode_ci is already case-insensitive).
+        """
+        p = placeholder
+        clauses = [f"user_id = {p}"]
+        params = [user_id]
+        
+        if self.statuses:
+            clauses.append(f"status IN ({', '.join([p] * len(self.statuses))})")
+            params.extend(self.statuses)
+        
+        for column, operator, value in self._ranges():
+            clauses.append(f"{column} {operator} {p}")
+            params.append(value)
+        
+        if after is not None:
+            clause, keyset_params = self._keyset(after, p, nocase_title)
+            clauses.append(clause)
+            params.extend(keyset_params)
+        
+        return ' AND '.join(clauses), params
+    
+    def build_page(self, user_id, limit, after=None, placeholder='%s', nocase_title=False):
+        """
+        SELECT of one page (limit + 1 rows, select_columns(keyset=True))
+        and its parameters
+        Several statuses sorted by created_at become a UNION ALL of one
+        per-status seek each, so the final sort only sees a few pages.
+        """
+        p = placeholder
+        columns = self.build_select(keyset=True)
+        order = self.build_order(nocase_title)
+        
+        if len(self.statuses) > 1 and self.sort == 'created_at':
+            branches, params = [], []
+            for i, status in enumerate(self.statuses):
+                single = copy.copy(self)
+                single.statuses = (status,)
+                where, branch_params = single.build_where(user_id, after, p, nocase_title)
+                branches.append(
+                    f"SELECT * FROM (SELECT {columns} FROM tasks WHERE {where} "
+                    f"ORDER BY {order} LIMIT {p}) AS page_{i}"
+                )
+                params.extend(branch_params + [limit + 1])
+            return f"{' UNION ALL '.join(branches)} ORDER BY {order} LIMIT {p}", params + [limit + 1]
+        
+        where, params = self.build_where(user_id, after, p, nocase_title)
+        return f"SELECT {columns} FROM tasks WHERE {where} ORDER BY {order} LIMIT {p}", params + [limit + 1]
+    
+    def build_order(self, nocase_title=False):
+        """ORDER BY clause (without the keyword)"""
+        direction = 'DESC' if self.descending else 'ASC'
+        return f"{self._sort_expression(nocase_title)} {direction}, id {direction}"
+    
+    def _sort_expression(self, nocase_title):
+        if self.sort == 'title' and nocase_title:
+            return 'title COLLATE NOCASE'
+        return self.sort
+    
+    def _keyset(self, after, p, nocase_title):
+        """
+        Rows strictly after (key, id) in sort order
+        completed_at is nullable: both MySQL and SQLite sort NULL first
+        ascending and last descending, and the seek has to follow that.
+        """
+        key, last_id = after
+        column = self._sort_expression(nocase_title)
+        op = '<' if self.descending else '>'
+        
+        if self.sort != 'completed_at':
+            return f"({column} {op} {p} OR ({column} = {p} AND id {op} {p}))", [key, key, last_id]
+        
+        if key is None:
+            if self.descending:
+                # NULLs come last: only the remaining NULL rows are left
+                return f"(completed_at IS NULL AND id < {p})", [last_id]
+            return f"((completed_at IS NULL AND id > {p}) OR completed_at IS NOT NULL)", [last_id]
+        
+        clause = f"(completed_at {op} {p} OR (completed_at = {p} AND id {op} {p})"
+        if self.descending:
+            clause += " OR completed_at IS NULL"
+        return clause + ")", [key, key, last_id]
+    
+    # Memory backend
+    
+    def matches(self, task):
+        """True when a task dict passes every filter"""
+        if self.statuses and task['status'] not in self.statuses:
+            return False
+        for column, operator, value in self._ranges():
+            current = task[column]
+            if current is None:
+                return False
+            if operator == '>=' and current < value:
+                return False
+            if operator == '<' and current >= value:
+                return False
+        return True
+    
+    def sort_key(self, value, task_id):
+        """Ascending sort key for a row's (sort value, id), NULLs first like SQL"""
+        if value is None:
+            return (0, '', task_id)
+        if self.sort == 'title':
+            value = value.casefold()
+        return (1, value, task_id)
@@ -1,9 +1,19 @@
 """
 Task Repository - Database operations for tasks
 """
+import logging
+from api.repositories import TASK_COLUMNS
+from api.repositories.task_changes import build_changes_query
+from api.repositories.task_query import TaskQuery
+from api.repositories.task_search import tokenize
+from api.utils.config import Config
 from api.utils.database import Database
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+STATUSES = ('pending', 'in_progress', 'completed')
+
 class TaskRepository:
     """Handles all database operations related to tasks"""
     
@@ -11,161 +21,600 @@ class TaskRepository:
         self.db = Database()
     
     def create_task(self, user_id, title, status='pending'):
-        """Create a new task"""
+        """
+        Create a new task and return it as stored
+        3 statements: the INSERT, the task_stats bump and the change_seq
+        stamp (the row goes in before task_stats, see _record_change).
+        created_at comes from the app clock (_now), like in create_tasks
+        and for completed_at, so the returned task is built here instead
+        of read back.
+        """
+        created_at = self._now()
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            query = """
-                INSERT INTO tasks (user_id, title, status, created_at)
-                VALUES (%s, %s, %s, NOW())
-            """
-            cursor.execute(query, (user_id, title, status))
-            conn.commit()
-            
-            task_id = cursor.lastrowid
-            cursor.close()
-            conn.close()
-            
-            return task_id
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                query = """
+                    INSERT INTO tasks (user_id, title, status, created_at)
+                    VALUES (%s, %s, %s, %s)
+                """
+                cursor.execute(query, (user_id, title, status, created_at))
+                task_id = cursor.lastrowid
+                
+                version = self._record_change(cursor, user_id, {status: 1})
+                cursor.execute(
+                    "UPDATE tasks SET change_seq = %s WHERE id = %s",
+                    (version, task_id)
+                )
+                return {
+                    "id": task_id,
+                    "title": title,
+                    "status": status,
+                    "created_at": created_at,
+                    "completed_at": None
+                }
         except Exception as e:
-            print(f"Error creating task: {e}")
+            logger.error("Error creating task: %s", e)
             raise
     
     def find_all_by_user(self, user_id):
         """Get all tasks for a user"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """
-                SELECT id, title, status, created_at, completed_at
+            with self.db.connection() as conn, conn.cursor(dictionary=True) as cursor:
+                query = """
+                    SELECT id, title, status, created_at, completed_at
+                    FROM tasks
+                    WHERE user_id = %s
+                    ORDER BY created_at DESC
+                """
+                cursor.execute(query, (user_id,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error("Error fetching tasks: %s", e)
+            raise
+    
+    def create_tasks(self, user_id, tasks):
+        """
+        Create several tasks in a single transaction
+        tasks is a list of (title, status) tuples. The INSERT is sent as one
+        multi-row statement. Its rows are marked with -CONNECTION_ID() (no
+        other open transaction can use it) and restamped by one UPDATE with
+        the new version, which only this batch carries: the created rows
+        are read back by it, in insertion order. Generated ids need not be
+        consecutive (innodb_autoinc_lock_mode=2, auto_increment_increment).
+        created_at comes from the app clock, as in create_task.
+        """
+        created_at = self._now()
+        try:
+            with self.db.connection() as conn, conn.cursor(dictionary=True) as cursor:
+                query = """
+                    INSERT INTO tasks (user_id, title, status, created_at, change_seq)
+                    VALUES (%s, %s, %s, %s, -CONNECTION_ID())
+                """
+                cursor.executemany(query, [(user_id, title, status, created_at) for title, status in tasks])
+                if cursor.rowcount != len(tasks):
+                    raise RuntimeError(f"Batch insert wrote {cursor.rowcount} of {len(tasks)} tasks")
+                
+                delta = {}
+                for _, status in tasks:
+                    delta[status] = delta.get(status, 0) + 1
+                version = self._record_change(cursor, user_id, delta)
+                
+                cursor.execute(
+                    "UPDATE tasks SET change_seq = %s WHERE user_id = %s AND change_seq = -CONNECTION_ID()",
+                    (version, user_id)
+                )
+                
+                query = """
+                    SELECT id, title, status, created_at, completed_at
+                    FROM tasks
+                    WHERE user_id = %s AND change_seq = %s
+                    ORDER BY id ASC
+                """
+                cursor.execute(query, (user_id, version))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error("Error creating tasks: %s", e)
+            raise
+    
+    def iter_all_by_user(self, user_id, batch_size, query=None):
+        """
+        Yield all tasks of a user as row tuples of query.fields (default
+        TASK_COLUMNS), newest first or in query's order, filtered by it
+        Rows come from an unbuffered cursor in fetchmany batches, so memory
+        stays bounded by batch_size. Uses its own pooled connection (an
+        unbuffered result would block the request connection) held until
+        the generator is exhausted or closed.
+        """
+        query = query or TaskQuery()
+        where, params = query.build_where(user_id)
+        
+        conn = self.db.get_connection()
+        cursor = None
+        try:
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(
+                f"""
+                SELECT {query.build_select()}
                 FROM tasks
-                WHERE user_id = %s
-                ORDER BY created_at DESC
-            """
-            cursor.execute(query, (user_id,))
-            tasks = cursor.fetchall()
+                WHERE {where}
+                ORDER BY {query.build_order()}
+                """,
+                params
+            )
             
-            cursor.close()
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        except Exception as e:
+            logger.error("Error streaming tasks: %s", e)
+            raise
+        finally:
+            # Client went away mid-stream: drain the result so the
+            # connection goes back to the pool usable
+            if conn.unread_result:
+                conn.consume_results()
+            if cursor is not None:
+                cursor.close()
             conn.close()
+    
+    def find_page_by_user(self, user_id, limit, after=None, query=None):
+        """
+        Get one page of tasks for a user, newest first by default
+        Uses a (sort key, id) keyset seek instead of OFFSET so every page
+        costs the same; query (TaskQuery) adds filters and picks the sort.
+        after is the (sort key, id) of the previous page's last row.
+        Returns (rows, last_key): rows are tuples of query.select_columns
+        (keyset=True) and last_key is None when there are no more tasks.
+        """
+        query = query or TaskQuery()
+        # One extra row tells us whether another page exists
+        sql, params = query.build_page(user_id, limit, after)
+        
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                tasks = cursor.fetchall()
+            
+            last_key = None
+            if len(tasks) > limit:
+                tasks = tasks[:limit]
+                last = tasks[-1]
+                last_key = (last[query.select_columns(keyset=True).index(query.sort)], last[0])  # (sort key, id)
             
-            return tasks
+            return tasks, last_key
         except Exception as e:
-            print(f"Error fetching tasks: {e}")
+            logger.error("Error fetching tasks page: %s", e)
             raise
     
     def find_by_id(self, task_id, user_id):
         """Get a specific task by ID for a user"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """
-                SELECT id, title, status, created_at, completed_at
-                FROM tasks
-                WHERE id = %s AND user_id = %s
-            """
-            cursor.execute(query, (task_id, user_id))
-            task = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
-            
-            return task
+            with self.db.connection() as conn, conn.cursor(dictionary=True) as cursor:
+                return self._fetch_task(cursor, task_id, user_id)
         except Exception as e:
-            print(f"Error finding task: {e}")
+            logger.error("Error finding task: %s", e)
             raise
     
     def update_task(self, task_id, user_id, title):
-        """Update a task"""
+        """
+        Update a task title
+        Returns the updated task, or None when the task does not exist or
+        belongs to another user. The locking read stays, even though the
+        old title is not needed: it takes the row lock before task_stats
+        (see _record_change), decides existence, and is the task returned.
+        Deciding existence by the UPDATE's rowcount instead would still
+        need a read back and a second UPDATE for change_seq, which only
+        the task_stats bump can supply: 4 statements instead of 3.
+        """
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            query = """
-                UPDATE tasks
-                SET title = %s
-                WHERE id = %s AND user_id = %s
-            """
-            cursor.execute(query, (title, task_id, user_id))
-            conn.commit()
-            
-            rows_affected = cursor.rowcount
-            cursor.close()
-            conn.close()
-            
-            return rows_affected > 0
+            with self.db.connection() as conn, conn.cursor(dictionary=True) as cursor:
+                task = self._fetch_task(cursor, task_id, user_id, for_update=True)
+                if not task:
+                    return None
+                
+                version = self._record_change(cursor, user_id)
+                
+                query = """
+                    UPDATE tasks
+                    SET title = %s, change_seq = %s
+                    WHERE id = %s AND user_id = %s
+                """
+                cursor.execute(query, (title, version, task_id, user_id))
+                
+                task['title'] = title
+                return task
         except Exception as e:
-            print(f"Error updating task: {e}")
+            logger.error("Error updating task: %s", e)
             raise
     
     def update_status(self, task_id, user_id, status):
-        """Update task status"""
+        """
+        Update task status, same return value as update_task
+        The row is locked and read first: its old status feeds task_stats,
+        and the returned task is built from it without a re-read.
+        """
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            completed_at = datetime.now() if status == 'completed' else None
-            
-            query = """
-                UPDATE tasks
-                SET status = %s, completed_at = %s
-                WHERE id = %s AND user_id = %s
-            """
-            cursor.execute(query, (status, completed_at, task_id, user_id))
-            conn.commit()
-            
-            rows_affected = cursor.rowcount
-            cursor.close()
-            conn.close()
-            
-            return rows_affected > 0
+            with self.db.connection() as conn, conn.cursor(dictionary=True) as cursor:
+                task = self._fetch_task(cursor, task_id, user_id, for_update=True)
+                if not task:
+                    return None
+                
+                completed_at = self._completed_at(status)
+                delta = {task['status']: -1, status: 1} if task['status'] != status else None
+                version = self._record_change(cursor, user_id, delta)
+                
+                query = """
+                    UPDATE tasks
+                    SET status = %s, completed_at = %s, change_seq = %s
+                    WHERE id = %s AND user_id = %s
+                """
+                cursor.execute(query, (status, completed_at, version, task_id, user_id))
+                
+                task['status'] = status
+                task['completed_at'] = completed_at
+                return task
+        except Exception as e:
+            logger.error("Error updating task status: %s", e)
+            raise
+    
+    def update_status_many(self, user_id, status, task_ids=None, current_status=None):
+        """
+        Update the status of several tasks with a single UPDATE
+        Scope is either a list of task ids or every task currently in
+        current_status. Returns the ids that were updated when task_ids is
+        given, otherwise the number of updated rows. The rows are locked
+        first, so the UPDATE can carry the version of the write.
+        """
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                completed_at = self._completed_at(status)
+                
+                if task_ids is None:
+                    updated = self._lock_status(cursor, user_id, current_status)
+                    if updated:
+                        delta = {current_status: -updated, status: updated} if current_status != status else None
+                        version = self._record_change(cursor, user_id, delta)
+                        query = """
+                            UPDATE tasks
+                            SET status = %s, completed_at = %s, change_seq = %s
+                            WHERE user_id = %s AND status = %s
+                        """
+                        cursor.execute(query, (status, completed_at, version, user_id, current_status))
+                    return updated
+                
+                found = self._lock_tasks(cursor, user_id, task_ids)
+                found_ids = [task_id for task_id, _ in found]
+                if found_ids:
+                    delta = {status: len(found_ids)}
+                    for _, old_status in found:
+                        delta[old_status] = delta.get(old_status, 0) - 1
+                    version = self._record_change(cursor, user_id, delta)
+                    
+                    placeholders = ', '.join(['%s'] * len(found_ids))
+                    query = f"""
+                        UPDATE tasks
+                        SET status = %s, completed_at = %s, change_seq = %s
+                        WHERE user_id = %s AND id IN ({placeholders})
+                    """
+                    cursor.execute(query, (status, completed_at, version, user_id, *found_ids))
+                return found_ids
         except Exception as e:
-            print(f"Error updating task status: {e}")
+            logger.error("Error updating task statuses: %s", e)
             raise
     
     def delete_task(self, task_id, user_id):
         """Delete a task"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            query = "DELETE FROM tasks WHERE id = %s AND user_id = %s"
-            cursor.execute(query, (task_id, user_id))
-            conn.commit()
-            
-            rows_affected = cursor.rowcount
-            cursor.close()
-            conn.close()
-            
-            return rows_affected > 0
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                found = self._lock_tasks(cursor, user_id, [task_id])
+                if not found:
+                    return False
+                
+                version = self._record_change(cursor, user_id, {found[0][1]: -1})
+                self._add_tombstones(cursor, user_id, version, [task_id])
+                
+                query = "DELETE FROM tasks WHERE id = %s AND user_id = %s"
+                cursor.execute(query, (task_id, user_id))
+                return True
+        except Exception as e:
+            logger.error("Error deleting task: %s", e)
+            raise
+    
+    def delete_many(self, user_id, task_ids=None, current_status=None):
+        """
+        Delete several tasks with a single DELETE
+        Same scoping and return value as update_status_many; every deleted
+        task leaves a tombstone for GET /api/tasks/changes
+        """
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                if task_ids is None:
+                    deleted = self._lock_status(cursor, user_id, current_status)
+                    if deleted:
+                        version = self._record_change(cursor, user_id, {current_status: -deleted})
+                        query = """
+                            INSERT INTO task_tombstones (user_id, change_seq, task_id)
+                            SELECT user_id, %s, id FROM tasks
+                            WHERE user_id = %s AND status = %s
+                        """
+                        cursor.execute(query, (version, user_id, current_status))
+                        
+                        query = "DELETE FROM tasks WHERE user_id = %s AND status = %s"
+                        cursor.execute(query, (user_id, current_status))
+                    return deleted
+                
+                found = self._lock_tasks(cursor, user_id, task_ids)
+                found_ids = [task_id for task_id, _ in found]
+                if found_ids:
+                    delta = {}
+                    for _, old_status in found:
+                        delta[old_status] = delta.get(old_status, 0) - 1
+                    version = self._record_change(cursor, user_id, delta)
+                    self._add_tombstones(cursor, user_id, version, found_ids)
+                    
+                    placeholders = ', '.join(['%s'] * len(found_ids))
+                    query = f"DELETE FROM tasks WHERE user_id = %s AND id IN ({placeholders})"
+                    cursor.execute(query, (user_id, *found_ids))
+                return found_ids
         except Exception as e:
-            print(f"Error deleting task: {e}")
+            logger.error("Error deleting tasks: %s", e)
             raise
     
     def get_statistics(self, user_id):
-        """Get task statistics for a user"""
+        """
+        Get task statistics for a user
+        Primary-key read of the task_stats counters kept up to date by every
+        write in this repository (see rebuild_statistics)
+        """
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            query = """
-                SELECT
-                    COUNT(*) as total,
-                    SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending,
-                    SUM(CASE WHEN status = 'in_progress' THEN 1 ELSE 0 END) as in_progress,
-                    SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed
-                FROM tasks
-                WHERE user_id = %s
-            """
-            cursor.execute(query, (user_id,))
-            stats = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
+            with self.db.connection() as conn, conn.cursor(dictionary=True) as cursor:
+                query = """
+                    SELECT
+                        pending + in_progress + completed as total,
+                        pending, in_progress, completed
+                    FROM task_stats
+                    WHERE user_id = %s
+                """
+                cursor.execute(query, (user_id,))
+                stats = cursor.fetchone()
             
+            if not stats:
+                return {"total": 0, "pending": 0, "in_progress": 0, "completed": 0}
             return stats
         except Exception as e:
-            print(f"Error getting statistics: {e}")
+            logger.error("Error getting statistics: %s", e)
+            raise
+    
+    # None until the first search finds out whether tasks has its FULLTEXT index
+    _fulltext = None
+    
+    def search_by_user(self, user_id, terms, limit, offset=0, columns=TASK_COLUMNS):
+        """
+        One page of a user's tasks whose title matches every term (as a prefix)
+        Ranked with MATCH ... AGAINST in boolean mode on the ft_title FULLTEXT
+        index (migration 006). Without that index, or with a term shorter
+        than the server's innodb_ft_min_token_size (FULLTEXT silently drops
+        those), it falls back to _search_like, newest first. Returns
+        (rows, has_more) with tuples of columns.
+        """
+        short = any(len(term) < Config.SEARCH_FT_MIN_TOKEN_SIZE for term in terms)
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                if TaskRepository._fulltext is not False and not short:
+                    # Terms are plain words (tokenize), no boolean operators to escape
+                    against = ' '.join(f"+{term}*" for term in terms)
+                    try:
+                        cursor.execute(
+                            f"""
+                            SELECT {', '.join(columns)}
+                            FROM tasks
+                            WHERE user_id = %s
+                              AND MATCH (title) AGAINST (%s IN BOOLEAN MODE)
+                            ORDER BY MATCH (title) AGAINST (%s IN BOOLEAN MODE) DESC, id DESC
+                            LIMIT %s OFFSET %s
+                            """,
+                            (user_id, against, against, limit + 1, offset)
+                        )
+                        TaskRepository._fulltext = True
+                        tasks = cursor.fetchall()
+                        return tasks[:limit], len(tasks) > limit
+                    except Exception as e:
+                        if getattr(e, 'errno', None) != 1191:  # ER_FT_MATCHING_KEY_NOT_FOUND
+                            raise
+                        TaskRepository._fulltext = False
+                        logger.warning("tasks has no FULLTEXT index on title (migration 006), search uses LIKE")
+                
+                return self._search_like(cursor, user_id, terms, limit, offset, columns)
+        except Exception as e:
+            logger.error("Error searching tasks: %s", e)
+            raise
+    
+    @staticmethod
+    def _search_like(cursor, user_id, terms, limit, offset, columns):
+        """
+        search_by_user without FULLTEXT: every term must start a word
+        LIKE '%term%' narrows the rows (the collation ignores case and
+        accents, like tokenize), then the titles are checked word by word
+        here, so a term inside a word ("port" in "report") does not match,
+        as with FULLTEXT and TitleIndex.
+        """
+        patterns = ['%' + term.replace('_', '\\_') + '%' for term in terms]
+        cursor.execute(
+            f"""
+            SELECT title, {', '.join(columns)}
+            FROM tasks
+            WHERE user_id = %s AND {' AND '.join(['title LIKE %s'] * len(patterns))}
+            ORDER BY created_at DESC, id DESC
+            """,
+            (user_id, *patterns)
+        )
+        tasks = []
+        for row in cursor.fetchall():
+            words = tokenize(row[0])
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                tasks.append(tuple(row[1:]))
+        page = tasks[offset:offset + limit + 1]
+        return page[:limit], len(page) > limit
+    
+    def find_changes(self, user_id, since, upper, limit, after=None, columns=TASK_COLUMNS):
+        """
+        One page of the user's change feed, see task_changes
+        Returns up to limit + 1 (change_seq, deleted, *columns) tuples.
+        """
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                query, params = build_changes_query(user_id, since, upper, limit, after, columns)
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error("Error fetching task changes: %s", e)
             raise
+    
+    def prune_tombstones(self, days):
+        """Delete tombstones older than days, returns how many were removed"""
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                cursor.execute(
+                    "DELETE FROM task_tombstones WHERE deleted_at < NOW() - INTERVAL %s DAY",
+                    (days,)
+                )
+                return cursor.rowcount
+        except Exception as e:
+            logger.error("Error pruning task tombstones: %s", e)
+            raise
+    
+    def get_version(self, user_id):
+        """
+        Current change version of a user's tasks
+        Increases with every write, so read endpoints can answer
+        If-None-Match without running the task query
+        """
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                cursor.execute("SELECT version FROM task_stats WHERE user_id = %s", (user_id,))
+                row = cursor.fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            logger.error("Error getting task version: %s", e)
+            raise
+    
+    def rebuild_statistics(self, user_id=None):
+        """
+        Recompute task_stats from the tasks table
+        For one user or (user_id=None) for every user. Returns the number
+        of users reconciled.
+        """
+        try:
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                scope = "WHERE u.id = %s" if user_id is not None else ""
+                query = f"""
+                    INSERT INTO task_stats (user_id, pending, in_progress, completed)
+                    SELECT
+                        u.id,
+                        COALESCE(SUM(t.status = 'pending'), 0),
+                        COALESCE(SUM(t.status = 'in_progress'), 0),
+                        COALESCE(SUM(t.status = 'completed'), 0)
+                    FROM users u
+                    LEFT JOIN tasks t ON t.user_id = u.id
+                    {scope}
+                    GROUP BY u.id
+                    ON DUPLICATE KEY UPDATE
+                        pending = VALUES(pending),
+                        in_progress = VALUES(in_progress),
+                        completed = VALUES(completed),
+                        version = version + 1
+                """
+                cursor.execute(query, (user_id,) if user_id is not None else ())
+                
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM users u {scope}",
+                    (user_id,) if user_id is not None else ()
+                )
+                return cursor.fetchone()[0]
+        except Exception as e:
+            logger.error("Error rebuilding statistics: %s", e)
+            raise
+    
+    def _fetch_task(self, cursor, task_id, user_id, for_update=False):
+        """Read a task on the cursor's connection (sees its own writes)"""
+        query = """
+            SELECT id, title, status, created_at, completed_at
+            FROM tasks
+            WHERE id = %s AND user_id = %s
+        """
+        if for_update:
+            query += " FOR UPDATE"
+        cursor.execute(query, (task_id, user_id))
+        return cursor.fetchone()
+    
+    def _lock_tasks(self, cursor, user_id, task_ids):
+        """Lock the subset of task_ids owned by the user, returns (id, status) pairs"""
+        placeholders = ', '.join(['%s'] * len(task_ids))
+        query = f"""
+            SELECT id, status FROM tasks
+            WHERE user_id = %s AND id IN ({placeholders})
+            FOR UPDATE
+        """
+        cursor.execute(query, (user_id, *task_ids))
+        return [tuple(row) for row in cursor.fetchall()]
+    
+    def _lock_status(self, cursor, user_id, status):
+        """Lock every task of the user in status, returns how many there are"""
+        query = """
+            SELECT COUNT(*) FROM tasks
+            WHERE user_id = %s AND status = %s
+            FOR UPDATE
+        """
+        cursor.execute(query, (user_id, status))
+        return cursor.fetchone()[0]
+    
+    def _add_tombstones(self, cursor, user_id, version, task_ids):
+        """Record task_ids as deleted by the write at version"""
+        query = "INSERT INTO task_tombstones (user_id, change_seq, task_id) VALUES (%s, %s, %s)"
+        cursor.executemany(query, [(user_id, version, task_id) for task_id in task_ids])
+    
+    def _record_change(self, cursor, user_id, delta=None):
+        """
+        Record a write to the user's tasks in task_stats
+        Bumps the per-user version (used for ETags) and adjusts the status
+        counters by {status: delta}. Runs on the caller's cursor so it
+        commits or rolls back together with the task write. Returns the new
+        version, which the caller stamps on the rows it writes (change_seq);
+        it comes back through LAST_INSERT_ID(expr), without a SELECT.
+        
+        Callers lock their task rows before calling this, so every write
+        takes the task locks first and the task_stats row second.
+        
+        VALUES(col) rather than the row alias form (VALUES ... AS new),
+        which needs MySQL 8.0.19 and is missing from MariaDB and 5.7.
+        """
+        delta = delta or {}
+        changes = [delta.get(status, 0) for status in STATUSES]
+        
+        query = """
+            INSERT INTO task_stats (user_id, pending, in_progress, completed, version)
+            VALUES (%s, %s, %s, %s, LAST_INSERT_ID(1))
+            ON DUPLICATE KEY UPDATE
+                pending = pending + VALUES(pending),
+                in_progress = in_progress + VALUES(in_progress),
+                completed = completed + VALUES(completed),
+                version = LAST_INSERT_ID(task_stats.version + 1)
+        """
+        cursor.execute(query, (user_id, *changes))
+        return cursor.lastrowid
+    
+    @staticmethod
+    def _now():
+        """
+        App clock, whole seconds as stored
+        Every task timestamp (created_at, completed_at) comes from here, so
+        the (created_at, id) keyset and the date filters compare values
+        from one clock whatever the server's time zone or drift.
+        """
+        return datetime.now().replace(microsecond=0)
+    
+    @classmethod
+    def _completed_at(cls, status):
+        """completed_at value for a task moving to status"""
+        return cls._now() if status == 'completed' else None
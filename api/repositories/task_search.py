@@ -0,0 +1,134 @@
+"""
+Task title search (GET /api/tasks/search)
+MySQL answers with its FULLTEXT index (TaskRepository.search_by_user).
+The SQLite and memory backends use TitleIndex: a per-user inverted index
+built in-process from the user's rows and kept while the user's
+task_stats version is unchanged (every task write bumps it).
+
+Every query term is a prefix (type-ahead), all terms must match and
+results are ranked by relevance, then newest id first.
+"""
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+from heapq import nsmallest
+from api.repositories import TASK_COLUMNS
+from api.repositories.task_query import row_getter
+from api.utils.config import Config
+
+# Query terms beyond this are ignored
+MAX_TERMS = 8
+# A prefix hit counts less than the whole word
+PREFIX_WEIGHT = 0.5
+
+_WORD = re.compile(r'\w+')
+
+def tokenize(text):
+    """Lowercase, accent-free words of a text ("Reunião às 10h" -> reuniao, as, 10h)"""
+    text = text.casefold()
+    if not text.isascii():
+        decomposed = unicodedata.normalize('NFKD', text)
+        text = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _WORD.findall(text)
+
+def parse_terms(query):
+    """Distinct search terms of a query string, in order"""
+    return list(dict.fromkeys(tokenize(query)))[:MAX_TERMS]
+
+class TitleIndex:
+    """Inverted index over the titles of one user's tasks"""
+    
+    def __init__(self, rows):
+        # Position in self.rows is the tie-breaker: newest id first
+        self.rows = sorted(rows, key=lambda row: row[0], reverse=True)
+        postings = {}
+        for position, row in enumerate(self.rows):
+            for token in set(tokenize(row[1])):
+                postings.setdefault(token, []).append(position)
+        self.postings = postings
+        self.tokens = sorted(postings)
+        
+        count = len(self.rows)
+        self.idf = {token: math.log(1 + count / len(docs)) for token, docs in postings.items()}
+    
+    def _term_scores(self, term):
+        """position -> best weight among the words starting with term"""
+        scores = {}
+        tokens = self.tokens
+        index = bisect_left(tokens, term)
+        while index < len(tokens) and tokens[index].startswith(term):
+            token = tokens[index]
+            weight = self.idf[token] * (1.0 if token == term else PREFIX_WEIGHT)
+            for position in self.postings[token]:
+                if scores.get(position, 0.0) < weight:
+                    scores[position] = weight
+            index += 1
+        return scores
+    
+    def search(self, terms, limit, offset=0, columns=TASK_COLUMNS):
+        """
+        (rows, has_more) for the page at offset of the ranked matches
+        Rows are tuples of columns (a subset of TASK_COLUMNS).
+        """
+        if not terms:
+            return [], False
+        
+        per_term = sorted((self._term_scores(term) for term in terms), key=len)
+        totals = per_term[0]
+        for scores in per_term[1:]:
+            totals = {position: total + scores[position]
+                      for position, total in totals.items() if position in scores}
+            if not totals:
+                break
+        
+        wanted = offset + limit + 1
+        ranked = nsmallest(wanted, totals.items(), key=lambda item: (-item[1], item[0]))
+        page = [self.rows[position] for position, _ in ranked[offset:offset + limit]]
+        if columns != TASK_COLUMNS:
+            project = row_getter([TASK_COLUMNS.index(column) for column in columns])
+            page = [project(row) for row in page]
+        return page, len(ranked) > offset + limit
+
+class TitleIndexCache:
+    """LRU of TitleIndex per user, valid for one task_stats version"""
+    
+    def __init__(self, max_users):
+        self.max_users = max_users
+        self.builds = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, user_id, version, load_rows):
+        """Index for the user at version, rebuilt from load_rows() when stale"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+        
+        # Built outside the lock; versions only grow, so an older build never replaces a newer one
+        index = TitleIndex(load_rows())
+        with self._lock:
+            self.builds += 1
+            current = self._entries.get(user_id)
+            if self.max_users > 0 and (current is None or current[0] < version):
+                self._entries[user_id] = (version, index)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_users:
+                    self._entries.popitem(last=False)
+        return index
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """Returns cache counters as dict"""
+        with self._lock:
+            return {"users": len(self._entries), "max_users": self.max_users, "builds": self.builds}
+
+# Shared by the SQLite and memory task repositories
+title_indexes = TitleIndexCache(Config.SEARCH_INDEX_MAX_USERS)
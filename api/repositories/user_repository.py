@@ -1,8 +1,12 @@
 """
 User Repository - Database operations for users
 """
+import logging
 from api.utils.database import Database
-import bcrypt
+from api.utils.cache import user_cache
+from api.utils.passwords import password_hasher, HasherBusyError
+
+logger = logging.getLogger(__name__)
 
 class UserRepository:
     """Handles all database operations related to users"""
@@ -14,74 +18,71 @@ class UserRepository:
         """Create a new user"""
         try:
             # Hash password
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-            
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            query = """
-                INSERT INTO users (email, password, name, created_at)
-                VALUES (%s, %s, %s, NOW())
-            """
-            cursor.execute(query, (email, hashed_password, name))
-            conn.commit()
-            
-            user_id = cursor.lastrowid
-            cursor.close()
-            conn.close()
+            hashed_password = password_hasher.hash(password)
             
-            return user_id
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                query = """
+                    INSERT INTO users (email, password, name, created_at)
+                    VALUES (%s, %s, %s, NOW())
+                """
+                cursor.execute(query, (email, hashed_password, name))
+                return cursor.lastrowid
         except Exception as e:
-            print(f"Error creating user: {e}")
+            logger.error("Error creating user: %s", e)
             raise
     
     def find_by_email(self, email):
         """Find user by email"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            query = "SELECT * FROM users WHERE email = %s"
-            cursor.execute(query, (email,))
-            user = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
-            
-            return user
+            with self.db.connection() as conn, conn.cursor(dictionary=True) as cursor:
+                query = "SELECT * FROM users WHERE email = %s"
+                cursor.execute(query, (email,))
+                return cursor.fetchone()
         except Exception as e:
-            print(f"Error finding user by email: {e}")
+            logger.error("Error finding user by email: %s", e)
             raise
     
     def find_by_id(self, user_id):
         """Find user by ID"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            query = "SELECT id, email, name, created_at FROM users WHERE id = %s"
-            cursor.execute(query, (user_id,))
-            user = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
-            
-            return user
+            with self.db.connection() as conn, conn.cursor(dictionary=True) as cursor:
+                query = "SELECT id, email, name, created_at FROM users WHERE id = %s"
+                cursor.execute(query, (user_id,))
+                return cursor.fetchone()
         except Exception as e:
-            print(f"Error finding user by ID: {e}")
+            logger.error("Error finding user by ID: %s", e)
             raise
     
     def verify_password(self, plain_password, hashed_password):
         """Verify password against hash"""
         try:
-            return bcrypt.checkpw(
-                plain_password.encode('utf-8'),
-                hashed_password if isinstance(hashed_password, bytes) else hashed_password.encode('utf-8')
-            )
+            return password_hasher.verify(plain_password, hashed_password)
+        except HasherBusyError:
+            raise
         except Exception as e:
-            print(f"Error verifying password: {e}")
+            logger.error("Error verifying password: %s", e)
             return False
     
+    def needs_rehash(self, hashed_password):
+        """True when a stored hash was made with a different BCRYPT_ROUNDS"""
+        return password_hasher.needs_rehash(hashed_password)
+    
+    def release_connection(self):
+        """Hand the request's connection back before bcrypt (see Database.release)"""
+        self.db.release()
+    
+    def update_password_hash(self, user_id, plain_password):
+        """Re-hash a password with the current cost and store it"""
+        try:
+            hashed_password = password_hasher.hash(plain_password)
+            
+            with self.db.connection() as conn, conn.cursor() as cursor:
+                query = "UPDATE users SET password = %s WHERE id = %s"
+                cursor.execute(query, (hashed_password, user_id))
+        except Exception as e:
+            logger.error("Error updating password hash: %s", e)
+            raise
+    
     def email_exists(self, email):
         """Check if email already exists"""
         user = self.find_by_email(email)
@@ -90,36 +91,32 @@ class UserRepository:
     def update_user(self, user_id, name, email, new_password=None):
         """Update user information"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            if new_password:
-                # Hash new password
-                hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
-                query = """
-                    UPDATE users 
-                    SET name = %s, email = %s, password = %s
-                    WHERE id = %s
-                """
-                cursor.execute(query, (name, email, hashed_password, user_id))
-            else:
-                query = """
-                    UPDATE users 
-                    SET name = %s, email = %s
-                    WHERE id = %s
-                """
-                cursor.execute(query, (name, email, user_id))
-            
-            conn.commit()
+            # Hashed before the connection is taken, bcrypt needs no database
+            hashed_password = password_hasher.hash(new_password) if new_password else None
             
-            # Get updated user
-            cursor.execute("SELECT id, email, name, created_at FROM users WHERE id = %s", (user_id,))
-            updated_user = cursor.fetchone()
+            with self.db.connection() as conn, conn.cursor(dictionary=True) as cursor:
+                if hashed_password:
+                    query = """
+                        UPDATE users 
+                        SET name = %s, email = %s, password = %s
+                        WHERE id = %s
+                    """
+                    cursor.execute(query, (name, email, hashed_password, user_id))
+                else:
+                    query = """
+                        UPDATE users 
+                        SET name = %s, email = %s
+                        WHERE id = %s
+                    """
+                    cursor.execute(query, (name, email, user_id))
+                
+                # Get updated user
+                cursor.execute("SELECT id, email, name, created_at FROM users WHERE id = %s", (user_id,))
+                updated_user = cursor.fetchone()
             
-            cursor.close()
-            conn.close()
+            self.db.after_commit(lambda: user_cache.invalidate(user_id))
             
             return updated_user
         except Exception as e:
-            print(f"Error updating user: {e}")
+            logger.error("Error updating user: %s", e)
             raise
@@ -4,27 +4,44 @@ Authentication Routes
 from flask import Blueprint
 from api.controllers import auth_controller
 from api.middleware.auth import token_required, get_current_user
+from api.utils.profiler import query_budget
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
 @auth_bp.route('/register', methods=['POST'])
+@query_budget(3)
 def register():
     """Register a new user"""
     return auth_controller.register()
 
 @auth_bp.route('/login', methods=['POST'])
+@query_budget(3)
 def login():
     """Login user"""
     return auth_controller.login()
 
+@auth_bp.route('/refresh', methods=['POST'])
+@query_budget(3)
+def refresh():
+    """Exchange a refresh token for a new token pair"""
+    return auth_controller.refresh()
+
+@auth_bp.route('/logout', methods=['POST'])
+@query_budget(2)
+def logout():
+    """Revoke the session of a refresh token"""
+    return auth_controller.logout()
+
 @auth_bp.route('/me', methods=['GET'])
 @token_required
+@query_budget(0)
 def me():
     """Get current user info"""
     return auth_controller.me(get_current_user())
 
 @auth_bp.route('/profile', methods=['PUT'])
 @token_required
+@query_budget(7)
 def update_profile():
     """Update user profile"""
     return auth_controller.update_profile(get_current_user())
@@ -1,30 +1,34 @@
 """
 Keep Alive Routes - Simple endpoint to prevent database sleep
 """
+import logging
 from flask import Blueprint
-from api.utils.database import Database
+from api.repositories import get_backend, test_storage_connection
+from api.utils.database import Database, without_database
 from api.utils.responses import success_response, server_error_response
 
+logger = logging.getLogger(__name__)
+
 keep_alive_bp = Blueprint('keep_alive', __name__)
 
+# dummy_data is optional: None until the first ping finds out whether it exists
+_dummy_table = None
+
 @keep_alive_bp.route('/ping', methods=['GET'])
 def ping():
     """
     Simple ping endpoint to keep database active
-    No authentication required - designed for cron jobs
+    No authentication required - designed for cron jobs. The pool keeper
+    already pings idle connections in the background; this route is for
+    waking the database (and the serverless instance) from outside.
     """
     try:
-        db = Database()
-        conn = db.get_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Query dummy table to keep database active
-        query = "SELECT * FROM dummy_data LIMIT 1"
-        cursor.execute(query)
-        result = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
+        if get_backend() == 'mysql':
+            result = _touch_database()
+        elif test_storage_connection():
+            result = None
+        else:
+            return server_error_response("Database connection failed")
         
         return success_response({
             "status": "alive",
@@ -32,10 +36,30 @@ def ping():
         }, "Database is active")
         
     except Exception as e:
-        print(f"Keep-alive error: {e}")
+        logger.exception("Keep-alive error: %s", e)
         return server_error_response("Database connection failed")
 
+def _touch_database():
+    """Read the dummy_data row, or run SELECT 1 when the table does not exist"""
+    global _dummy_table
+    with Database.connection() as conn, conn.cursor(dictionary=True) as cursor:
+        if _dummy_table is not False:
+            try:
+                cursor.execute("SELECT * FROM dummy_data LIMIT 1")
+                _dummy_table = True
+                return cursor.fetchone()
+            except Exception as e:
+                if getattr(e, 'errno', None) != 1146:  # ER_NO_SUCH_TABLE
+                    raise
+                _dummy_table = False
+                logger.info("dummy_data table not found, keep-alive uses SELECT 1")
+        
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        return None
+
 @keep_alive_bp.route('/health', methods=['GET'])
+@without_database
 def health():
     """
     Health check endpoint without database query
@@ -0,0 +1,25 @@
+"""
+Metrics Routes - Prometheus scrape endpoint
+"""
+from flask import Blueprint, Response
+from api.utils.database import Database, without_database
+from api.utils.logger import dropped_records
+from api.utils.metrics import metrics
+from api.utils.profiler import profiler
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('', methods=['GET'])
+@without_database
+def prometheus():
+    """
+    Request, DB and pool metrics in Prometheus text format
+    No authentication required - designed for scrapers
+    """
+    counters = (
+        ('sql_slow_queries_total', 'Statements slower than SQL_SLOW_QUERY_MS', profiler.slow_queries),
+        ('sql_budget_violations_total', 'Views that exceeded their query budget', profiler.budget_violations),
+        ('log_records_dropped_total', 'Log records dropped because the queue was full', dropped_records())
+    )
+    body = metrics.render(pool_stats=Database.pool_stats(), counters=counters)
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -4,47 +4,90 @@ Task Routes
 from flask import Blueprint
 from api.controllers import task_controller
 from api.middleware.auth import token_required, get_current_user
+from api.utils.profiler import query_budget
 
 task_bp = Blueprint('tasks', __name__, url_prefix='/tasks')
 
 @task_bp.route('', methods=['GET'])
 @token_required
+@query_budget(2)
 def get_all_tasks():
     """Get all tasks"""
     return task_controller.get_all_tasks(get_current_user())
 
+@task_bp.route('/search', methods=['GET'])
+@token_required
+@query_budget(2)
+def search_tasks():
+    """Search tasks by title"""
+    return task_controller.search_tasks(get_current_user())
+
+@task_bp.route('/changes', methods=['GET'])
+@token_required
+@query_budget(2)
+def get_task_changes():
+    """Get the tasks changed since a sync token"""
+    return task_controller.get_changes(get_current_user())
+
 @task_bp.route('/<int:task_id>', methods=['GET'])
 @token_required
+@query_budget(2)
 def get_task(task_id):
     """Get a specific task"""
     return task_controller.get_task(task_id, get_current_user())
 
 @task_bp.route('', methods=['POST'])
 @token_required
+@query_budget(3)
 def create_task():
     """Create a new task"""
     return task_controller.create_task(get_current_user())
 
+@task_bp.route('/batch', methods=['POST'])
+@token_required
+@query_budget(4)
+def create_tasks():
+    """Create several tasks at once"""
+    return task_controller.create_tasks(get_current_user())
+
 @task_bp.route('/<int:task_id>', methods=['PUT'])
 @token_required
+@query_budget(3)
 def update_task(task_id):
     """Update a task"""
     return task_controller.update_task(task_id, get_current_user())
 
 @task_bp.route('/<int:task_id>/status', methods=['PUT'])
 @token_required
+@query_budget(3)
 def update_task_status(task_id):
     """Update task status"""
     return task_controller.update_task_status(task_id, get_current_user())
 
+@task_bp.route('/status', methods=['PATCH'])
+@token_required
+@query_budget(3)
+def update_status_many():
+    """Update the status of several tasks"""
+    return task_controller.update_status_many(get_current_user())
+
+@task_bp.route('', methods=['DELETE'])
+@token_required
+@query_budget(4)
+def delete_many():
+    """Delete several tasks"""
+    return task_controller.delete_many(get_current_user())
+
 @task_bp.route('/<int:task_id>', methods=['DELETE'])
 @token_required
+@query_budget(4)
 def delete_task(task_id):
     """Delete a task"""
     return task_controller.delete_task(task_id, get_current_user())
 
 @task_bp.route('/statistics', methods=['GET'])
 @token_required
+@query_budget(2)
 def get_statistics():
     """Get task statistics"""
     return task_controller.get_statistics(get_current_user())
@@ -0,0 +1,94 @@
+"""
+In-process caching utilities
+"""
+import threading
+import time
+from collections import OrderedDict
+from api.utils.config import Config
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a fixed TTL"""
+    
+    def __init__(self, max_size, ttl_seconds):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        # Bumped by every invalidation, see set()
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self):
+        """Cache is disabled when size or TTL is zero"""
+        return self.max_size > 0 and self.ttl_seconds > 0
+    
+    def get(self, key):
+        """Return a copy of the cached value or None on miss/expiry"""
+        if not self.enabled:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+        
+        # Callers may mutate the result, never hand out the cached object
+        return dict(value)
+    
+    def set(self, key, value, generation=None):
+        """
+        Store a value, evicting the least recently used entry when full
+        With generation (self.generation read before loading value), the
+        value is dropped if anything was invalidated since: it may have
+        been loaded before the change that triggered the invalidation.
+        """
+        if not self.enabled:
+            return
+        
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (dict(value), time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, key):
+        """Drop a single entry"""
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """Returns cache counters as dict"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+# Authenticated users keyed by user_id (see AuthWorker.get_user_from_token)
+user_cache = TTLCache(Config.USER_CACHE_MAX_SIZE, Config.USER_CACHE_TTL_SECONDS)
@@ -3,10 +3,12 @@ Configuration module for Task Manager API
 Loads environment variables and provides configuration classes
 """
 import os
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Load environment variables from .env (Vercel injects them itself, so
+# cold starts there skip python-dotenv entirely)
+if not os.getenv('VERCEL'):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 class Config:
     """Base configuration"""
@@ -17,21 +19,113 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'root')
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
     
+    # Storage backend: 'mysql', 'sqlite' (single file, WAL) or 'memory'
+    # (nothing persisted, for benchmarks and load tests)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'mysql').lower()
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'task_manager.sqlite3')
+    SQLITE_BUSY_TIMEOUT_SECONDS = float(os.getenv('SQLITE_BUSY_TIMEOUT_SECONDS', 5))
+    
+    # Connection pool: checkout waits up to DB_POOL_TIMEOUT_SECONDS, and up to
+    # DB_POOL_MAX_OVERFLOW extra connections are opened under bursts
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT_SECONDS = float(os.getenv('DB_POOL_TIMEOUT_SECONDS', 5))
+    # Overflow connections stay pooled until unused this long
+    DB_POOL_OVERFLOW_IDLE_SECONDS = float(os.getenv('DB_POOL_OVERFLOW_IDLE_SECONDS', 60))
+    # Idle connections older than this are pinged before being handed out
+    DB_POOL_PING_INTERVAL_SECONDS = float(os.getenv('DB_POOL_PING_INTERVAL_SECONDS', 30))
+    # Connections older than this are replaced (keep it below MySQL's wait_timeout; 0 disables)
+    DB_POOL_MAX_LIFETIME_SECONDS = float(os.getenv('DB_POOL_MAX_LIFETIME_SECONDS', 1800))
+    # Background keeper: runs every DB_KEEPER_INTERVAL_SECONDS (0 disables) and
+    # pings idle connections once the pool has been unused for DB_KEEPER_IDLE_SECONDS
+    DB_KEEPER_INTERVAL_SECONDS = float(os.getenv('DB_KEEPER_INTERVAL_SECONDS', 30))
+    DB_KEEPER_IDLE_SECONDS = float(os.getenv('DB_KEEPER_IDLE_SECONDS', 240))
+    # Create the pool in the background as soon as the first database
+    # route is hit, while that request is still being parsed
+    DB_PREWARM = os.getenv('DB_PREWARM', 'True').lower() == 'true'
+    
+    # SQL profiler: statements slower than this are logged (0 disables)
+    SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', 200))
+    # Raise instead of logging when a view exceeds its query_budget
+    SQL_QUERY_BUDGET_STRICT = os.getenv('SQL_QUERY_BUDGET_STRICT', 'False').lower() == 'true'
+    # Log every statement of every request (development only)
+    SQL_PROFILE_REQUESTS = os.getenv('SQL_PROFILE_REQUESTS', 'False').lower() == 'true'
+    
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'default-secret-key-change-in-production')
     JWT_ALGORITHM = os.getenv('JWT_ALGORITHM', 'HS256')
-    JWT_EXPIRATION_HOURS = int(os.getenv('JWT_EXPIRATION_HOURS', 24))
+    # Access tokens are short lived, clients renew them with the refresh
+    # token (POST /api/auth/refresh) instead of logging in again.
+    # JWT_EXPIRATION_HOURS (the old setting) is still honoured when
+    # JWT_ACCESS_TOKEN_MINUTES is not set, so existing deployments keep
+    # their token lifetime until they move to the new variable.
+    JWT_ACCESS_TOKEN_MINUTES = int(
+        os.getenv('JWT_ACCESS_TOKEN_MINUTES')
+        or int(os.getenv('JWT_EXPIRATION_HOURS', 0)) * 60
+        or 15
+    )
+    REFRESH_TOKEN_DAYS = int(os.getenv('REFRESH_TOKEN_DAYS', 30))
+    # Stateless claims: name/email/created_at travel in the token and
+    # protected routes skip the user lookup entirely. Profile changes only
+    # reach other clients once they pick up a new token.
+    JWT_STATELESS_CLAIMS = os.getenv('JWT_STATELESS_CLAIMS', 'False').lower() == 'true'
+    
+    # User cache (authenticated users, keyed by user_id)
+    USER_CACHE_TTL_SECONDS = int(os.getenv('USER_CACHE_TTL_SECONDS', 60))
+    USER_CACHE_MAX_SIZE = int(os.getenv('USER_CACHE_MAX_SIZE', 1024))
     
     # Flask
     FLASK_ENV = os.getenv('FLASK_ENV', 'production')
     FLASK_DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     PORT = int(os.getenv('PORT', 5000))
     
+    # Logging: JSON lines on stdout, written by a background thread
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    # Per-module overrides, e.g. "api.repositories=DEBUG,werkzeug=WARNING"
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+    # Fraction of DEBUG records kept (1 keeps all)
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0.1))
+    # Records beyond this many pending are dropped instead of blocking
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    
+    # Response compression: gzip, plus br / zstd when Brotli / zstandard are installed
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    # Preference order when the client accepts several equally
+    COMPRESSION_ENCODINGS = [name.strip() for name in os.getenv('COMPRESSION_ENCODINGS', 'br,zstd,gzip').split(',')]
+    # Smaller bodies are sent uncompressed (streamed responses are always compressed)
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_LEVEL = int(os.getenv('COMPRESSION_BROTLI_LEVEL', 5))
+    COMPRESSION_ZSTD_LEVEL = int(os.getenv('COMPRESSION_ZSTD_LEVEL', 3))
+    
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
     
+    # Pagination (GET /api/tasks)
+    TASKS_PAGE_SIZE = int(os.getenv('TASKS_PAGE_SIZE', 100))
+    TASKS_MAX_PAGE_SIZE = int(os.getenv('TASKS_MAX_PAGE_SIZE', 500))
+    # Rows fetched per round trip by GET /api/tasks?stream=1
+    TASKS_STREAM_BATCH_SIZE = int(os.getenv('TASKS_STREAM_BATCH_SIZE', 500))
+    # Maximum tasks accepted by POST /api/tasks/batch
+    TASKS_BATCH_MAX_SIZE = int(os.getenv('TASKS_BATCH_MAX_SIZE', 1000))
+    # Users whose title index is kept in memory (GET /api/tasks/search, SQLite and memory backends)
+    SEARCH_INDEX_MAX_USERS = int(os.getenv('SEARCH_INDEX_MAX_USERS', 64))
+    # The MySQL server's innodb_ft_min_token_size: shorter terms are searched with LIKE
+    SEARCH_FT_MIN_TOKEN_SIZE = int(os.getenv('SEARCH_FT_MIN_TOKEN_SIZE', 3))
+    # Deleted tasks are reported by GET /api/tasks/changes for this long;
+    # older sync tokens get 410 and the client starts over
+    TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', 30))
+    
     # Security
     BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    # bcrypt runs off the request thread: 'process', 'thread' or 'inline'
+    BCRYPT_EXECUTOR = os.getenv('BCRYPT_EXECUTOR', 'process').lower()
+    BCRYPT_MAX_WORKERS = int(os.getenv('BCRYPT_MAX_WORKERS', 2))
+    # Jobs allowed to wait for a worker before requests get 503 (cut so
+    # that workers + queue never exceed DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW)
+    BCRYPT_QUEUE_SIZE = int(os.getenv('BCRYPT_QUEUE_SIZE', 8))
+    BCRYPT_TIMEOUT_SECONDS = float(os.getenv('BCRYPT_TIMEOUT_SECONDS', 10))
+    BCRYPT_RETRY_AFTER_SECONDS = int(os.getenv('BCRYPT_RETRY_AFTER_SECONDS', 1))
     
     @staticmethod
     def get_db_config():
@@ -1,66 +1,302 @@
 """
 Database connection utilities
+mysql.connector (and the pool built on it) is imported when the pool is
+first created, not at import time: cold starts and routes that never
+query MySQL don't pay for it.
 """
-import mysql.connector
-from mysql.connector import pooling
+import logging
+import threading
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, jsonify, request
 from api.utils.config import Config
+from api.utils.metrics import metrics
+from api.utils.profiler import profiler
+
+logger = logging.getLogger(__name__)
+
+def without_database(view):
+    """Mark a view that never queries the database (no pool prewarm for it)"""
+    view.uses_database = False
+    return view
 
 class Database:
     """Database connection manager with connection pooling"""
     
     _pool = None
+    _pool_lock = threading.Lock()
+    _prewarm_thread = None
+    _keeper = None
     
     @classmethod
     def get_pool(cls):
         """Get or create connection pool"""
         if cls._pool is None:
-            try:
-                db_config = Config.get_db_config()
-                
-                # Check if password is the default placeholder
-                if not db_config['password'] or db_config['password'] == 'your_password_here':
-                    raise ValueError(
-                        "⚠️  Database password not configured!\n"
-                        "Please edit the .env file and set DB_PASSWORD with your MySQL password"
-                    )
-                
-                cls._pool = pooling.MySQLConnectionPool(
-                    pool_name="task_manager_pool",
-                    pool_size=5,
+            with cls._pool_lock:
+                if cls._pool is None:
+                    cls._pool = cls._create_pool()
+                    cls._start_keeper(cls._pool)
+        return cls._pool
+    
+    @classmethod
+    def _create_pool(cls):
+        """Build the pool and open its first connection (caller holds _pool_lock)"""
+        import mysql.connector
+        from mysql.connector.constants import ClientFlag
+        from api.utils.pool import ConnectionPool
+        
+        try:
+            db_config = Config.get_db_config()
+            
+            # Check if password is the default placeholder
+            if not db_config['password'] or db_config['password'] == 'your_password_here':
+                raise ValueError(
+                    "⚠️  Database password not configured!\n"
+                    "Please edit the .env file and set DB_PASSWORD with your MySQL password"
+                )
+            
+            # FOUND_ROWS: UPDATE rowcount reports matched rows, so an
+            # update that leaves a row unchanged still counts as found
+            def connect():
+                return mysql.connector.connect(
+                    client_flags=[ClientFlag.FOUND_ROWS],
                     **db_config
                 )
-                print("✅ Database connection pool created successfully")
-            except ValueError as err:
-                print(f"\n{err}\n")
-                raise
-            except mysql.connector.Error as err:
-                if err.errno == 1045:  # Access denied
-                    print(f"\n❌ MySQL Access Denied!")
-                    print(f"   User: {db_config.get('user', 'unknown')}")
-                    print(f"   Host: {db_config.get('host', 'unknown')}")
-                    print(f"   Database: {db_config.get('database', 'unknown')}")
-                    print(f"\n💡 Solutions:")
-                    print(f"   1. Check your MySQL password in the .env file")
-                    print(f"   2. Verify MySQL user exists: mysql -u {db_config.get('user', 'root')} -p")
-                    print(f"   3. Grant permissions: GRANT ALL ON {db_config.get('database', 'task_manager')}.* TO '{db_config.get('user', 'root')}'@'localhost';\n")
-                else:
-                    print(f"❌ Error creating connection pool: {err}")
-                raise
-        return cls._pool
+            
+            pool = ConnectionPool(
+                connect,
+                size=Config.DB_POOL_SIZE,
+                max_overflow=Config.DB_POOL_MAX_OVERFLOW,
+                timeout=Config.DB_POOL_TIMEOUT_SECONDS,
+                ping_interval=Config.DB_POOL_PING_INTERVAL_SECONDS,
+                max_lifetime=Config.DB_POOL_MAX_LIFETIME_SECONDS or None,
+                overflow_idle=Config.DB_POOL_OVERFLOW_IDLE_SECONDS,
+                on_query=cls._on_query
+            )
+            pool.prime()
+            logger.info("Database connection pool created successfully")
+            return pool
+        except ValueError as err:
+            logger.error("%s", err)
+            raise
+        except mysql.connector.Error as err:
+            if err.errno == 1045:  # Access denied
+                user = db_config.get('user', 'root')
+                database = db_config.get('database', 'task_manager')
+                logger.error(
+                    "MySQL Access Denied! Solutions: "
+                    "1. Check your MySQL password in the .env file; "
+                    "2. Verify MySQL user exists: mysql -u %s -p; "
+                    "3. Grant permissions: GRANT ALL ON %s.* TO '%s'@'localhost';",
+                    user, database, user,
+                    extra={"db_user": user, "db_host": db_config.get('host', 'unknown'), "db_name": database}
+                )
+            else:
+                logger.error("Error creating connection pool: %s", err)
+            raise
+    
+    @classmethod
+    def _start_keeper(cls, pool):
+        """Background pings / recycling for the new pool (DB_KEEPER_INTERVAL_SECONDS)"""
+        if Config.DB_KEEPER_INTERVAL_SECONDS <= 0:
+            return
+        from api.utils.pool import PoolKeeper
+        cls._keeper = PoolKeeper(
+            pool,
+            interval=Config.DB_KEEPER_INTERVAL_SECONDS,
+            idle_after=Config.DB_KEEPER_IDLE_SECONDS
+        )
+        cls._keeper.start()
+    
+    @classmethod
+    def keeper_state(cls):
+        """Returns keeper counters, or None when it is not running"""
+        if cls._keeper is None:
+            return None
+        return cls._keeper.state()
+    
+    @staticmethod
+    def _on_query(statement, seconds, rowcount):
+        """Called by the pool after every statement"""
+        metrics.record_query(statement, seconds, rowcount)
+        profiler.record_query(statement, seconds, rowcount)
+    
+    @classmethod
+    def pool_stats(cls):
+        """Returns pool counters, or None before the pool exists"""
+        if cls._pool is None:
+            return None
+        return cls._pool.stats()
     
     @classmethod
     def get_connection(cls):
         """Get a connection from the pool"""
+        # Pool creation errors are logged by _create_pool
+        pool = cls.get_pool()
+        import mysql.connector  # already loaded by the pool
         try:
-            pool = cls.get_pool()
             return pool.get_connection()
-        except ValueError as err:
-            # Password not configured - already printed detailed message
-            raise
         except mysql.connector.Error as err:
-            print(f"❌ Error getting connection: {err}")
+            logger.error("Error getting connection: %s", err)
             raise
     
+    @classmethod
+    @contextmanager
+    def connection(cls):
+        """
+        Connection for one unit of work
+        Inside a Flask request every repository call shares one lazily
+        checked out connection, finished by the request hooks (see
+        init_app). Outside a request (scripts, tests) a pooled connection
+        is checked out, committed or rolled back, and returned right away.
+        """
+        if has_request_context():
+            conn = g.get('_db_connection')
+            if conn is None:
+                conn = cls.get_connection()
+                g._db_connection = conn
+            yield conn
+            return
+        
+        conn = cls.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def after_commit(callback):
+        """
+        Run callback once the current unit of work is committed
+        Inside a request it waits for _finish_request and is dropped if the
+        request rolls back; outside one connection() has already committed,
+        so it runs right away. Used for cache invalidation: dropping an
+        entry before the commit lets a concurrent request cache the old row.
+        """
+        if has_request_context() and g.get('_db_connection') is not None:
+            g.setdefault('_after_commit', []).append(callback)
+        else:
+            callback()
+    
+    @staticmethod
+    def release():
+        """
+        Commit the request's work so far and return its connection early
+        For slow steps that need no database in the middle of a request
+        (bcrypt): holding the connection through them lets a login burst
+        drain the pool. The next connection() checks out a fresh one.
+        Outside a request there is nothing held, so it does nothing.
+        """
+        if not has_request_context():
+            return
+        conn = g.pop('_db_connection', None)
+        callbacks = g.pop('_after_commit', ())
+        if conn is None:
+            return
+        
+        try:
+            conn.commit()
+        finally:
+            conn.close()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as err:
+                logger.error("Error in after-commit callback: %s", err)
+    
+    @classmethod
+    def init_app(cls, app):
+        """
+        Register the request-scoped unit of work on the Flask app
+        The commit happens in after_request so a failed commit still turns
+        into an error response; teardown rolls back whatever is left
+        (unhandled exceptions) and returns the connection to the pool.
+        """
+        if Config.STORAGE_BACKEND == 'mysql' and Config.DB_PREWARM:
+            app.before_request(cls._prewarm_request)
+        app.after_request(cls._finish_request)
+        app.teardown_request(cls._release_request)
+    
+    @classmethod
+    def prewarm(cls):
+        """
+        Start creating the pool on a background thread (once)
+        The MySQL handshake then overlaps with the request's own JSON
+        parsing, validation and JWT checks; get_pool waits for it.
+        """
+        if cls._pool is not None or cls._prewarm_thread is not None:
+            return
+        with cls._pool_lock:
+            if cls._pool is not None or cls._prewarm_thread is not None:
+                return
+            cls._prewarm_thread = threading.Thread(target=cls._prewarm, name='db-prewarm', daemon=True)
+        cls._prewarm_thread.start()
+    
+    @classmethod
+    def _prewarm(cls):
+        try:
+            cls.get_pool()
+        except Exception:
+            # Already logged; the request retries and reports the error
+            pass
+    
+    @classmethod
+    def _prewarm_request(cls):
+        """First request to a database route starts the pool in the background"""
+        if cls._pool is not None or cls._prewarm_thread is not None:
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        if view is not None and getattr(view, 'uses_database', True):
+            cls.prewarm()
+    
+    @staticmethod
+    def _finish_request(response):
+        """Commit on success, roll back on error responses"""
+        conn = g.pop('_db_connection', None)
+        callbacks = g.pop('_after_commit', ())
+        if conn is None:
+            return response
+        
+        try:
+            if response.status_code < 400:
+                conn.commit()
+                for callback in callbacks:
+                    try:
+                        callback()
+                    except Exception as err:
+                        logger.error("Error in after-commit callback: %s", err)
+            else:
+                conn.rollback()
+        except Exception as err:
+            logger.error("Error finishing request transaction: %s", err)
+            response = jsonify({
+                "success": False,
+                "message": "Internal server error"
+            })
+            response.status_code = 500
+        finally:
+            conn.close()
+        
+        return response
+    
+    @staticmethod
+    def _release_request(exc):
+        """Roll back and release a connection the request did not finish"""
+        g.pop('_after_commit', None)
+        conn = g.pop('_db_connection', None)
+        if conn is None:
+            return
+        
+        try:
+            conn.rollback()
+        except Exception as err:
+            logger.error("Error rolling back request transaction: %s", err)
+        finally:
+            conn.close()
+    
     @classmethod
     def test_connection(cls):
         """Test database connection"""
@@ -73,5 +309,5 @@ class Database:
             conn.close()
             return result is not None
         except Exception as e:
-            print(f"❌ Database connection test failed: {e}")
+            logger.error("Database connection test failed: %s", e)
             return False
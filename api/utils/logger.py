@@ -0,0 +1,149 @@
+"""
+Structured logging
+Request threads only put records on a bounded queue (QueueHandler); a
+QueueListener thread formats them as JSON lines and writes to stdout.
+Every record carries the id of the request that emitted it, which is
+also returned to clients in the X-Request-ID header.
+
+Per-module levels come from LOG_LEVELS, e.g.
+    LOG_LEVELS=api.repositories=DEBUG,api.utils.profiler=WARNING
+and only LOG_DEBUG_SAMPLE_RATE of DEBUG records are kept.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from flask import g, has_request_context, request
+from api.utils.config import Config
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# LogRecord attributes that are not user supplied `extra` fields
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'request_id'}
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message, request_id, extras"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if getattr(record, 'request_id', None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request id (runs on the request thread)"""
+
+    def filter(self, record):
+        record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records, everything else passes"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve args and tracebacks here: the listener thread must not
+        # touch objects the request thread keeps mutating
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener = None
+_handler = None
+
+def setup_logging(app=None):
+    """
+    Install the queue pipeline on the root logger (once per process)
+    With an app, also assign request ids and echo them in responses.
+    """
+    global _listener, _handler
+
+    if _listener is None:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JSONFormatter())
+
+        _handler = NonBlockingQueueHandler(queue.Queue(maxsize=Config.LOG_QUEUE_SIZE))
+        _handler.addFilter(RequestContextFilter())
+        _handler.addFilter(DebugSamplingFilter(Config.LOG_DEBUG_SAMPLE_RATE))
+
+        root = logging.getLogger()
+        root.handlers = [_handler]
+        root.setLevel(_parse_level(Config.LOG_LEVEL))
+        for name, level in _parse_module_levels(Config.LOG_LEVELS):
+            logging.getLogger(name).setLevel(level)
+
+        _listener = logging.handlers.QueueListener(_handler.queue, stream_handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+    if app is not None:
+        app.before_request(_assign_request_id)
+        app.after_request(_send_request_id)
+
+def dropped_records():
+    """Records discarded because the log queue was full"""
+    return _handler.dropped if _handler is not None else 0
+
+def _assign_request_id():
+    incoming = request.headers.get(REQUEST_ID_HEADER, '')
+    g.request_id = incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+
+def _send_request_id(response):
+    request_id = g.get('request_id')
+    if request_id:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+def _parse_level(value):
+    level = logging.getLevelName(str(value).strip().upper())
+    return level if isinstance(level, int) else logging.INFO
+
+def _parse_module_levels(value):
+    """'api.repositories=DEBUG,werkzeug=WARNING' -> [(name, level), ...]"""
+    levels = []
+    for item in value.split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels.append((name.strip(), _parse_level(level)))
+    return levels
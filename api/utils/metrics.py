@@ -0,0 +1,271 @@
+"""
+Request metrics
+Per-route request counts, status codes, latency and DB usage (time and
+statement count per request), exposed in Prometheus text format at
+/api/metrics. Every thread records into its own shard, so the request
+path takes no lock; shards are only merged when the endpoint is scraped.
+"""
+import threading
+import time
+from bisect import bisect_left
+from flask import request
+
+# Upper bounds of the latency / DB time histogram buckets
+LATENCY_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the statements-per-request histogram buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+QUANTILES = (0.5, 0.95, 0.99)
+PREFIX = 'task_manager'
+
+class RouteStats:
+    """Counters of one (route, method) pair"""
+    
+    __slots__ = ('statuses', 'latency', 'latency_sum', 'db_time', 'db_time_sum',
+                 'queries', 'queries_sum')
+    
+    def __init__(self):
+        self.statuses = {}
+        self.latency = [0] * (len(LATENCY_BUCKETS_SECONDS) + 1)
+        self.latency_sum = 0.0
+        self.db_time = [0] * (len(LATENCY_BUCKETS_SECONDS) + 1)
+        self.db_time_sum = 0.0
+        self.queries = [0] * (len(QUERY_COUNT_BUCKETS) + 1)
+        self.queries_sum = 0
+    
+    def merge(self, other):
+        """Add another RouteStats into this one"""
+        for status, count in other.statuses.copy().items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        for index, count in enumerate(other.latency):
+            self.latency[index] += count
+        for index, count in enumerate(other.db_time):
+            self.db_time[index] += count
+        for index, count in enumerate(other.queries):
+            self.queries[index] += count
+        self.latency_sum += other.latency_sum
+        self.db_time_sum += other.db_time_sum
+        self.queries_sum += other.queries_sum
+
+class _Shard:
+    """Counters written by a single thread"""
+    
+    __slots__ = ('thread', 'routes', 'started', 'queries', 'db_time')
+    
+    def __init__(self, thread):
+        self.thread = thread
+        self.routes = {}  # route -> method -> RouteStats
+        self.started = None
+        self.queries = 0
+        self.db_time = 0.0
+    
+    def absorb(self, other):
+        """Fold a retired shard's counters into this one"""
+        # copy(): the owning thread may add routes while we read
+        for route, methods in other.routes.copy().items():
+            target = self.routes.setdefault(route, {})
+            for method, stats in methods.copy().items():
+                target.setdefault(method, RouteStats()).merge(stats)
+
+class Metrics:
+    """Per-thread request metrics registry"""
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        # Counters of threads that exited, kept so totals never go down
+        self._retired = _Shard(None)
+    
+    def init_app(self, app):
+        """Register the request hooks on the Flask app"""
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+    
+    def record_query(self, statement, seconds, rowcount):
+        """Pool on_query hook: count a statement against the current request"""
+        shard = self._shard()
+        shard.queries += 1
+        shard.db_time += seconds
+    
+    def snapshot(self):
+        """Returns {route: {method: RouteStats}} merged across threads"""
+        merged = _Shard(None)
+        with self._lock:
+            shards = [self._retired] + self._shards
+            for shard in shards:
+                merged.absorb(shard)
+        return merged.routes
+    
+    def render(self, pool_stats=None, counters=()):
+        """
+        Prometheus text exposition of all metrics
+        counters: extra (name, help, value) process-wide counters
+        """
+        lines = []
+        routes = self.snapshot()
+        
+        lines.append(f"# HELP {PREFIX}_http_requests_total Requests by route, method and status")
+        lines.append(f"# TYPE {PREFIX}_http_requests_total counter")
+        for route, method, stats in _iter_routes(routes):
+            for status, count in sorted(stats.statuses.items()):
+                labels = _labels(route=route, method=method, status=status)
+                lines.append(f"{PREFIX}_http_requests_total{{{labels}}} {count}")
+        
+        _histogram(lines, f"{PREFIX}_http_request_duration_seconds",
+                   "Request latency", routes, 'latency', LATENCY_BUCKETS_SECONDS)
+        
+        lines.append(f"# HELP {PREFIX}_http_request_duration_quantile_seconds "
+                     "Latency quantiles estimated from the histogram")
+        lines.append(f"# TYPE {PREFIX}_http_request_duration_quantile_seconds gauge")
+        for route, method, stats in _iter_routes(routes):
+            for quantile in QUANTILES:
+                value = _estimate_quantile(quantile, stats.latency, LATENCY_BUCKETS_SECONDS)
+                labels = _labels(route=route, method=method, quantile=quantile)
+                lines.append(f"{PREFIX}_http_request_duration_quantile_seconds{{{labels}}} {value:.6f}")
+        
+        _histogram(lines, f"{PREFIX}_db_time_seconds",
+                   "Time spent executing SQL per request", routes, 'db_time', LATENCY_BUCKETS_SECONDS)
+        _histogram(lines, f"{PREFIX}_db_queries",
+                   "SQL statements per request", routes, 'queries', QUERY_COUNT_BUCKETS)
+        
+        for name, help_text, value in counters:
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} counter")
+            lines.append(f"{PREFIX}_{name} {value}")
+        
+        if pool_stats:
+            _pool_lines(lines, pool_stats)
+        
+        return '\n'.join(lines) + '\n'
+    
+    def _shard(self):
+        """This thread's shard, registered on first use"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            return self._register()
+    
+    def _register(self):
+        shard = _Shard(threading.current_thread())
+        with self._lock:
+            # Servers that spawn a thread per request would grow this forever
+            alive = []
+            for other in self._shards:
+                if other.thread.is_alive():
+                    alive.append(other)
+                else:
+                    self._retired.absorb(other)
+            alive.append(shard)
+            self._shards = alive
+        self._local.shard = shard
+        return shard
+    
+    def _start_request(self):
+        shard = self._shard()
+        shard.started = time.perf_counter()
+        shard.queries = 0
+        shard.db_time = 0.0
+    
+    def _finish_request(self, response):
+        shard = self._shard()
+        if shard.started is None:
+            return response
+        elapsed = time.perf_counter() - shard.started
+        shard.started = None
+        
+        rule = request.url_rule
+        route = rule.rule if rule is not None else 'unmatched'
+        methods = shard.routes.get(route)
+        if methods is None:
+            methods = shard.routes[route] = {}
+        stats = methods.get(request.method)
+        if stats is None:
+            stats = methods[request.method] = RouteStats()
+        
+        status = response.status_code
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        stats.latency[bisect_left(LATENCY_BUCKETS_SECONDS, elapsed)] += 1
+        stats.latency_sum += elapsed
+        stats.db_time[bisect_left(LATENCY_BUCKETS_SECONDS, shard.db_time)] += 1
+        stats.db_time_sum += shard.db_time
+        stats.queries[bisect_left(QUERY_COUNT_BUCKETS, shard.queries)] += 1
+        stats.queries_sum += shard.queries
+        return response
+
+def _iter_routes(routes):
+    for route in sorted(routes):
+        for method in sorted(routes[route]):
+            yield route, method, routes[route][method]
+
+def _labels(**labels):
+    """Prometheus label set, values escaped"""
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return ','.join(parts)
+
+def _histogram(lines, name, help_text, routes, field, bounds):
+    """Append a per-route histogram (cumulative buckets, _sum, _count)"""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for route, method, stats in _iter_routes(routes):
+        buckets = getattr(stats, field)
+        cumulative = 0
+        for bound, count in zip(bounds, buckets):
+            cumulative += count
+            labels = _labels(route=route, method=method, le=bound)
+            lines.append(f"{name}_bucket{{{labels}}} {cumulative}")
+        cumulative += buckets[-1]
+        labels = _labels(route=route, method=method)
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {getattr(stats, field + '_sum')}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+def _estimate_quantile(quantile, buckets, bounds):
+    """Linear interpolation inside the bucket holding the quantile"""
+    total = sum(buckets)
+    if total == 0:
+        return 0.0
+    rank = quantile * total
+    cumulative = 0
+    lower = 0.0
+    for bound, count in zip(bounds, buckets):
+        if count and cumulative + count >= rank:
+            return lower + (bound - lower) * (rank - cumulative) / count
+        cumulative += count
+        lower = bound
+    # Quantile falls in the +Inf bucket: the largest finite bound is all we know
+    return bounds[-1]
+
+def _pool_lines(lines, stats):
+    """Connection pool gauges and checkout wait histogram"""
+    gauges = (
+        ('size', 'Configured pool size'),
+        ('opened', 'Connections currently open'),
+        ('in_use', 'Connections checked out'),
+        ('idle', 'Connections idle in the pool'),
+        ('waiting', 'Threads waiting for a connection')
+    )
+    for key, help_text in gauges:
+        lines.append(f"# HELP {PREFIX}_db_pool_{key} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_db_pool_{key} gauge")
+        lines.append(f"{PREFIX}_db_pool_{key} {stats[key]}")
+    
+    lines.append(f"# HELP {PREFIX}_db_pool_timeouts_total Checkouts that gave up waiting")
+    lines.append(f"# TYPE {PREFIX}_db_pool_timeouts_total counter")
+    lines.append(f"{PREFIX}_db_pool_timeouts_total {stats['timeouts']}")
+    
+    name = f"{PREFIX}_db_pool_wait_seconds"
+    lines.append(f"# HELP {name} Time spent waiting for a connection")
+    lines.append(f"# TYPE {name} histogram")
+    cumulative = 0
+    for key, count in stats['wait_ms_histogram'].items():
+        cumulative += count
+        bound = '+Inf' if key == 'le_inf' else str(int(key[3:-2]) / 1000)
+        lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+    lines.append(f"{name}_sum {stats['wait_ms_sum'] / 1000}")
+    lines.append(f"{name}_count {stats['checkouts']}")
+
+# Process-wide registry (hooks registered in index.py)
+metrics = Metrics()
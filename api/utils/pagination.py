@@ -0,0 +1,111 @@
+"""
+Keyset pagination utilities
+Cursors are opaque to clients: base64url encoded JSON with the sort key
+of the last row of the previous page, plus the sort it belongs to
+"""
+import base64
+import json
+from datetime import datetime
+from api.utils.config import Config
+
+CURSOR_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Sort columns whose cursor key is a datetime (title keys are strings)
+_DATETIME_KEYS = ('created_at', 'completed_at')
+
+def encode_cursor(key, task_id, sort='created_at', descending=True):
+    """Build the cursor pointing after the given (sort key, id) of a row"""
+    if isinstance(key, datetime):
+        key = key.strftime(CURSOR_DATETIME_FORMAT)
+    data = {"s": sort, "d": int(descending), "k": key, "i": task_id}
+    raw = json.dumps(data, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Returns (sort, descending, key, id) from a cursor, raises ValueError if
+    malformed. Cursors issued before sorting existed ({"c", "i"}) decode
+    as created_at descending.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if 'c' in data:
+            data = {"s": 'created_at', "d": 1, "k": data['c'], "i": data['i']}
+        
+        sort = data['s']
+        key = data['k']
+        if sort in _DATETIME_KEYS:
+            # completed_at sorts may point after a task that is not completed
+            if key is not None or sort == 'created_at':
+                key = datetime.strptime(key, CURSOR_DATETIME_FORMAT)
+        elif sort != 'title' or not isinstance(key, str):
+            raise ValueError
+        task_id = int(data['i'])
+        descending = bool(data['d'])
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    return sort, descending, key, task_id
+
+def encode_offset_cursor(offset):
+    """Cursor for ranked results (search), where there is no stable sort key to seek on"""
+    raw = json.dumps({"o": offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_offset_cursor(cursor):
+    """Returns the offset from an encode_offset_cursor cursor, raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['o']
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    return offset
+
+def parse_limit(value):
+    """Returns the page size for a raw query value, raises ValueError if invalid"""
+    if value is None or value == '':
+        return Config.TASKS_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("Limit must be an integer")
+    if limit < 1 or limit > Config.TASKS_MAX_PAGE_SIZE:
+        raise ValueError(f"Limit must be between 1 and {Config.TASKS_MAX_PAGE_SIZE}")
+    return limit
+
+def encode_sync_token(since, issued_at, upper=None, after=None):
+    """
+    Token for GET /api/tasks/changes
+    since is the task_stats version the client is up to date with (None:
+    nothing yet). Mid-sync tokens also carry the version the sync stops
+    at (upper) and the (change_seq, id) of the last row sent (after).
+    """
+    data = {"v": since, "t": int(issued_at)}
+    if upper is not None:
+        data["u"] = upper
+        data["k"] = list(after)
+    raw = json.dumps(data, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_sync_token(token):
+    """Returns (since, issued_at, upper, after) from a sync token, raises ValueError if malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        since = data['v']
+        issued_at = int(data['t'])
+        upper = data.get('u')
+        after = None
+        if upper is not None:
+            seq, task_id = data['k']
+            after = (int(seq), int(task_id))
+            upper = int(upper)
+        if since is not None:
+            since = int(since)
+            if since < 0:
+                raise ValueError
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise ValueError("Invalid sync token")
+    return since, issued_at, upper, after
@@ -0,0 +1,167 @@
+"""
+Password hashing
+bcrypt at cost 12 burns ~250ms of CPU per call. Running it inline on the
+request thread lets a login burst starve every other route, so hashing is
+sent to a dedicated executor (a process pool by default, so the work
+escapes the GIL) with a concurrency cap and a bounded queue. When the
+queue is full callers get HasherBusyError and should answer 503.
+
+Callers hand their request's DB connection back before hashing, and the
+jobs admitted at once (max_workers + queue_size) are capped at the MySQL
+pool's capacity: every admitted login or register needs a connection
+once its hash is done, so admitting more would only move the queue to
+the pool, where it ends in PoolTimeoutError (500) instead of a 503.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from api.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+class HasherBusyError(Exception):
+    """Hashing queue is full, the request should be retried later"""
+    
+    def __init__(self, retry_after):
+        super().__init__("Password hashing is busy, try again shortly")
+        self.retry_after = retry_after
+
+def _hash(password, rounds):
+    """Executor job: hash a password (bytes) with the given cost"""
+    import bcrypt  # imported on first use, in whichever process runs the job
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+def _check(password, hashed):
+    """Executor job: check a password (bytes) against a hash (bytes)"""
+    import bcrypt
+    return bcrypt.checkpw(password, hashed)
+
+class PasswordHasher:
+    """bcrypt hashing on a bounded worker pool with admission control"""
+    
+    def __init__(self, executor='process', max_workers=2, queue_size=16,
+                 timeout=10.0, rounds=12, retry_after=1):
+        self.kind = executor
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.rounds = rounds
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+    
+    def hash(self, password):
+        """Hash a password with the configured cost, returns bytes"""
+        return self._run(_hash, password.encode('utf-8'), self.rounds)
+    
+    def verify(self, password, hashed):
+        """Check a password against a stored hash"""
+        if not isinstance(hashed, bytes):
+            hashed = hashed.encode('utf-8')
+        return self._run(_check, password.encode('utf-8'), hashed)
+    
+    def needs_rehash(self, hashed):
+        """True when a stored hash uses a different cost than configured"""
+        if isinstance(hashed, bytes):
+            hashed = hashed.decode('utf-8')
+        try:
+            # Modular crypt format: $2b$12$<salt+hash>
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+    
+    def _run(self, fn, *args):
+        """Run a job on the executor, rejecting it if the queue is full"""
+        if self.kind == 'inline':
+            return fn(*args)
+        
+        try:
+            return self._wait(self._submit(fn, *args))
+        except BrokenProcessPool as e:
+            # Worker processes could not start or died: keep serving on threads
+            self._fall_back_to_threads(e)
+            return self._wait(self._submit(fn, *args))
+    
+    def _submit(self, fn, *args):
+        """
+        Submit a job holding one admission slot until the job is over
+        The slot is released by the future's done callback, not when the
+        caller stops waiting: a timed out job still running on a worker
+        keeps counting against max_workers + queue_size.
+        """
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HasherBusyError(self.retry_after)
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release_slot)
+        return future
+    
+    def _wait(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Still queued: drop it (its slot comes back); running: it keeps the slot
+            future.cancel()
+            raise HasherBusyError(self.retry_after)
+    
+    def _release_slot(self, future):
+        self._slots.release()
+    
+    def _get_executor(self):
+        """Create the executor on first use"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._create_executor()
+        return self._executor
+    
+    def _create_executor(self):
+        """Process pool when possible, threads otherwise (bcrypt releases the GIL)"""
+        if self.kind == 'process':
+            try:
+                # spawn: forking a multi-threaded server process is unsafe
+                return ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            except (OSError, NotImplementedError) as e:
+                # e.g. serverless runtimes without /dev/shm semaphores
+                logger.warning("bcrypt process pool unavailable (%s), using threads", e)
+                self.kind = 'thread'
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bcrypt')
+    
+    def _fall_back_to_threads(self, error):
+        """Replace a broken process pool with a thread pool"""
+        with self._lock:
+            if self.kind != 'process':
+                return
+            logger.warning("bcrypt process pool broken (%s), using threads", error)
+            broken = self._executor
+            self.kind = 'thread'
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bcrypt')
+        broken.shutdown(wait=False)
+
+def admission_queue_size(max_workers, queue_size, pool_capacity):
+    """queue_size cut so that max_workers + queue_size <= pool_capacity"""
+    return max(0, min(queue_size, pool_capacity - max_workers))
+
+password_hasher = PasswordHasher(
+    executor=Config.BCRYPT_EXECUTOR,
+    max_workers=Config.BCRYPT_MAX_WORKERS,
+    queue_size=admission_queue_size(
+        Config.BCRYPT_MAX_WORKERS,
+        Config.BCRYPT_QUEUE_SIZE,
+        Config.DB_POOL_SIZE + Config.DB_POOL_MAX_OVERFLOW
+    ),
+    timeout=Config.BCRYPT_TIMEOUT_SECONDS,
+    rounds=Config.BCRYPT_ROUNDS,
+    retry_after=Config.BCRYPT_RETRY_AFTER_SECONDS
+)
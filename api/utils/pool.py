@@ -0,0 +1,458 @@
+"""
+Blocking connection pool
+Replaces mysql-connector's MySQLConnectionPool, which raises PoolError as
+soon as every connection is checked out. Here checkout waits (up to a
+timeout) for a connection to come back, may open a few overflow
+connections under bursts, validates connections that sat idle, replaces
+connections older than max_lifetime, and keeps counters for the health
+endpoint. An optional on_query(statement, seconds, rowcount) hook is
+called after every statement.
+
+Returned connections always go back to the idle list, overflow ones
+included, so under load they are handed to the next waiter instead of
+being closed and dialled again. Overflow connections are closed once
+they have sat idle for overflow_idle seconds (trim_overflow).
+
+PoolKeeper is the background side: while the pool sits idle it pings
+idle connections (keeping them, and the database, awake), recycles
+the ones past max_lifetime and trims idle overflow, so requests after a
+quiet period don't pay for reconnects.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from mysql.connector.errors import PoolError
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the checkout wait-time histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+class PoolTimeoutError(PoolError):
+    """No connection became available within the checkout timeout"""
+
+class InstrumentedCursor:
+    """Cursor proxy reporting each statement to the pool's on_query hook"""
+    
+    def __init__(self, cursor, on_query):
+        self._cursor = cursor
+        self._on_query = on_query
+    
+    def execute(self, operation, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, *args, **kwargs)
+        finally:
+            self._on_query(operation, time.perf_counter() - started, self._cursor.rowcount)
+    
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._on_query(operation, time.perf_counter() - started, self._cursor.rowcount)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._cursor.close()
+    
+    def __iter__(self):
+        return iter(self._cursor)
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class PooledConnection:
+    """Proxy handed out by the pool, close() returns the connection"""
+    
+    def __init__(self, pool, cnx):
+        self._pool = pool
+        self._cnx = cnx
+    
+    def cursor(self, *args, **kwargs):
+        """Driver cursor, instrumented when the pool has an on_query hook"""
+        if self._cnx is None:
+            raise PoolError("Connection already returned to the pool")
+        cursor = self._cnx.cursor(*args, **kwargs)
+        if self._pool.on_query is None:
+            return cursor
+        return InstrumentedCursor(cursor, self._pool.on_query)
+    
+    def close(self):
+        """Return the connection to the pool instead of closing it"""
+        if self._cnx is not None:
+            self._pool._release(self._cnx)
+            self._cnx = None
+    
+    def __getattr__(self, name):
+        if self._cnx is None:
+            raise PoolError("Connection already returned to the pool")
+        return getattr(self._cnx, name)
+
+class ConnectionPool:
+    """Thread-safe pool with blocking checkout and usage statistics"""
+    
+    def __init__(self, connect, size=5, max_overflow=0, timeout=5.0, ping_interval=30.0,
+                 max_lifetime=None, overflow_idle=60.0, on_query=None):
+        self._connect = connect
+        self.on_query = on_query
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self.max_lifetime = max_lifetime
+        # Connections beyond size are closed after this long unused
+        self.overflow_idle = overflow_idle
+        
+        # Idle entries are (cnx, created, last_used), monotonic seconds
+        self._idle = deque()
+        self._created = {}  # id(cnx) -> created, for checked out connections too
+        self._cond = threading.Condition()
+        self._opened = 0
+        self._in_use = 0
+        self.last_activity = time.monotonic()
+        
+        self._checkouts = 0
+        self._recycled = 0
+        self._trimmed = 0
+        self._timeouts = 0
+        self._waiting = 0
+        self._wait_sum = 0.0
+        self._wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+    
+    def prime(self):
+        """Open one connection up front so bad credentials fail fast"""
+        self.get_connection().close()
+    
+    def get_connection(self):
+        """Check out a connection, waiting up to timeout seconds for one"""
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        cnx = None
+        created = last_used = None
+        
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._idle:
+                        # LIFO: reuse the most recently returned connection
+                        cnx, created, last_used = self._idle.pop()
+                        break
+                    if self._opened < self.size + self.max_overflow:
+                        self._opened += 1
+                        break
+                    
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"No connection available within {self.timeout}s "
+                            f"({self._in_use} in use)"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            
+            self._in_use += 1
+            self._checkouts += 1
+            self.last_activity = time.monotonic()
+            self._record_wait(time.perf_counter() - started)
+        
+        try:
+            now = time.monotonic()
+            if cnx is None:
+                cnx = self._open()
+            elif self._expired(created, now):
+                # Past max_lifetime: reconnect now rather than risk a server-side timeout
+                self._discard(cnx)
+                cnx = self._open()
+                with self._cond:
+                    self._recycled += 1
+            elif now - last_used > self.ping_interval:
+                cnx = self._validate(cnx)
+        except Exception:
+            with self._cond:
+                self._opened -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        
+        return PooledConnection(self, cnx)
+    
+    def stats(self):
+        """Returns pool counters as dict"""
+        with self._cond:
+            histogram = {}
+            for bound, count in zip(WAIT_BUCKETS_MS, self._wait_buckets):
+                histogram[f"le_{bound}ms"] = count
+            histogram["le_inf"] = self._wait_buckets[-1]
+            
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "timeout_seconds": self.timeout,
+                "opened": self._opened,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "trimmed": self._trimmed,
+                "overflow_idle_seconds": self.overflow_idle,
+                "max_lifetime_seconds": self.max_lifetime,
+                "wait_ms_sum": round(self._wait_sum * 1000, 3),
+                "wait_ms_histogram": histogram
+            }
+    
+    def _validate(self, cnx):
+        """Ping a connection that sat idle, replacing it if it died"""
+        try:
+            cnx.ping(reconnect=False)
+            return cnx
+        except Exception:
+            self._discard(cnx)
+            return self._open()
+    
+    def ping_idle(self, idle_for):
+        """
+        Ping idle connections unused for idle_for seconds (keeper job)
+        Borrows them one at a time from the cold end of the idle deque, so
+        checkouts (LIFO, hot end) are never blocked for long. Dead
+        connections are replaced. Returns (pinged, replaced).
+        """
+        pinged = replaced = 0
+        for _ in range(len(self._idle)):
+            with self._cond:
+                if not self._idle or time.monotonic() - self._idle[0][2] < idle_for:
+                    break
+                cnx, created, _ = self._idle.popleft()
+                self._in_use += 1
+            
+            try:
+                cnx.ping(reconnect=False)
+            except Exception:
+                self._discard(cnx)
+                try:
+                    cnx = self._open()
+                    created = self._created[id(cnx)]
+                    replaced += 1
+                except Exception:
+                    with self._cond:
+                        self._opened -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+            pinged += 1
+            self._put_back(cnx, created)
+        return pinged, replaced
+    
+    def recycle_expired(self):
+        """Replace idle connections past max_lifetime (keeper job), returns the count"""
+        if not self.max_lifetime:
+            return 0
+        recycled = 0
+        for _ in range(len(self._idle)):
+            with self._cond:
+                expired = [entry for entry in self._idle if self._expired(entry[1], time.monotonic())]
+                if not expired:
+                    break
+                entry = expired[0]
+                self._idle.remove(entry)
+                self._in_use += 1
+            
+            self._discard(entry[0])
+            try:
+                cnx = self._open()
+            except Exception:
+                with self._cond:
+                    self._opened -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+            self._put_back(cnx, self._created[id(cnx)])
+            recycled += 1
+        with self._cond:
+            self._recycled += recycled
+        return recycled
+    
+    def trim_overflow(self):
+        """
+        Close idle connections beyond size unused for overflow_idle seconds
+        (keeper job, also checked on release), returns how many
+        Taken from the cold end of the idle deque, the least recently used.
+        """
+        with self._cond:
+            stale = self._take_stale_overflow(time.monotonic())
+        for cnx in stale:
+            self._discard(cnx)
+        return len(stale)
+    
+    def _take_stale_overflow(self, now):
+        """Pop idle overflow past overflow_idle (caller holds the lock and discards them)"""
+        stale = []
+        while (self._opened > self.size and self._idle
+               and now - self._idle[0][2] >= self.overflow_idle):
+            stale.append(self._idle.popleft()[0])
+            self._opened -= 1
+        self._trimmed += len(stale)
+        return stale
+    
+    def _put_back(self, cnx, created):
+        """Return a connection the keeper borrowed (just verified, so at the hot end)"""
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append((cnx, created, time.monotonic()))
+            self._cond.notify()
+    
+    def _open(self):
+        """New driver connection, remembering when it was made"""
+        cnx = self._connect()
+        self._created[id(cnx)] = time.monotonic()
+        return cnx
+    
+    def _expired(self, created, now):
+        return bool(self.max_lifetime) and now - created > self.max_lifetime
+    
+    def _release(self, cnx):
+        """
+        Take a connection back, dropping it only if broken or expired
+        Healthy overflow connections are kept too: a waiter (woken here)
+        takes it over instead of opening a new one. They are closed by
+        trim_overflow once unused for overflow_idle.
+        """
+        healthy = True
+        try:
+            # Never hand a half-finished transaction to the next caller
+            if cnx.in_transaction:
+                cnx.rollback()
+        except Exception:
+            healthy = False
+        
+        now = time.monotonic()
+        created = self._created.get(id(cnx), now)
+        if self._expired(created, now):
+            healthy = False
+        
+        with self._cond:
+            self._in_use -= 1
+            self.last_activity = now
+            if healthy:
+                self._idle.append((cnx, created, now))
+                cnx = None
+            else:
+                self._opened -= 1
+            self._cond.notify()
+            stale = [] if self._waiting else self._take_stale_overflow(now)
+        
+        if cnx is not None:
+            self._discard(cnx)
+        for old in stale:
+            self._discard(old)
+    
+    def _record_wait(self, seconds):
+        """Add a checkout wait to the histogram (caller holds the lock)"""
+        self._wait_sum += seconds
+        millis = seconds * 1000
+        for index, bound in enumerate(WAIT_BUCKETS_MS):
+            if millis <= bound:
+                self._wait_buckets[index] += 1
+                return
+        self._wait_buckets[-1] += 1
+    
+    def _discard(self, cnx):
+        """Close a connection for good, ignoring errors"""
+        self._created.pop(id(cnx), None)
+        try:
+            cnx.close()
+        except Exception:
+            pass
+
+class PoolKeeper:
+    """
+    Background thread maintaining a ConnectionPool
+    Every interval seconds it recycles idle connections past the pool's
+    max_lifetime, closes overflow connections idle for the pool's
+    overflow_idle and, once the pool has seen no checkout for idle_after
+    seconds, pings the idle connections. Busy pools are left alone: their
+    connections are validated by use.
+    """
+    
+    def __init__(self, pool, interval=30.0, idle_after=240.0):
+        self.pool = pool
+        self.interval = interval
+        self.idle_after = idle_after
+        self._stop = threading.Event()
+        self._thread = None
+        
+        self.runs = 0
+        self.pings = 0
+        self.reconnects = 0
+        self.recycled = 0
+        self.trimmed = 0
+        self.failures = 0
+        self.last_run = None
+        self.last_ping = None
+        self.last_error = None
+    
+    def start(self):
+        """Start the daemon thread (once)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='db-keeper', daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def run_once(self):
+        """One maintenance pass"""
+        self.runs += 1
+        self.last_run = time.time()
+        try:
+            self.recycled += self.pool.recycle_expired()
+            self.trimmed += self.pool.trim_overflow()
+            if time.monotonic() - self.pool.last_activity >= self.idle_after:
+                pinged, replaced = self.pool.ping_idle(self.idle_after)
+                if pinged:
+                    self.pings += pinged
+                    self.reconnects += replaced
+                    self.last_ping = time.time()
+        except Exception as e:
+            # Database down: keep trying on the next pass
+            self.failures += 1
+            self.last_error = str(e)
+            logger.warning("Pool keeper pass failed: %s", e)
+    
+    def state(self):
+        """Keeper counters for the health endpoint"""
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "interval_seconds": self.interval,
+            "idle_after_seconds": self.idle_after,
+            "pool_idle_seconds": round(time.monotonic() - self.pool.last_activity, 1),
+            "runs": self.runs,
+            "pings": self.pings,
+            "reconnects": self.reconnects,
+            "recycled": self.recycled,
+            "trimmed": self.trimmed,
+            "failures": self.failures,
+            "last_run": _timestamp(self.last_run),
+            "last_ping": _timestamp(self.last_ping),
+            "last_error": self.last_error
+        }
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+def _timestamp(value):
+    """Epoch seconds -> ISO 8601 UTC (None stays None)"""
+    if value is None:
+        return None
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(value))
@@ -0,0 +1,176 @@
+"""
+SQL query profiler
+Sees every statement through the pool's on_query hook (see Database). It
+logs statements slower than SQL_SLOW_QUERY_MS, flags views that run more
+statements than their query_budget, and lets tests count round trips:
+    
+    with QueryProfile() as profile:
+        repo.update_status(task_id, user_id, 'completed')
+    profile.assert_max(3)
+"""
+import logging
+import re
+import threading
+from collections import namedtuple
+from functools import lru_cache, wraps
+from flask import g, has_request_context, request
+from api.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+QueryRecord = namedtuple('QueryRecord', ['statement', 'seconds', 'rowcount'])
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|%\(\w+\)s')
+_VALUE_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_VALUE_ROWS = re.compile(r'\(\?\)(?:\s*,\s*\(\?\))+')
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more statements than its query_budget allows"""
+
+@lru_cache(maxsize=1024)
+def normalize_sql(statement):
+    """
+    Statement shape without values, so calls can be grouped:
+    placeholders and literals become ?, IN lists and VALUES rows collapse
+    """
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode('utf-8', 'replace')
+    text = _WHITESPACE.sub(' ', statement).strip()
+    text = _STRING.sub('?', text)
+    text = _PLACEHOLDER.sub('?', text)
+    text = _NUMBER.sub('?', text)
+    text = _VALUE_LIST.sub('(?)', text)
+    return _VALUE_ROWS.sub('(?), ...', text)
+
+class QueryProfile:
+    """Records the statements run by this thread while active (nestable)"""
+    
+    def __init__(self, label=None):
+        self.label = label
+        self.queries = []
+    
+    def __enter__(self):
+        profiler.push(self)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        profiler.pop(self)
+    
+    @property
+    def count(self):
+        return len(self.queries)
+    
+    @property
+    def total_seconds(self):
+        return sum(query.seconds for query in self.queries)
+    
+    @property
+    def statements(self):
+        """Normalized text of each statement, in order"""
+        return [normalize_sql(query.statement) for query in self.queries]
+    
+    def summary(self):
+        """Human readable listing, one statement per line"""
+        lines = [f"{self.count} statement(s), {self.total_seconds * 1000:.1f} ms"]
+        for query in self.queries:
+            lines.append(
+                f"  {query.seconds * 1000:8.1f} ms  {query.rowcount:>6} rows  "
+                f"{normalize_sql(query.statement)}"
+            )
+        return '\n'.join(lines)
+    
+    def assert_max(self, limit):
+        """Raise AssertionError if more than limit statements ran"""
+        if self.count > limit:
+            raise AssertionError(f"Expected at most {limit} statement(s), got {self.summary()}")
+
+class QueryProfiler:
+    """Slow-query log and per-thread statement capture"""
+    
+    def __init__(self, slow_query_ms=200, strict_budgets=False):
+        self.slow_query_ms = slow_query_ms
+        self.strict_budgets = strict_budgets
+        self._local = threading.local()
+        self.slow_queries = 0
+        self.budget_violations = 0
+    
+    def init_app(self, app):
+        """Log the statements of every request (SQL_PROFILE_REQUESTS, a development aid)"""
+        if not Config.SQL_PROFILE_REQUESTS:
+            return
+        app.before_request(self._start_request)
+        app.teardown_request(self._finish_request)
+    
+    def push(self, profile):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(profile)
+    
+    def pop(self, profile):
+        self._local.stack.remove(profile)
+    
+    def record_query(self, statement, seconds, rowcount):
+        """Pool on_query hook"""
+        stack = getattr(self._local, 'stack', None)
+        if stack:
+            record = QueryRecord(statement, seconds, rowcount)
+            for profile in stack:
+                profile.queries.append(record)
+        
+        if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+            self.slow_queries += 1
+            logger.warning("Slow query", extra={
+                "duration_ms": round(seconds * 1000, 1),
+                "rows": rowcount,
+                "path": request.path if has_request_context() else None,
+                "statement": normalize_sql(statement)
+            })
+    
+    def _start_request(self):
+        profile = QueryProfile(request.endpoint)
+        g._query_profile = profile
+        self.push(profile)
+    
+    def _finish_request(self, error=None):
+        # teardown: runs after streamed responses finish too
+        profile = g.pop('_query_profile', None)
+        if profile is None:
+            return
+        self.pop(profile)
+        logger.info("%s %s %s", request.method, request.path, profile.summary())
+    
+    def budget_exceeded(self, name, limit, profile):
+        """Report a view that ran more statements than its budget"""
+        self.budget_violations += 1
+        message = f"Query budget exceeded in {name} (limit {limit}): {profile.summary()}"
+        if self.strict_budgets:
+            raise QueryBudgetExceeded(message)
+        logger.warning("%s", message)
+
+def query_budget(limit):
+    """
+    Flag a view that runs more than limit statements
+    Put it below token_required so authentication lookups are not counted.
+    The limit stays readable as view.query_budget (wraps carries it up
+    through the outer decorators), tests use it to find budgeted routes.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            with QueryProfile(f.__name__) as profile:
+                result = f(*args, **kwargs)
+            if profile.count > limit:
+                profiler.budget_exceeded(f.__name__, limit, profile)
+            return result
+        decorated.query_budget = limit
+        return decorated
+    return decorator
+
+profiler = QueryProfiler(
+    slow_query_ms=Config.SQL_SLOW_QUERY_MS,
+    strict_budgets=Config.SQL_QUERY_BUDGET_STRICT
+)
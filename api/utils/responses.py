@@ -1,19 +1,23 @@
 """
 HTTP status codes and response utilities
 """
-from flask import jsonify
+from flask import Response, current_app, jsonify, stream_with_context
+from api.utils.serialization import encode_rows
 
 # HTTP Status Codes
 HTTP_200_OK = 200
 HTTP_201_CREATED = 201
 HTTP_204_NO_CONTENT = 204
+HTTP_304_NOT_MODIFIED = 304
 HTTP_400_BAD_REQUEST = 400
 HTTP_401_UNAUTHORIZED = 401
 HTTP_403_FORBIDDEN = 403
 HTTP_404_NOT_FOUND = 404
 HTTP_409_CONFLICT = 409
+HTTP_410_GONE = 410
 HTTP_422_UNPROCESSABLE_ENTITY = 422
 HTTP_500_INTERNAL_SERVER_ERROR = 500
+HTTP_503_SERVICE_UNAVAILABLE = 503
 
 def success_response(data=None, message="Success", status_code=HTTP_200_OK):
     """Standard success response"""
@@ -25,6 +29,78 @@ def success_response(data=None, message="Success", status_code=HTTP_200_OK):
         response["data"] = data
     return jsonify(response), status_code
 
+def rows_response(key, columns, rows, extra=None, message="Success", status_code=HTTP_200_OK):
+    """
+    Success response for a list of row tuples
+    Same envelope as success_response({key: [...], **extra}), with the
+    rows written by encode_rows instead of going through dicts
+    """
+    provider = current_app.json
+    
+    def dumps(obj):
+        return provider.dumps(obj, separators=(',', ':'))
+    
+    members = {key: '[' + encode_rows(columns, rows) + ']'}
+    for name, value in (extra or {}).items():
+        members[name] = dumps(value)
+    data = ','.join(f"{dumps(name)}:{members[name]}" for name in sorted(members))
+    body = '{"data":{%s},"message":%s,"success":true}\n' % (data, dumps(message))
+    
+    return Response(body, status=status_code, mimetype=provider.mimetype)
+
+def stream_response(key, items, message="Success", chunk_size=500, status_code=HTTP_200_OK, columns=None):
+    """
+    Streamed success response for large lists
+    Same envelope as success_response, with data[key] written as a JSON
+    array chunk by chunk instead of being built in memory. With columns,
+    items are row tuples encoded by encode_rows.
+    """
+    provider = current_app.json
+    
+    def dumps(obj):
+        return provider.dumps(obj, separators=(',', ':'))
+    
+    def encode(chunk):
+        if columns is not None:
+            return encode_rows(columns, chunk)
+        return ','.join(dumps(item) for item in chunk)
+    
+    def generate():
+        yield '{"data":{%s:[' % dumps(key)
+        chunk = []
+        separator = ''
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield separator + encode(chunk)
+                separator = ','
+                chunk = []
+        if chunk:
+            yield separator + encode(chunk)
+        yield ']},"message":%s,"success":true}\n' % dumps(message)
+    
+    return Response(
+        stream_with_context(generate()),
+        status=status_code,
+        mimetype=current_app.json.mimetype
+    )
+
+def with_etag(result, etag):
+    """
+    Attach a weak ETag to a response (or a (response, status) tuple)
+    no-cache makes clients revalidate every time, private keeps shared
+    caches out of per-user data
+    """
+    response = result[0] if isinstance(result, tuple) else result
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return result
+
+def not_modified_response(etag):
+    """Empty 304 response for a matching If-None-Match"""
+    response = Response(status=HTTP_304_NOT_MODIFIED)
+    return with_etag(response, etag)
+
 def error_response(message="Error", errors=None, status_code=HTTP_400_BAD_REQUEST):
     """Standard error response"""
     response = {
@@ -47,6 +123,10 @@ def not_found_response(message="Resource not found"):
     """Response for not found resources"""
     return error_response(message, status_code=HTTP_404_NOT_FOUND)
 
+def gone_response(message="Resource no longer available"):
+    """Response for resources that expired"""
+    return error_response(message, status_code=HTTP_410_GONE)
+
 def validation_error_response(errors, message="Validation failed"):
     """Response for validation errors"""
     return error_response(message, errors, HTTP_422_UNPROCESSABLE_ENTITY)
@@ -54,3 +134,10 @@ def validation_error_response(errors, message="Validation failed"):
 def server_error_response(message="Internal server error"):
     """Response for server errors"""
     return error_response(message, status_code=HTTP_500_INTERNAL_SERVER_ERROR)
+
+def service_unavailable_response(message="Service temporarily unavailable", retry_after=None):
+    """Response for temporary overload, with an optional Retry-After"""
+    response, status_code = error_response(message, status_code=HTTP_503_SERVICE_UNAVAILABLE)
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(retry_after)
+    return response, status_code
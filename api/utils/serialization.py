@@ -0,0 +1,101 @@
+"""
+JSON serialization
+The app's JSON provider uses orjson when it is installed and falls back
+to the stdlib encoder otherwise. Datetimes keep the MySQL wire format
+"YYYY-MM-DD HH:MM:SS" on both paths.
+
+Large task lists skip dicts altogether: repositories return plain row
+tuples and encode_rows() writes each one straight into a JSON object
+using the column names.
+"""
+import json
+from datetime import datetime
+from json.encoder import encode_basestring_ascii
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+def format_datetime(value):
+    """datetime -> 'YYYY-MM-DD HH:MM:SS' (isoformat is C code, strftime is not)"""
+    return value.isoformat(' ')[:19]
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider: orjson when available, stdlib json otherwise"""
+    
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None
+    
+    @staticmethod
+    def default(obj):
+        if isinstance(obj, datetime):
+            return format_datetime(obj)
+        return DefaultJSONProvider.default(obj)
+    
+    def dumps(self, obj, **kwargs):
+        # orjson has no indent/cls/... options: those calls take the stdlib path
+        if self.use_orjson and set(kwargs) <= {'separators', 'sort_keys'}:
+            return self._orjson_dumps(obj, kwargs.get('sort_keys', self.sort_keys)).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+    
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+    
+    def response(self, *args, **kwargs):
+        # Pretty printing (debug mode) stays on the stdlib path
+        if not self.use_orjson or self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            self._orjson_dumps(obj, self.sort_keys) + b'\n',
+            mimetype=self.mimetype
+        )
+    
+    def _orjson_dumps(self, obj, sort_keys):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+def _encode_datetime(value):
+    return '"' + value.isoformat(' ')[:19] + '"'
+
+def _encode_other(value):
+    return json.dumps(value, default=JSONProvider.default)
+
+# Exact type -> JSON text for the common column types, anything else
+# goes through json.dumps with the provider's default
+_VALUE_ENCODERS = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    bool: lambda value: 'true' if value else 'false',
+    type(None): lambda value: 'null',
+    datetime: _encode_datetime,
+}
+
+def encode_rows(columns, rows):
+    """
+    Row tuples -> comma separated JSON objects (without the brackets)
+    Equivalent to serializing dict(zip(columns, row)) for every row, minus
+    building the dicts. As with zip, values past the last column are left
+    out (e.g. a sort key fetched only for the next cursor).
+    """
+    keys = ['{' + encode_basestring_ascii(columns[0]) + ':']
+    keys.extend(',' + encode_basestring_ascii(column) + ':' for column in columns[1:])
+    get_encoder = _VALUE_ENCODERS.get
+    parts = []
+    append = parts.append
+    for row in rows:
+        if parts:
+            append('},')
+        for key, value in zip(keys, row):
+            append(key)
+            append((get_encoder(type(value)) or _encode_other)(value))
+    if parts:
+        append('}')
+    return ''.join(parts)
@@ -1 +1,19 @@
-# Empty file
+"""
+Shared worker instances
+Built on first use instead of at import time, so a cold start only pays
+for the workers (and the jwt / bcrypt / database modules behind them)
+that its first request actually needs.
+"""
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def get_auth_worker():
+    """Process-wide AuthWorker, shared by the auth middleware and controller"""
+    from api.workers.auth_worker import AuthWorker
+    return AuthWorker()
+
+@lru_cache(maxsize=None)
+def get_task_worker():
+    """Process-wide TaskWorker"""
+    from api.workers.task_worker import TaskWorker
+    return TaskWorker()
@@ -1,16 +1,24 @@
 """
 Authentication Worker - Business logic for authentication
 """
+import hashlib
+import logging
+import hmac
+import secrets
 import jwt
 from datetime import datetime, timedelta
-from api.repositories.user_repository import UserRepository
+from api.repositories import get_user_repository, get_refresh_token_repository
+from api.utils.cache import user_cache
 from api.utils.config import Config
 
+logger = logging.getLogger(__name__)
+
 class AuthWorker:
     """Handles authentication business logic"""
     
     def __init__(self):
-        self.user_repo = UserRepository()
+        self.user_repo = get_user_repository()
+        self.refresh_repo = get_refresh_token_repository()
     
     def register(self, email, password, name):
         """Register a new user"""
@@ -18,20 +26,19 @@ class AuthWorker:
         if self.user_repo.email_exists(email):
             raise ValueError("Email already registered")
         
-        # Create user
+        # Create user (hashes first, so no connection is held during bcrypt)
+        self.user_repo.release_connection()
         user_id = self.user_repo.create_user(email, password, name)
         
-        # Generate token
-        token = self.generate_token(user_id, email)
-        
-        return {
-            "token": token,
-            "user": {
-                "id": user_id,
-                "email": email,
-                "name": name
-            }
+        # Generate tokens (created_at is not known yet, so no stateless claims)
+        result = self.issue_tokens(user_id, email)
+        result["user"] = {
+            "id": user_id,
+            "email": email,
+            "name": name
         }
+        
+        return result
     
     def login(self, email, password):
         """Authenticate user and generate token"""
@@ -40,31 +47,102 @@ class AuthWorker:
         if not user:
             raise ValueError("Invalid email or password")
         
-        # Verify password
+        # Verify password, without holding a connection through bcrypt
+        self.user_repo.release_connection()
         if not self.user_repo.verify_password(password, user['password']):
             raise ValueError("Invalid email or password")
         
-        # Generate token
-        token = self.generate_token(user['id'], user['email'])
+        # BCRYPT_ROUNDS changed since this hash was made: upgrade it now that
+        # we have the plain password. Best effort, login does not depend on it.
+        if self.user_repo.needs_rehash(user['password']):
+            try:
+                self.user_repo.update_password_hash(user['id'], password)
+            except Exception as e:
+                logger.warning("Password rehash skipped: %s", e, extra={"user_id": user['id']})
+        
+        # Generate tokens
+        result = self.issue_tokens(user['id'], user['email'], user['name'], user['created_at'])
+        result["user"] = {
+            "id": user['id'],
+            "email": user['email'],
+            "name": user['name']
+        }
+        
+        return result
+    
+    def refresh(self, refresh_token):
+        """
+        Trade a refresh token for a new access/refresh pair
+        The presented token is revoked (rotation). Presenting a token that
+        was already rotated means it leaked, so its whole family is revoked.
+        """
+        token = self.refresh_repo.find_for_rotation(self.hash_refresh_token(refresh_token))
+        if not token:
+            raise ValueError("Invalid refresh token")
+        
+        if token['revoked_at'] is not None:
+            self.refresh_repo.revoke_family(token['family_id'], commit=True)
+            logger.warning("Refresh token reuse detected, session revoked", extra={"user_id": token['user_id']})
+            raise ValueError("Invalid refresh token")
+        
+        if token['expires_at'] <= datetime.now():
+            raise ValueError("Refresh token has expired")
+        
+        self.refresh_repo.revoke_token(token['id'])
+        
+        return self.issue_tokens(
+            token['user_id'],
+            token['email'],
+            token['name'],
+            token['created_at'],
+            family_id=token['family_id']
+        )
+    
+    def logout(self, refresh_token):
+        """Revoke the session a refresh token belongs to (unknown tokens are ignored)"""
+        token = self.refresh_repo.find_for_rotation(self.hash_refresh_token(refresh_token))
+        if token:
+            self.refresh_repo.revoke_family(token['family_id'])
+    
+    def issue_tokens(self, user_id, email, name=None, created_at=None, family_id=None):
+        """Access token plus a new refresh token (new family unless rotating)"""
+        refresh_token = secrets.token_urlsafe(32)
+        self.refresh_repo.create_token(
+            user_id,
+            self.hash_refresh_token(refresh_token),
+            family_id or secrets.token_hex(16),
+            datetime.now() + timedelta(days=Config.REFRESH_TOKEN_DAYS)
+        )
         
         return {
-            "token": token,
-            "user": {
-                "id": user['id'],
-                "email": user['email'],
-                "name": user['name']
-            }
+            "token": self.generate_token(user_id, email, name, created_at),
+            "refresh_token": refresh_token,
+            "expires_in": Config.JWT_ACCESS_TOKEN_MINUTES * 60
         }
     
-    def generate_token(self, user_id, email):
+    @staticmethod
+    def hash_refresh_token(refresh_token):
+        """Refresh tokens are stored as HMAC-SHA256 so a leaked table is useless"""
+        return hmac.new(
+            Config.JWT_SECRET_KEY.encode('utf-8'),
+            refresh_token.encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+    
+    def generate_token(self, user_id, email, name=None, created_at=None):
         """Generate JWT token"""
         payload = {
             "user_id": user_id,
             "email": email,
-            "exp": datetime.utcnow() + timedelta(hours=Config.JWT_EXPIRATION_HOURS),
+            "exp": datetime.utcnow() + timedelta(minutes=Config.JWT_ACCESS_TOKEN_MINUTES),
             "iat": datetime.utcnow()
         }
         
+        # Stateless claims are only issued when the full user is known
+        if Config.JWT_STATELESS_CLAIMS and name is not None and created_at is not None:
+            payload["name"] = name
+            payload["created_at"] = str(created_at)
+        
         token = jwt.encode(
             payload,
             Config.JWT_SECRET_KEY,
@@ -92,10 +170,26 @@ class AuthWorker:
         payload = self.verify_token(token)
         user_id = payload.get('user_id')
         
+        # Stateless mode: the token already carries everything we need
+        if Config.JWT_STATELESS_CLAIMS and 'name' in payload and 'created_at' in payload:
+            return {
+                "id": user_id,
+                "email": payload.get('email'),
+                "name": payload['name'],
+                "created_at": payload['created_at']
+            }
+        
+        user = user_cache.get(user_id)
+        if user:
+            return user
+        
+        # An invalidation between this read and the set means the row may be stale
+        generation = user_cache.generation
         user = self.user_repo.find_by_id(user_id)
         if not user:
             raise ValueError("User not found")
         
+        user_cache.set(user_id, user, generation)
         return user
     
     def update_profile(self, user_id, name, email, current_password=None, new_password=None):
@@ -117,19 +211,41 @@ class AuthWorker:
             
             # Get user with password for verification
             user_with_password = self.user_repo.find_by_email(user['email'])
+            self.user_repo.release_connection()
             if not self.user_repo.verify_password(current_password, user_with_password['password']):
                 raise ValueError("Current password is incorrect")
             
             if len(new_password) < 6:
                 raise ValueError("New password must be at least 6 characters")
         
-        # Update user
+        # Update user (a new password is hashed before it takes a connection)
+        # The repository drops the cached user once the update is committed
         updated_user = self.user_repo.update_user(user_id, name, email, new_password)
         
-        return {
+        result = {
             "user": {
                 "id": updated_user['id'],
                 "name": updated_user['name'],
                 "email": updated_user['email']
             }
         }
+        
+        if new_password:
+            # Sign every other session out, the caller gets a fresh pair
+            self.refresh_repo.revoke_all_for_user(user_id)
+            result.update(self.issue_tokens(
+                updated_user['id'],
+                updated_user['email'],
+                updated_user['name'],
+                updated_user['created_at']
+            ))
+        elif Config.JWT_STATELESS_CLAIMS:
+            # Old stateless tokens still carry the previous name/email
+            result["token"] = self.generate_token(
+                updated_user['id'],
+                updated_user['email'],
+                updated_user['name'],
+                updated_user['created_at']
+            )
+        
+        return result
@@ -1,38 +1,125 @@
 """
 Task Worker - Business logic for task management
 """
-from api.repositories.task_repository import TaskRepository
+import hashlib
+import time
+from api.repositories import TASK_COLUMNS, get_task_repository
+from api.repositories.task_query import TaskQuery
+from api.repositories.task_search import parse_terms
+from api.utils.config import Config
+from api.utils.pagination import encode_cursor, encode_offset_cursor, encode_sync_token
+
+VALID_STATUSES = ('pending', 'in_progress', 'completed')
+
+class SyncTokenExpired(Exception):
+    """The changes since a sync token can no longer be listed (deletes were pruned)"""
 
 class TaskWorker:
     """Handles task management business logic"""
     
     def __init__(self):
-        self.task_repo = TaskRepository()
+        self.task_repo = get_task_repository()
     
     def create_task(self, user_id, title, status='pending'):
         """Create a new task"""
         if not title or len(title.strip()) == 0:
             raise ValueError("Title is required")
         
-        if status not in ['pending', 'in_progress', 'completed']:
+        if status not in VALID_STATUSES:
             raise ValueError("Invalid status")
         
-        task_id = self.task_repo.create_task(user_id, title, status)
+        # Repository reads the row back (with created_at) on the same connection
+        return self.task_repo.create_task(user_id, title, status)
+    
+    def create_tasks(self, user_id, tasks):
+        """Create several tasks at once, tasks is a list of (title, status)"""
+        if not tasks:
+            raise ValueError("At least one task is required")
         
-        # Get the complete task with created_at from database
-        task = self.task_repo.find_by_id(task_id, user_id)
-        return task
+        for title, status in tasks:
+            if not title or len(title.strip()) == 0:
+                raise ValueError("Title is required")
+            if status not in VALID_STATUSES:
+                raise ValueError("Invalid status")
+        
+        return self.task_repo.create_tasks(user_id, tasks)
+    
+    def get_all_tasks(self, user_id, limit, after=None, query=None):
+        """Get one page of tasks (row tuples) for a user plus the cursor for the next one"""
+        query = query or TaskQuery()
+        tasks, last_key = self.task_repo.find_page_by_user(user_id, limit, after, query)
+        
+        next_cursor = None
+        if last_key:
+            next_cursor = encode_cursor(*last_key, sort=query.sort, descending=query.descending)
+        
+        return {
+            "columns": query.fields,
+            "tasks": tasks,
+            "next_cursor": next_cursor
+        }
     
-    def get_all_tasks(self, user_id):
-        """Get all tasks for a user"""
-        tasks = self.task_repo.find_all_by_user(user_id)
-        return tasks
+    def stream_all_tasks(self, user_id, batch_size, query=None):
+        """Lazily iterate over every task of a user (query.fields tuples, TASK_COLUMNS by default)"""
+        return self.task_repo.iter_all_by_user(user_id, batch_size, query)
+    
+    def search_tasks(self, user_id, text, limit, offset=0, fields=TASK_COLUMNS):
+        """One page of tasks whose title matches text, best match first"""
+        terms = parse_terms(text)
+        if not terms:
+            raise ValueError("Search query must contain at least one word")
+        
+        tasks, has_more = self.task_repo.search_by_user(user_id, terms, limit, offset, fields)
+        
+        return {
+            "columns": fields,
+            "tasks": tasks,
+            "next_cursor": encode_offset_cursor(offset + limit) if has_more else None
+        }
+    
+    def get_changes(self, user_id, limit, token=None, fields=TASK_COLUMNS):
+        """
+        One page of the tasks created, updated or deleted since a sync token
+        token is a decoded (since, issued_at, upper, after), None for a full
+        sync. Tokens older than TOMBSTONE_RETENTION_DAYS may have lost deletes.
+        """
+        now = time.time()
+        since, issued_at, upper, after = token or (None, now, None, None)
+        if issued_at < now - Config.TOMBSTONE_RETENTION_DAYS * 86400:
+            raise SyncTokenExpired("Sync token expired, sync again without since")
+        
+        if upper is None:
+            # New sync: everything up to the current version, as of now
+            upper = self.task_repo.get_version(user_id)
+            issued_at = now
+            if since is not None and since > upper:
+                raise SyncTokenExpired("Sync token is ahead of the server, sync again without since")
+        
+        rows = self.task_repo.find_changes(user_id, since, upper, limit, after, fields)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        if has_more:
+            last = rows[-1]
+            next_token = encode_sync_token(since, issued_at, upper, (last[0], last[2]))
+        else:
+            next_token = encode_sync_token(upper, issued_at)
+        
+        return {
+            "columns": fields,
+            "tasks": [row[2:] for row in rows if not row[1]],
+            "deleted": [row[2] for row in rows if row[1]],
+            "next_token": next_token,
+            "has_more": has_more
+        }
     
-    def get_task(self, task_id, user_id):
-        """Get a specific task"""
+    def get_task(self, task_id, user_id, fields=TASK_COLUMNS):
+        """Get a specific task (only the given fields)"""
         task = self.task_repo.find_by_id(task_id, user_id)
         if not task:
             raise ValueError("Task not found")
+        if fields != TASK_COLUMNS:
+            task = {field: task[field] for field in fields}
         return task
     
     def update_task(self, task_id, user_id, title):
@@ -40,50 +127,82 @@ class TaskWorker:
         if not title or len(title.strip()) == 0:
             raise ValueError("Title is required")
         
-        # Check if task exists
-        task = self.task_repo.find_by_id(task_id, user_id)
+        # Ownership and existence are checked by the repository, inside the write
+        task = self.task_repo.update_task(task_id, user_id, title)
         if not task:
             raise ValueError("Task not found")
         
-        success = self.task_repo.update_task(task_id, user_id, title)
-        
-        if not success:
-            raise ValueError("Failed to update task")
-        
-        return self.get_task(task_id, user_id)
+        return task
     
     def update_status(self, task_id, user_id, status):
         """Update task status"""
-        if status not in ['pending', 'in_progress', 'completed']:
+        if status not in VALID_STATUSES:
             raise ValueError("Invalid status")
         
-        # Check if task exists
-        task = self.task_repo.find_by_id(task_id, user_id)
+        task = self.task_repo.update_status(task_id, user_id, status)
         if not task:
             raise ValueError("Task not found")
         
-        success = self.task_repo.update_status(task_id, user_id, status)
+        return task
+    
+    def update_status_many(self, user_id, status, task_ids=None, current_status=None):
+        """Update the status of several tasks, by ids or by current status"""
+        if status not in VALID_STATUSES:
+            raise ValueError("Invalid status")
+        self._check_bulk_scope(task_ids, current_status)
         
-        if not success:
-            raise ValueError("Failed to update status")
+        updated = self.task_repo.update_status_many(user_id, status, task_ids, current_status)
+        return self._bulk_result(task_ids, updated, "updated")
+    
+    def delete_many(self, user_id, task_ids=None, current_status=None):
+        """Delete several tasks, by ids or by current status"""
+        self._check_bulk_scope(task_ids, current_status)
         
-        return self.get_task(task_id, user_id)
+        deleted = self.task_repo.delete_many(user_id, task_ids, current_status)
+        return self._bulk_result(task_ids, deleted, "deleted")
     
     def delete_task(self, task_id, user_id):
         """Delete a task"""
-        # Check if task exists
-        task = self.task_repo.find_by_id(task_id, user_id)
-        if not task:
+        if not self.task_repo.delete_task(task_id, user_id):
             raise ValueError("Task not found")
         
-        success = self.task_repo.delete_task(task_id, user_id)
-        
-        if not success:
-            raise ValueError("Failed to delete task")
-        
         return True
     
     def get_statistics(self, user_id):
         """Get task statistics"""
         stats = self.task_repo.get_statistics(user_id)
         return stats
+    
+    def get_etag(self, user_id, *representation):
+        """
+        ETag of one representation of the user's tasks
+        The version (bumped by every write) hashed with what picks the
+        response body (route, normalized query), so two reads only share a
+        tag when they would return the same body.
+        """
+        version = self.task_repo.get_version(user_id)
+        key = repr((user_id, version, *representation)).encode()
+        return f"{version}-{hashlib.blake2b(key, digest_size=12).hexdigest()}"
+    
+    def _check_bulk_scope(self, task_ids, current_status):
+        """Bulk operations need exactly one of ids or a status filter"""
+        if (task_ids is None) == (current_status is None):
+            raise ValueError("Provide either ids or a status filter")
+        if task_ids is not None and not task_ids:
+            raise ValueError("At least one id is required")
+        if current_status is not None and current_status not in VALID_STATUSES:
+            raise ValueError("Invalid status filter")
+    
+    def _bulk_result(self, task_ids, outcome, action):
+        """Per-id outcomes for id scoped operations, a count for filters"""
+        if task_ids is None:
+            return {action: outcome}
+        
+        done = set(outcome)
+        return {
+            action: len(done),
+            "results": [
+                {"id": task_id, "result": action if task_id in done else "not_found"}
+                for task_id in task_ids
+            ]
+        }
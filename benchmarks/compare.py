@@ -0,0 +1,81 @@
+"""
+Compare two benchmark reports
+    
+    python -m benchmarks.compare before.json after.json [--threshold 10] [--fail-on-regression]
+
+A scenario regresses when its req/s drops, or its p95 latency or
+statements per request grow, by more than the threshold (percent).
+"""
+import argparse
+import json
+import sys
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def change(before, after):
+    """Relative change in percent (None when there is no baseline)"""
+    if not before:
+        return None
+    return (after - before) / before * 100
+
+def _format_change(value):
+    return '     n/a' if value is None else f"{value:+7.1f}%"
+
+def compare(base, new, threshold):
+    """Rows of (scenario, metrics, regressed) for scenarios present in both reports"""
+    rows = []
+    for name, after in new['scenarios'].items():
+        before = base['scenarios'].get(name)
+        if before is None:
+            continue
+        rps = change(before['req_per_sec'], after['req_per_sec'])
+        p95 = change(before['latency_ms']['p95'], after['latency_ms']['p95'])
+        queries = change(before['queries_per_request']['mean'], after['queries_per_request']['mean'])
+        regressed = (
+            (rps is not None and rps < -threshold)
+            or (p95 is not None and p95 > threshold)
+            or (queries is not None and queries > threshold)
+            or after['errors'] > before['errors']
+        )
+        rows.append((name, before, after, rps, p95, queries, regressed))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0, help="Regression threshold in percent")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Exit with status 1 on regressions")
+    args = parser.parse_args(argv)
+    
+    base, new = load(args.base), load(args.new)
+    for key in ('backend', 'users', 'tasks_per_user', 'concurrency'):
+        if base['meta'].get(key) != new['meta'].get(key):
+            print(f"warning: {key} differs ({base['meta'].get(key)} vs {new['meta'].get(key)})", file=sys.stderr)
+    
+    rows = compare(base, new, args.threshold)
+    print(f"{'scenario':<26} {'req/s':>21} {'p95 ms':>21} {'queries':>17}")
+    for name, before, after, rps, p95, queries, regressed in rows:
+        print(
+            f"{name:<26} "
+            f"{after['req_per_sec']:>11.1f} {_format_change(rps)} "
+            f"{after['latency_ms']['p95']:>11.3f} {_format_change(p95)} "
+            f"{after['queries_per_request']['mean']:>7.2f} {_format_change(queries)}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    
+    base_rss, new_rss = base.get('peak_rss_kb'), new.get('peak_rss_kb')
+    if base_rss and new_rss:
+        print(f"peak RSS: {base_rss} KiB -> {new_rss} KiB ({_format_change(change(base_rss, new_rss)).strip()})")
+    
+    regressions = [row[0] for row in rows if row[-1]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:g}%: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
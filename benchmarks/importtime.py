@@ -0,0 +1,140 @@
+"""
+Cold-start report
+Imports index.py in fresh interpreters under `python -X importtime`
+(with VERCEL=1, like a serverless cold start), then times the first
+request to /api. Reports the median import time, the slowest modules and
+any heavy module that got loaded before a database route was hit.
+
+    python -m benchmarks.importtime --runs 7 --output cold.json
+    python -m benchmarks.importtime --baseline cold.json --fail-on-regression
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must stay out of the import of index.py and the health endpoints
+DEFERRED_MODULES = ('mysql.connector', 'bcrypt', 'jwt', 'dotenv', 'api.workers.auth_worker', 'api.utils.pool')
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import index
+imported = time.perf_counter()
+client = index.app.test_client()
+ready = time.perf_counter()
+response = client.get('/api')
+answered = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (answered - ready) * 1000,
+    "status": response.status_code,
+    "loaded": [name for name in %r if name in sys.modules]
+}))
+""" % (DEFERRED_MODULES,)
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def parse_importtime(stderr):
+    """-X importtime output -> {module: (self_us, cumulative_us, depth)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+def probe(env):
+    """One cold import in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    data["modules"] = parse_importtime(result.stderr)
+    return data
+
+def run(runs, top):
+    env = dict(os.environ, VERCEL='1', LOG_LEVEL='WARNING')
+    env.setdefault('STORAGE_BACKEND', 'mysql')
+    probes = [probe(env) for _ in range(runs)]
+    
+    def median(values):
+        return round(statistics.median(values), 2)
+    
+    # Median self/cumulative time per module across runs
+    names = set().union(*(p["modules"] for p in probes))
+    modules = {}
+    for name in names:
+        samples = [p["modules"][name] for p in probes if name in p["modules"]]
+        modules[name] = {
+            "self_ms": median([s[0] / 1000 for s in samples]),
+            "cumulative_ms": median([s[1] / 1000 for s in samples])
+        }
+    slowest = sorted(modules.items(), key=lambda item: item[1]["self_ms"], reverse=True)[:top]
+    
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "runs": runs,
+            "backend": env['STORAGE_BACKEND']
+        },
+        "import_ms": median([p["import_ms"] for p in probes]),
+        "import_index_cumulative_ms": modules.get('index', {}).get("cumulative_ms"),
+        "first_request_ms": median([p["first_request_ms"] for p in probes]),
+        "modules_imported": median([len(p["modules"]) for p in probes]),
+        "deferred_modules_loaded": sorted(set().union(*(p["loaded"] for p in probes))),
+        "slowest_modules": dict(slowest)
+    }
+
+def compare(base, new, threshold):
+    """Print the differences, returns True on a regression"""
+    regressed = False
+    for key in ('import_ms', 'first_request_ms', 'modules_imported'):
+        before, after = base[key], new[key]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = change > threshold
+        regressed |= flag
+        print(f"{key:<20} {before:>10} -> {after:>10} ({change:+.1f}%){'  REGRESSION' if flag else ''}",
+              file=sys.stderr)
+    added = sorted(set(new["deferred_modules_loaded"]) - set(base["deferred_modules_loaded"]))
+    if added:
+        regressed = True
+        print(f"now loaded at startup: {', '.join(added)}  REGRESSION", file=sys.stderr)
+    return regressed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start import time report")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to sample")
+    parser.add_argument('--top', type=int, default=15, help="Slowest modules to list")
+    parser.add_argument('--output', default='-', help="JSON output file ('-' for stdout)")
+    parser.add_argument('--baseline', help="Earlier report to compare against")
+    parser.add_argument('--threshold', type=float, default=15.0, help="Regression threshold in percent")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="Exit with status 1 on regressions or deferred modules loaded at startup")
+    args = parser.parse_args(argv)
+    
+    report = run(args.runs, args.top)
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    
+    regressed = bool(report["deferred_modules_loaded"])
+    if report["deferred_modules_loaded"]:
+        print(f"loaded at startup: {', '.join(report['deferred_modules_loaded'])}", file=sys.stderr)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressed |= compare(json.load(f), report, args.threshold)
+    return 1 if regressed and args.fail_on_regression else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
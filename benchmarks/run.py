@@ -0,0 +1,255 @@
+"""
+End-to-end HTTP benchmark
+Drives every route through the Flask test client against a local
+stand-in database (SQLite file by default, or the in-memory backend) and
+writes req/s, latency percentiles, SQL statements per request and peak
+RSS as JSON.
+    
+    python -m benchmarks.run --users 5 --tasks-per-user 1000 --concurrency 4 --output before.json
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Task Manager API benchmark")
+    parser.add_argument('--backend', choices=('sqlite', 'memory', 'mysql'), default='sqlite',
+                        help="Storage backend (mysql uses the DB_* settings)")
+    parser.add_argument('--users', type=int, default=4, help="Users seeded before the run")
+    parser.add_argument('--tasks-per-user', type=int, default=500, help="Tasks seeded per user")
+    parser.add_argument('--concurrency', type=int, default=4, help="Client threads per scenario")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per scenario")
+    parser.add_argument('--warmup', type=int, default=10, help="Untimed requests per scenario")
+    parser.add_argument('--scenarios', default='', help="Comma separated scenario names (default: all)")
+    parser.add_argument('--bcrypt-rounds', type=int, default=4,
+                        help="bcrypt cost for the run (production uses 12)")
+    parser.add_argument('--output', default='-', help="JSON output file ('-' for stdout)")
+    return parser.parse_args(argv)
+
+def configure_environment(args, data_dir):
+    """Settings must be in place before the app (and Config) is imported"""
+    os.environ['STORAGE_BACKEND'] = args.backend
+    os.environ['SQLITE_PATH'] = os.path.join(data_dir, 'benchmark.sqlite3')
+    os.environ['BCRYPT_ROUNDS'] = str(args.bcrypt_rounds)
+    os.environ.setdefault('JWT_SECRET_KEY', 'benchmark-secret')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('SQL_SLOW_QUERY_MS', '0')
+
+class Context:
+    """Seeded users and helpers shared by the scenarios"""
+    
+    def __init__(self, app, run_id):
+        self.app = app
+        self.client = app.test_client()
+        self.run_id = run_id
+        self.users = []
+    
+    def seed(self, users, tasks_per_user):
+        from benchmarks.scenarios import auth
+        for index in range(users):
+            user = {"email": f"seed-{self.run_id}-{index}@example.com", "password": "benchmark"}
+            response = self.client.post('/api/auth/register', json={**user, "name": f"Seed {index}"})
+            _check(response, 201, 'register')
+            data = response.get_json()['data']
+            user.update(id=data['user']['id'], token=data['token'])
+            user['task_ids'] = self.create_tasks(user, tasks_per_user)
+            self.users.append(user)
+            # Sanity check: the token works
+            _check(self.client.get('/api/auth/me', headers=auth(user)), 200, 'me')
+    
+    def create_tasks(self, user, count):
+        """Create count tasks through POST /api/tasks/batch, returns their ids"""
+        from benchmarks.scenarios import auth
+        from api.utils.config import Config
+        task_ids = []
+        while len(task_ids) < count:
+            size = min(count - len(task_ids), Config.TASKS_BATCH_MAX_SIZE)
+            batch = [{"title": f"Seed task {len(task_ids) + n}",
+                      "status": ('pending', 'in_progress', 'completed')[n % 3]} for n in range(size)]
+            response = self.client.post('/api/tasks/batch', json=batch, headers=auth(user))
+            _check(response, 201, 'create batch')
+            task_ids.extend(task['id'] for task in response.get_json()['data']['tasks'])
+        return task_ids
+    
+    def login(self, user):
+        response = self.client.post('/api/auth/login', json={"email": user['email'], "password": user['password']})
+        _check(response, 200, 'login')
+        return response.get_json()['data']
+
+def _check(response, status, what):
+    if response.status_code != status:
+        raise RuntimeError(f"Seeding {what} failed: {response.status_code} {response.get_data(as_text=True)[:200]}")
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def run_scenario(ctx, scenario, args):
+    """Run one scenario with args.concurrency threads, returns its result dict"""
+    from benchmarks.scenarios import Worker
+    from api.utils.profiler import QueryProfile
+    
+    total = args.requests
+    workers = []
+    for index in range(args.concurrency):
+        count = total // args.concurrency + (1 if index < total % args.concurrency else 0)
+        workers.append(Worker(index, ctx.users[index % len(ctx.users)], count + args.warmup))
+    if scenario.prepare:
+        scenario.prepare(ctx, workers)
+    
+    latencies = [[] for _ in workers]
+    queries = [[] for _ in workers]
+    errors = [0] * len(workers)
+    barrier = threading.Barrier(len(workers) + 1)
+    
+    def work(worker):
+        client = ctx.app.test_client()
+        barrier.wait()
+        for i in range(worker.count):
+            method, path, kwargs = scenario.build(ctx, worker, i)
+            with QueryProfile() as profile:
+                started = time.perf_counter()
+                response = client.open(path, method=method, **kwargs)
+                response.get_data()  # drain streamed bodies
+                elapsed = time.perf_counter() - started
+            response.close()
+            if scenario.on_response:
+                scenario.on_response(worker, response)
+            if i < args.warmup:
+                continue
+            latencies[worker.index].append(elapsed)
+            queries[worker.index].append(profile.count)
+            expected = scenario.expect
+            if (response.status_code != expected) if expected else response.status_code >= 400:
+                errors[worker.index] += 1
+        barrier.wait()
+    
+    threads = [threading.Thread(target=work, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    # Second barrier: every worker finished its timed requests
+    barrier.wait()
+    wall = time.perf_counter() - started
+    for thread in threads:
+        thread.join()
+    
+    all_latencies = sorted(value for values in latencies for value in values)
+    all_queries = [value for values in queries for value in values]
+    count = len(all_latencies)
+    return {
+        "requests": count,
+        "errors": sum(errors),
+        "wall_seconds": round(wall, 4),
+        "req_per_sec": round(count / wall, 2) if wall else None,
+        "latency_ms": {
+            "mean": round(sum(all_latencies) / count * 1000, 3) if count else 0.0,
+            "p50": round(percentile(all_latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(all_latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(all_latencies, 0.99) * 1000, 3),
+            "max": round(all_latencies[-1] * 1000, 3) if count else 0.0
+        },
+        "queries_per_request": {
+            "mean": round(sum(all_queries) / count, 2) if count else 0.0,
+            "max": max(all_queries) if all_queries else 0
+        },
+        "peak_rss_kb": peak_rss_kb()
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    args = parse_args(argv)
+    data_dir = tempfile.mkdtemp(prefix='task-manager-bench-')
+    configure_environment(args, data_dir)
+    
+    try:
+        from index import app
+        from benchmarks.scenarios import SCENARIOS
+        
+        selected = {name.strip() for name in args.scenarios.split(',') if name.strip()}
+        unknown = selected - {scenario.name for scenario in SCENARIOS}
+        if unknown:
+            raise SystemExit(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        
+        ctx = Context(app, uuid.uuid4().hex[:8])
+        seed_started = time.perf_counter()
+        ctx.seed(args.users, args.tasks_per_user)
+        seed_seconds = time.perf_counter() - seed_started
+        
+        results = {}
+        for scenario in SCENARIOS:
+            if selected and scenario.name not in selected:
+                continue
+            if scenario.backends and args.backend not in scenario.backends:
+                continue
+            results[scenario.name] = run_scenario(ctx, scenario, args)
+            print(f"{scenario.name:<26} {results[scenario.name]['req_per_sec']:>10} req/s  "
+                  f"p95 {results[scenario.name]['latency_ms']['p95']:>9} ms", file=sys.stderr)
+        
+        report = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec='seconds'),
+                "git_commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "backend": args.backend,
+                "users": args.users,
+                "tasks_per_user": args.tasks_per_user,
+                "concurrency": args.concurrency,
+                "requests": args.requests,
+                "warmup": args.warmup,
+                "bcrypt_rounds": args.bcrypt_rounds,
+                "seed_seconds": round(seed_seconds, 3)
+            },
+            "peak_rss_kb": peak_rss_kb(),
+            "scenarios": results
+        }
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    return report
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark scenarios, one per API route
+A scenario builds each request as (method, path, kwargs for the test
+client). prepare() runs before the timed loop (untimed) and can stash
+per-worker state, e.g. task ids to delete or a refresh token chain.
+"""
+
+class Worker:
+    """One benchmark thread: its user, request count and scratch state"""
+    
+    def __init__(self, index, user, count):
+        self.index = index
+        self.user = user
+        self.count = count
+        self.state = {}
+
+class Scenario:
+    """A named request generator"""
+    
+    def __init__(self, name, build, prepare=None, on_response=None, backends=None, expect=None):
+        self.name = name
+        self.build = build
+        self.prepare = prepare
+        self.on_response = on_response
+        # Only run on these STORAGE_BACKEND values (None: all)
+        self.backends = backends
+        # Status counted as success (default: anything below 400)
+        self.expect = expect
+
+def auth(user):
+    return {"Authorization": f"Bearer {user['token']}"}
+
+def _task_id(worker, i):
+    task_ids = worker.user['task_ids']
+    return task_ids[i % len(task_ids)]
+
+def _prepare_login(ctx, workers):
+    """Each worker gets its own session (refresh token chain)"""
+    for worker in workers:
+        data = ctx.login(worker.user)
+        worker.state['refresh_token'] = data['refresh_token']
+
+def _chain_refresh(worker, response):
+    if response.status_code == 200:
+        worker.state['refresh_token'] = response.get_json()['data']['refresh_token']
+
+def _prepare_etag(ctx, workers):
+    for worker in workers:
+        response = ctx.client.get('/api/tasks', headers=auth(worker.user))
+        worker.state['etag'] = response.headers['ETag']
+
+def _prepare_sync(ctx, workers):
+    """A caught-up sync token, then a few writes: each request lists only those"""
+    for worker in workers:
+        token = None
+        while True:
+            query = f"?limit=500&since={token}" if token else "?limit=500"
+            data = ctx.client.get('/api/tasks/changes' + query, headers=auth(worker.user)).get_json()['data']
+            token = data['next_token']
+            if not data['has_more']:
+                break
+        worker.state['sync_token'] = token
+        ctx.create_tasks(worker.user, 10)
+
+def _prepare_disposable(ctx, workers, per_request=1):
+    """Fresh tasks for destructive scenarios, so they never run dry"""
+    for worker in workers:
+        worker.state['disposable'] = ctx.create_tasks(worker.user, worker.count * per_request)
+
+def _disposable(worker, i, size=1):
+    return worker.state['disposable'][i * size:(i + 1) * size]
+
+BULK_SIZE = 20
+
+SCENARIOS = [
+    # Service
+    Scenario('root', lambda ctx, w, i: ('GET', '/api', {})),
+    Scenario('keep_alive_health', lambda ctx, w, i: ('GET', '/api/keep-alive/health', {})),
+    Scenario('keep_alive_ping', lambda ctx, w, i: ('GET', '/api/keep-alive/ping', {})),
+    Scenario('database_health', lambda ctx, w, i: ('GET', '/api/health/database', {})),
+    Scenario('metrics', lambda ctx, w, i: ('GET', '/api/metrics', {})),
+    
+    # Auth
+    Scenario('register', lambda ctx, w, i: ('POST', '/api/auth/register', {
+        "json": {"email": f"bench-{ctx.run_id}-{w.index}-{i}@example.com", "password": "benchmark", "name": "Bench"}
+    })),
+    Scenario('login', lambda ctx, w, i: ('POST', '/api/auth/login', {
+        "json": {"email": w.user['email'], "password": w.user['password']}
+    })),
+    Scenario('refresh', lambda ctx, w, i: ('POST', '/api/auth/refresh', {
+        "json": {"refresh_token": w.state['refresh_token']}
+    }), prepare=_prepare_login, on_response=_chain_refresh),
+    Scenario('me', lambda ctx, w, i: ('GET', '/api/auth/me', {"headers": auth(w.user)})),
+    Scenario('update_profile', lambda ctx, w, i: ('PUT', '/api/auth/profile', {
+        "headers": auth(w.user), "json": {"name": f"Bench {i}", "email": w.user['email']}
+    })),
+    Scenario('logout', lambda ctx, w, i: ('POST', '/api/auth/logout', {
+        "json": {"refresh_token": w.state['refresh_token']}
+    }), prepare=_prepare_login),
+    
+    # Task reads
+    Scenario('list_tasks', lambda ctx, w, i: ('GET', '/api/tasks?limit=100', {"headers": auth(w.user)})),
+    Scenario('list_tasks_max_page', lambda ctx, w, i: ('GET', '/api/tasks?limit=500', {"headers": auth(w.user)})),
+    Scenario('list_tasks_gzip', lambda ctx, w, i: ('GET', '/api/tasks?limit=500', {
+        "headers": {**auth(w.user), "Accept-Encoding": "gzip"}
+    })),
+    Scenario('list_tasks_sparse', lambda ctx, w, i: ('GET', '/api/tasks?limit=500&fields=id,title,status', {
+        "headers": auth(w.user)
+    })),
+    Scenario('list_tasks_filtered', lambda ctx, w, i: ('GET', '/api/tasks?limit=100&status=pending&sort=title&order=asc', {
+        "headers": auth(w.user)
+    })),
+    Scenario('list_tasks_not_modified', lambda ctx, w, i: ('GET', '/api/tasks?limit=100', {
+        "headers": {**auth(w.user), "If-None-Match": w.state['etag']}
+    }), prepare=_prepare_etag, expect=304),
+    Scenario('search_tasks', lambda ctx, w, i: ('GET', f"/api/tasks/search?q=task+{i % 100}&limit=20", {
+        "headers": auth(w.user)
+    })),
+    Scenario('search_tasks_prefix', lambda ctx, w, i: ('GET', '/api/tasks/search?q=se&limit=10', {
+        "headers": auth(w.user)
+    })),
+    Scenario('sync_changes', lambda ctx, w, i: ('GET', f"/api/tasks/changes?since={w.state['sync_token']}", {
+        "headers": auth(w.user)
+    }), prepare=_prepare_sync),
+    Scenario('stream_tasks', lambda ctx, w, i: ('GET', '/api/tasks?stream=1', {"headers": auth(w.user)})),
+    Scenario('get_task', lambda ctx, w, i: ('GET', f"/api/tasks/{_task_id(w, i)}", {"headers": auth(w.user)})),
+    Scenario('statistics', lambda ctx, w, i: ('GET', '/api/tasks/statistics', {"headers": auth(w.user)})),
+    
+    # Task writes
+    Scenario('create_task', lambda ctx, w, i: ('POST', '/api/tasks', {
+        "headers": auth(w.user), "json": {"title": f"Bench task {i}"}
+    })),
+    Scenario('create_tasks_batch', lambda ctx, w, i: ('POST', '/api/tasks/batch', {
+        "headers": auth(w.user), "json": [{"title": f"Bench batch {i}.{n}"} for n in range(BULK_SIZE)]
+    })),
+    Scenario('update_task', lambda ctx, w, i: ('PUT', f"/api/tasks/{_task_id(w, i)}", {
+        "headers": auth(w.user), "json": {"title": f"Renamed {i}"}
+    })),
+    Scenario('update_status', lambda ctx, w, i: ('PUT', f"/api/tasks/{_task_id(w, i)}/status", {
+        "headers": auth(w.user), "json": {"status": ('pending', 'in_progress', 'completed')[i % 3]}
+    })),
+    Scenario('update_status_many', lambda ctx, w, i: ('PATCH', '/api/tasks/status', {
+        "headers": auth(w.user),
+        "json": {"status": ('pending', 'completed')[i % 2],
+                 "ids": [_task_id(w, i * BULK_SIZE + n) for n in range(BULK_SIZE)]}
+    })),
+    Scenario('delete_task', lambda ctx, w, i: ('DELETE', f"/api/tasks/{_disposable(w, i)[0]}", {
+        "headers": auth(w.user)
+    }), prepare=_prepare_disposable),
+    Scenario('delete_many', lambda ctx, w, i: ('DELETE', '/api/tasks', {
+        "headers": auth(w.user), "json": {"ids": _disposable(w, i, BULK_SIZE)}
+    }), prepare=lambda ctx, workers: _prepare_disposable(ctx, workers, BULK_SIZE)),
+]
@@ -20,13 +20,62 @@ CREATE TABLE IF NOT EXISTS `tasks` (
     `status` ENUM('pending', 'in_progress', 'completed') DEFAULT 'pending',
     `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     `completed_at` DATETIME NULL,
+    -- task_stats.version of the last write to the row (GET /api/tasks/changes)
+    `change_seq` BIGINT NOT NULL DEFAULT 0,
     FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE,
+    -- List indexes, one per sort; each carries every listed column so a
+    -- page never reads the clustered row (migration 005)
+    INDEX idx_user_created (`user_id`, `created_at`, `id`, `status`, `completed_at`, `title`),
+    INDEX idx_user_status_created (`user_id`, `status`, `created_at`, `id`, `completed_at`, `title`),
+    INDEX idx_user_completed (`user_id`, `completed_at`, `id`, `status`, `created_at`, `title`),
+    INDEX idx_user_title (`user_id`, `title`, `id`, `status`, `created_at`, `completed_at`),
+    INDEX idx_user_change (`user_id`, `change_seq`, `id`),
+    FULLTEXT INDEX ft_title (`title`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Per-user task counters, maintained by TaskRepository on every write
+-- (rebuild with: flask --app index reconcile-stats)
+CREATE TABLE IF NOT EXISTS `task_stats` (
+    `user_id` INT PRIMARY KEY,
+    `pending` INT NOT NULL DEFAULT 0,
+    `in_progress` INT NOT NULL DEFAULT 0,
+    `completed` INT NOT NULL DEFAULT 0,
+    -- Bumped by every task write, drives ETag / If-None-Match
+    `version` BIGINT NOT NULL DEFAULT 0,
+    FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Deleted tasks, reported by GET /api/tasks/changes until pruned
+-- (flask --app index prune-tombstones)
+CREATE TABLE IF NOT EXISTS `task_tombstones` (
+    `user_id` INT NOT NULL,
+    `change_seq` BIGINT NOT NULL,
+    `task_id` INT NOT NULL,
+    `deleted_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (`user_id`, `change_seq`, `task_id`),
+    FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE,
+    INDEX idx_deleted_at (`deleted_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Refresh tokens (only the HMAC of each token is stored). Every refresh
+-- revokes the presented token and issues a new one in the same family;
+-- presenting a revoked token revokes the whole family.
+CREATE TABLE IF NOT EXISTS `refresh_tokens` (
+    `id` INT AUTO_INCREMENT PRIMARY KEY,
+    `user_id` INT NOT NULL,
+    `token_hash` CHAR(64) NOT NULL,
+    `family_id` CHAR(32) NOT NULL,
+    `expires_at` DATETIME NOT NULL,
+    `revoked_at` DATETIME NULL,
+    `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE,
+    UNIQUE INDEX idx_token_hash (`token_hash`),
+    INDEX idx_family_id (`family_id`),
     INDEX idx_user_id (`user_id`),
-    INDEX idx_status (`status`),
-    INDEX idx_created_at (`created_at`)
+    INDEX idx_expires_at (`expires_at`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
--- Dummy table for keep-alive (prevents database sleep)
+-- Dummy table for keep-alive (optional: /api/keep-alive/ping falls back to SELECT 1)
 CREATE TABLE IF NOT EXISTS `dummy_data` (
     `id` INT AUTO_INCREMENT PRIMARY KEY,
     `is_active` BOOLEAN NOT NULL DEFAULT TRUE,
@@ -3,45 +3,66 @@ Task Manager API - Main Entry Point for Vercel
 """
 from flask import Flask, jsonify
 from flask_cors import CORS
-from flask.json.provider import DefaultJSONProvider
+from api.middleware.compression import compression
 from api.routes.auth_routes import auth_bp
 from api.routes.task_routes import task_bp
 from api.routes.keep_alive_routes import keep_alive_bp
+from api.routes.metrics_routes import metrics_bp
+from api.repositories import get_backend, test_storage_connection
 from api.utils.config import Config
-from api.utils.database import Database
-from datetime import datetime
-
-# Custom JSON provider to handle datetime serialization
-class CustomJSONProvider(DefaultJSONProvider):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            # Return datetime in MySQL format: "YYYY-MM-DD HH:MM:SS"
-            return obj.strftime('%Y-%m-%d %H:%M:%S')
-        return super().default(obj)
+from api.utils.database import Database, without_database
+from api.utils.logger import setup_logging
+from api.utils.metrics import metrics
+from api.utils.profiler import profiler
+from api.utils.serialization import JSONProvider
+from api.commands import register_commands
 
 # Create Flask app
 app = Flask(__name__)
-app.json = CustomJSONProvider(app)
+# orjson when installed; datetimes as "YYYY-MM-DD HH:MM:SS"
+app.json = JSONProvider(app)
+
+# JSON logs through a background queue listener, one id per request
+setup_logging(app)
+
+# Per-route latency / DB metrics (registered first so its after_request
+# runs last and the measured time includes the commit)
+metrics.init_app(app)
+
+# gzip/br/zstd by Accept-Encoding (registered early so it runs after the
+# other after_request hooks, on the final body and headers)
+compression.init_app(app)
+
+# Per-request SQL log when SQL_PROFILE_REQUESTS is set
+profiler.init_app(app)
+
+# One DB connection per request, committed/rolled back by request hooks
+Database.init_app(app)
 
 # CORS Configuration - Allow all origins
 CORS(app, 
      resources={r"/*": {
          "origins": "*",
          "allow_headers": ['Content-Type', 'Authorization', 'X-Requested-With', 'Accept', 'Origin'],
-         "expose_headers": ['Content-Type', 'Authorization'],
+         "expose_headers": ['Content-Type', 'Authorization', 'X-Request-ID'],
          "methods": ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH'],
          "max_age": 3600,
          "supports_credentials": False
      }})
 
+# Maintenance commands (flask --app index ...)
+register_commands(app)
+
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(task_bp, url_prefix='/api/tasks')
 app.register_blueprint(keep_alive_bp, url_prefix='/api/keep-alive')
+app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
 
 # Health check endpoint
 @app.route('/')
 @app.route('/api')
+@without_database
 def health_check():
     """API health check"""
     return jsonify({
@@ -52,17 +73,25 @@ def health_check():
             "auth": {
                 "register": "POST /api/auth/register",
                 "login": "POST /api/auth/login",
+                "refresh": "POST /api/auth/refresh",
+                "logout": "POST /api/auth/logout",
                 "me": "GET /api/auth/me (requires token)"
             },
             "tasks": {
-                "list": "GET /api/tasks (requires token)",
-                "get": "GET /api/tasks/:id (requires token)",
+                "list": "GET /api/tasks?limit=&cursor=&status=&sort=&order=&created_after=&created_before=&completed_after=&completed_before=&fields= (requires token)",
+                "search": "GET /api/tasks/search?q=&limit=&cursor=&fields= (requires token)",
+                "changes": "GET /api/tasks/changes?since=&limit=&fields= (requires token)",
+                "get": "GET /api/tasks/:id?fields= (requires token)",
                 "create": "POST /api/tasks (requires token)",
+                "create_batch": "POST /api/tasks/batch (requires token)",
                 "update": "PUT /api/tasks/:id (requires token)",
                 "update_status": "PUT /api/tasks/:id/status (requires token)",
+                "update_status_many": "PATCH /api/tasks/status (requires token)",
                 "delete": "DELETE /api/tasks/:id (requires token)",
+                "delete_many": "DELETE /api/tasks (requires token)",
                 "statistics": "GET /api/tasks/statistics (requires token)"
-            }
+            },
+            "metrics": "GET /api/metrics (Prometheus text format)"
         }
     })
 
@@ -71,16 +100,22 @@ def health_check():
 def database_health():
     """Test database connection"""
     try:
-        is_connected = Database.test_connection()
+        is_connected = test_storage_connection()
         if is_connected:
             return jsonify({
                 "success": True,
-                "message": "Database connection successful"
+                "message": "Database connection successful",
+                "backend": get_backend(),
+                "pool": Database.pool_stats(),
+                "keeper": Database.keeper_state()
             })
         else:
             return jsonify({
                 "success": False,
-                "message": "Database connection failed"
+                "message": "Database connection failed",
+                "backend": get_backend(),
+                "pool": Database.pool_stats(),
+                "keeper": Database.keeper_state()
             }), 500
     except Exception as e:
         return jsonify({
@@ -0,0 +1,8 @@
+-- Keyset pagination for GET /api/tasks
+-- (user_id, created_at, id) serves the paged seek and the user_id foreign key,
+-- so the single-column idx_user_id becomes redundant
+USE task_manager;
+
+ALTER TABLE `tasks`
+    ADD INDEX idx_user_created (`user_id`, `created_at`, `id`),
+    DROP INDEX idx_user_id;
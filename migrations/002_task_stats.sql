@@ -0,0 +1,27 @@
+-- Materialized per-user task statistics
+-- Creates task_stats and fills it from the existing tasks
+USE task_manager;
+
+CREATE TABLE IF NOT EXISTS `task_stats` (
+    `user_id` INT PRIMARY KEY,
+    `pending` INT NOT NULL DEFAULT 0,
+    `in_progress` INT NOT NULL DEFAULT 0,
+    `completed` INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Same as: flask --app index reconcile-stats
+INSERT INTO `task_stats` (`user_id`, `pending`, `in_progress`, `completed`)
+SELECT
+    u.id,
+    COALESCE(SUM(t.status = 'pending'), 0),
+    COALESCE(SUM(t.status = 'in_progress'), 0),
+    COALESCE(SUM(t.status = 'completed'), 0)
+FROM users u
+LEFT JOIN tasks t ON t.user_id = u.id
+GROUP BY u.id
+-- VALUES(col) works on MySQL 5.7+ and MariaDB (no row alias syntax)
+ON DUPLICATE KEY UPDATE
+    `pending` = VALUES(`pending`),
+    `in_progress` = VALUES(`in_progress`),
+    `completed` = VALUES(`completed`);
@@ -0,0 +1,5 @@
+-- Per-user change version for ETag / If-None-Match on task reads
+USE task_manager;
+
+ALTER TABLE `task_stats`
+    ADD COLUMN `version` BIGINT NOT NULL DEFAULT 0;
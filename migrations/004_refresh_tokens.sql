@@ -0,0 +1,17 @@
+-- Refresh tokens for POST /api/auth/refresh
+USE task_manager;
+
+CREATE TABLE IF NOT EXISTS `refresh_tokens` (
+    `id` INT AUTO_INCREMENT PRIMARY KEY,
+    `user_id` INT NOT NULL,
+    `token_hash` CHAR(64) NOT NULL,
+    `family_id` CHAR(32) NOT NULL,
+    `expires_at` DATETIME NOT NULL,
+    `revoked_at` DATETIME NULL,
+    `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE,
+    UNIQUE INDEX idx_token_hash (`token_hash`),
+    INDEX idx_family_id (`family_id`),
+    INDEX idx_user_id (`user_id`),
+    INDEX idx_expires_at (`expires_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,22 @@
+-- Filtering and sorting for GET /api/tasks
+-- One index per sort, each carrying every listed column (id, title, status,
+-- created_at, completed_at) so a page is an ordered range read on the index
+-- alone, with no filesort and no lookup of the clustered row:
+-- - created_at: (user_id, created_at, id), or (user_id, status, created_at, id)
+--   with a status filter. Several statuses are read as one LIMIT'ed range per
+--   status and merged (TaskQuery.build_page), since a plain status IN (...)
+--   ORDER BY created_at has to filesort every matching row.
+-- - completed_at / title: (user_id, <column>, id); other filters are checked
+--   on the index entries during the scan.
+-- The single-column idx_status and idx_created_at never lead with user_id and
+-- only cost writes.
+USE task_manager;
+
+ALTER TABLE `tasks`
+    DROP INDEX idx_user_created,
+    ADD INDEX idx_user_created (`user_id`, `created_at`, `id`, `status`, `completed_at`, `title`),
+    ADD INDEX idx_user_status_created (`user_id`, `status`, `created_at`, `id`, `completed_at`, `title`),
+    ADD INDEX idx_user_completed (`user_id`, `completed_at`, `id`, `status`, `created_at`, `title`),
+    ADD INDEX idx_user_title (`user_id`, `title`, `id`, `status`, `created_at`, `completed_at`),
+    DROP INDEX idx_status,
+    DROP INDEX idx_created_at;
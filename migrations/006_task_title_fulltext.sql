@@ -0,0 +1,7 @@
+-- Title search for GET /api/tasks/search
+-- MATCH (title) AGAINST (... IN BOOLEAN MODE) needs a FULLTEXT index on the
+-- column; without it the API falls back to LIKE scans
+USE task_manager;
+
+ALTER TABLE `tasks`
+    ADD FULLTEXT INDEX ft_title (`title`);
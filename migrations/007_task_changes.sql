@@ -0,0 +1,19 @@
+-- Delta sync for GET /api/tasks/changes
+-- tasks.change_seq holds the task_stats.version of the last write to each
+-- row; deletes leave a tombstone with the version that removed the task.
+-- Existing rows keep change_seq 0: they are only sent by a full sync.
+USE task_manager;
+
+ALTER TABLE `tasks`
+    ADD COLUMN `change_seq` BIGINT NOT NULL DEFAULT 0,
+    ADD INDEX idx_user_change (`user_id`, `change_seq`, `id`);
+
+CREATE TABLE IF NOT EXISTS `task_tombstones` (
+    `user_id` INT NOT NULL,
+    `change_seq` BIGINT NOT NULL,
+    `task_id` INT NOT NULL,
+    `deleted_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (`user_id`, `change_seq`, `task_id`),
+    FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE,
+    INDEX idx_deleted_at (`deleted_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
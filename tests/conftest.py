@@ -0,0 +1,58 @@
+"""
+Shared fixtures
+Tests run without a .env: the settings below are fixed before the api
+package is imported. The MySQL backend is only exercised with
+TEST_MYSQL=1 and DB_* pointing at a throwaway database loaded from
+database.sql (its tables are emptied before every test).
+"""
+import os
+import sys
+
+os.environ.setdefault('JWT_SECRET_KEY', 'test-secret')
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+os.environ.setdefault('BCRYPT_EXECUTOR', 'inline')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from api.repositories import BACKENDS
+from api.repositories.task_search import title_indexes
+from api.utils.cache import user_cache
+from api.utils.config import Config
+from api.workers import get_auth_worker, get_task_worker
+
+MYSQL_TABLES = ('refresh_tokens', 'task_tombstones', 'task_stats', 'tasks', 'users')
+
+def _reset_mysql():
+    from api.utils.database import Database
+    if not Database.test_connection():
+        pytest.skip("MySQL is not reachable with the DB_* settings")
+    with Database.connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in MYSQL_TABLES:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch, tmp_path):
+    """Name of the storage backend under test, selected and emptied"""
+    name = request.param
+    if name == 'mysql':
+        if os.getenv('TEST_MYSQL') != '1':
+            pytest.skip("set TEST_MYSQL=1 to run against MySQL")
+        _reset_mysql()
+    elif name == 'sqlite':
+        from api.repositories.sqlite import SQLiteDatabase
+        monkeypatch.setattr(Config, 'SQLITE_PATH', str(tmp_path / 'tasks.sqlite3'))
+        monkeypatch.setattr(SQLiteDatabase, '_initialized', False)
+    else:
+        from api.repositories.memory import memory_store
+        memory_store.clear()
+    
+    monkeypatch.setattr(Config, 'STORAGE_BACKEND', name)
+    # Workers hold the repositories of the backend they were built for
+    get_auth_worker.cache_clear()
+    get_task_worker.cache_clear()
+    user_cache.clear()
+    # Keyed by (user_id, version), which repeat from one fresh database to the next
+    title_indexes.clear()
+    return name
@@ -0,0 +1,64 @@
+"""
+Conditional GETs of the task reads
+Each representation (route and normalized query) has its own ETag, and
+a 304 is only sent for a resource that exists.
+"""
+import pytest
+
+@pytest.fixture
+def client(backend, monkeypatch):
+    from index import app
+    monkeypatch.setattr(app, 'testing', True)
+    client = app.test_client()
+    session = client.post('/api/auth/register', json={
+        'email': 'ana@example.com', 'password': 'secret1', 'name': 'Ana'
+    }).get_json()['data']
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {session['token']}"
+    return client
+
+def etag(response):
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.headers['ETag']
+
+def revalidate(client, path, tag):
+    return client.get(path, headers={'If-None-Match': tag}).status_code
+
+def test_representations_have_their_own_tags(client):
+    client.post('/api/tasks/batch', json=[{'title': 'a'}, {'title': 'b', 'status': 'completed'}])
+    paths = (
+        '/api/tasks',
+        '/api/tasks?limit=1',
+        '/api/tasks?status=completed',
+        '/api/tasks?fields=id,title',
+        '/api/tasks?sort=title&order=asc',
+        '/api/tasks?stream=1',
+        '/api/tasks/statistics',
+    )
+    tags = {path: etag(client.get(path)) for path in paths}
+    assert len(set(tags.values())) == len(paths)
+    
+    for path, tag in tags.items():
+        assert revalidate(client, path, tag) == 304
+        for other in paths:
+            if other != path:
+                assert revalidate(client, other, tag) == 200
+    
+    # Same query spelled differently, same tag
+    tag = etag(client.get('/api/tasks?status=pending,completed'))
+    assert revalidate(client, '/api/tasks?status=completed,pending', tag) == 304
+
+def test_single_task_tags(client):
+    first = client.post('/api/tasks', json={'title': 'a'}).get_json()['data']['task']['id']
+    second = client.post('/api/tasks', json={'title': 'b'}).get_json()['data']['task']['id']
+    tag = etag(client.get(f"/api/tasks/{first}"))
+    
+    assert revalidate(client, f"/api/tasks/{first}", tag) == 304
+    assert revalidate(client, f"/api/tasks/{first}?fields=id", tag) == 200
+    assert revalidate(client, f"/api/tasks/{second}", tag) == 200
+    assert revalidate(client, f"/api/tasks/{second + 1000}", tag) == 404
+    
+    # Any write changes every tag
+    client.put(f"/api/tasks/{second}", json={'title': 'b2'})
+    assert revalidate(client, f"/api/tasks/{first}", tag) == 200
+    client.delete(f"/api/tasks/{first}")
+    assert revalidate(client, f"/api/tasks/{first}", tag) == 404
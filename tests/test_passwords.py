@@ -0,0 +1,82 @@
+"""
+Password hashing admission control
+A full hasher turns login into 503 + Retry-After, and no request holds
+a database connection while bcrypt runs.
+"""
+import threading
+import pytest
+from flask import g
+from api.utils import passwords
+from api.utils.passwords import HasherBusyError, PasswordHasher, admission_queue_size
+
+def test_admission_never_exceeds_the_pool():
+    assert admission_queue_size(2, 16, 10) == 8
+    assert admission_queue_size(2, 4, 10) == 4
+    assert admission_queue_size(12, 4, 10) == 0
+
+def test_full_hasher_rejects_until_a_slot_frees():
+    hasher = PasswordHasher(executor='thread', max_workers=1, queue_size=0, retry_after=7)
+    started, finish = threading.Event(), threading.Event()
+    
+    def job():
+        started.set()
+        finish.wait(5)
+        return 'done'
+    
+    worker = threading.Thread(target=hasher._run, args=(job,))
+    worker.start()
+    started.wait(5)
+    with pytest.raises(HasherBusyError) as busy:
+        hasher._run(job)
+    assert busy.value.retry_after == 7 and hasher.rejected == 1
+    
+    finish.set()
+    worker.join()
+    assert hasher._run(lambda: 'again') == 'again'
+
+@pytest.fixture
+def client(backend, monkeypatch):
+    from index import app
+    monkeypatch.setattr(app, 'testing', True)
+    client = app.test_client()
+    response = client.post('/api/auth/register', json={
+        'email': 'ana@example.com', 'password': 'secret1', 'name': 'Ana'
+    })
+    assert response.status_code == 201
+    client.environ_base['HTTP_AUTHORIZATION'] = f"Bearer {response.get_json()['data']['token']}"
+    return client
+
+def test_login_gets_503_with_retry_after_when_full(client, monkeypatch):
+    hasher = PasswordHasher(executor='thread', max_workers=1, queue_size=0, retry_after=3)
+    hasher._slots.acquire()  # every slot taken
+    monkeypatch.setattr(passwords, 'password_hasher', hasher)
+    for module in ('user_repository', 'sqlite', 'memory'):
+        monkeypatch.setattr(f"api.repositories.{module}.password_hasher", hasher)
+    
+    response = client.post('/api/auth/login', json={'email': 'ana@example.com', 'password': 'secret1'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+    assert hasher.rejected == 1
+
+def test_no_connection_is_held_while_hashing(client, monkeypatch):
+    held = []
+    hasher = passwords.password_hasher
+    for name in ('hash', 'verify'):
+        original = getattr(hasher, name)
+        
+        def checked(*args, original=original):
+            held.append(g.get('_db_connection') is not None)
+            return original(*args)
+        monkeypatch.setattr(hasher, name, checked)
+    
+    assert client.post('/api/auth/register', json={
+        'email': 'bia@example.com', 'password': 'secret1', 'name': 'Bia'
+    }).status_code == 201
+    assert client.post('/api/auth/login', json={
+        'email': 'ana@example.com', 'password': 'secret1'
+    }).status_code == 200
+    assert client.put('/api/auth/profile', json={
+        'name': 'Ana', 'email': 'ana@example.com',
+        'current_password': 'secret1', 'new_password': 'secret2'
+    }).status_code == 200
+    assert len(held) == 4 and not any(held)
@@ -0,0 +1,177 @@
+"""
+ConnectionPool and PoolKeeper, driven by fake driver connections
+No database needed: FakeConnection records what the pool does to it.
+"""
+import threading
+import time
+import pytest
+from api.utils.pool import ConnectionPool, PoolKeeper, PoolTimeoutError
+
+class FakeConnection:
+    """Stands in for a mysql-connector connection"""
+    
+    def __init__(self):
+        self.in_transaction = False
+        self.closed = False
+        self.broken = False
+        self.pings = 0
+    
+    def rollback(self):
+        if self.broken:
+            raise OSError("connection lost")
+        self.in_transaction = False
+    
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if self.broken:
+            raise OSError("connection lost")
+    
+    def cursor(self, *args, **kwargs):
+        raise NotImplementedError
+    
+    def close(self):
+        self.closed = True
+
+class Connector:
+    """connect() factory remembering every connection it opened"""
+    
+    def __init__(self):
+        self.opened = []
+    
+    def __call__(self):
+        cnx = FakeConnection()
+        self.opened.append(cnx)
+        return cnx
+
+@pytest.fixture
+def connect():
+    return Connector()
+
+def make_pool(connect, **kwargs):
+    options = {'size': 2, 'max_overflow': 2, 'timeout': 1.0, 'ping_interval': 60.0}
+    options.update(kwargs)
+    return ConnectionPool(connect, **options)
+
+def age_idle(pool, seconds):
+    """Pretend every idle connection was returned seconds ago"""
+    pool._idle = type(pool._idle)(
+        (cnx, created, last_used - seconds) for cnx, created, last_used in pool._idle
+    )
+
+def age_connections(pool, seconds):
+    """Pretend every idle connection was opened seconds earlier"""
+    pool._idle = type(pool._idle)(
+        (cnx, created - seconds, last_used) for cnx, created, last_used in pool._idle
+    )
+
+def test_connections_are_handed_over_under_contention(connect):
+    pool = make_pool(connect)
+    errors = []
+    
+    def worker():
+        try:
+            for _ in range(50):
+                conn = pool.get_connection()
+                time.sleep(0.0005)
+                conn.close()
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    stats = pool.stats()
+    assert errors == []
+    assert stats['checkouts'] == 400
+    assert len(connect.opened) <= pool.size + pool.max_overflow
+    assert stats['opened'] == stats['idle'] == len(connect.opened)
+    assert stats['in_use'] == 0
+    assert not any(cnx.closed for cnx in connect.opened)
+
+def test_checkout_times_out_when_exhausted(connect):
+    pool = make_pool(connect, size=1, max_overflow=0, timeout=0.05)
+    held = pool.get_connection()
+    with pytest.raises(PoolTimeoutError):
+        pool.get_connection()
+    assert pool.stats()['timeouts'] == 1
+    
+    # A waiter gets the connection as soon as it comes back
+    threading.Timer(0.01, held.close).start()
+    pool.timeout = 1.0
+    pool.get_connection().close()
+    assert len(connect.opened) == 1
+
+def test_overflow_stays_pooled_until_idle(connect):
+    pool = make_pool(connect, overflow_idle=30.0)
+    conns = [pool.get_connection() for _ in range(4)]
+    assert pool.stats()['opened'] == 4
+    pool.timeout = 0.01
+    with pytest.raises(PoolTimeoutError):
+        pool.get_connection()
+    
+    for conn in conns:
+        conn.close()
+    stats = pool.stats()
+    assert (stats['opened'], stats['in_use'], stats['idle']) == (4, 0, 4)
+    assert pool.trim_overflow() == 0
+    
+    # Unused past overflow_idle: closed down to size, least recently used first
+    age_idle(pool, 31.0)
+    keeper = PoolKeeper(pool, interval=60.0, idle_after=3600.0)
+    keeper.run_once()
+    stats = pool.stats()
+    assert (stats['opened'], stats['idle'], stats['trimmed']) == (2, 2, 2)
+    assert keeper.state()['trimmed'] == 2
+    assert [cnx.closed for cnx in connect.opened] == [True, True, False, False]
+
+def test_broken_connection_is_dropped_on_release(connect):
+    pool = make_pool(connect)
+    conn = pool.get_connection()
+    connect.opened[0].in_transaction = True
+    connect.opened[0].broken = True
+    conn.close()
+    
+    stats = pool.stats()
+    assert (stats['opened'], stats['idle']) == (0, 0)
+    assert connect.opened[0].closed
+    pool.get_connection().close()
+    assert len(connect.opened) == 2
+
+def test_open_transaction_is_rolled_back_on_release(connect):
+    pool = make_pool(connect)
+    conn = pool.get_connection()
+    connect.opened[0].in_transaction = True
+    conn.close()
+    assert not connect.opened[0].in_transaction
+    assert pool.stats()['idle'] == 1
+
+def test_expired_connections_are_recycled(connect):
+    pool = make_pool(connect, max_lifetime=100.0)
+    pool.get_connection().close()
+    
+    # On checkout
+    age_connections(pool, 101.0)
+    pool.get_connection().close()
+    assert connect.opened[0].closed and len(connect.opened) == 2
+    assert pool.stats()['recycled'] == 1
+    
+    # From the keeper, while idle
+    age_connections(pool, 101.0)
+    assert pool.recycle_expired() == 1
+    assert connect.opened[1].closed and len(connect.opened) == 3
+    stats = pool.stats()
+    assert (stats['opened'], stats['idle'], stats['recycled']) == (1, 1, 2)
+
+def test_stale_idle_connection_is_validated(connect):
+    pool = make_pool(connect, ping_interval=10.0)
+    pool.get_connection().close()
+    connect.opened[0].broken = True
+    age_idle(pool, 11.0)
+    
+    pool.get_connection().close()
+    assert connect.opened[0].pings == 1 and connect.opened[0].closed
+    assert len(connect.opened) == 2
+    assert pool.stats()['opened'] == 1
@@ -0,0 +1,74 @@
+"""
+Statements per task mutation (QueryProfile)
+Every write also bumps task_stats (counters and the ETag version), and
+since the change feed the rows carry change_seq and deletes leave a
+tombstone, so the budgets below are the MySQL counts:
+
+- create_task: INSERT, task_stats, change_seq stamp
+- update_task / update_status: locking read, task_stats, UPDATE
+- delete_task: locking read, task_stats, tombstone, DELETE
+- create_tasks: INSERT (one executemany), task_stats, change_seq stamp,
+  read back of the batch
+
+SQLite stamps change_seq inside its INSERTs, so its creates run one
+statement fewer; the same budgets apply to it.
+"""
+import pytest
+from api.repositories import get_task_repository, get_user_repository
+from api.utils.profiler import QueryProfile
+
+BUDGETS = {
+    'create_task': 3,
+    'create_tasks': 4,
+    'update_task': 3,
+    'update_status': 3,
+    'delete_task': 4,
+}
+
+@pytest.fixture
+def tasks(backend):
+    if backend == 'memory':
+        pytest.skip("the memory backend runs no SQL")
+    return get_task_repository()
+
+@pytest.fixture
+def user_id(backend):
+    return get_user_repository().create_user('ana@example.com', 'secret1', 'Ana')
+
+def test_create_task(tasks, user_id):
+    with QueryProfile() as profile:
+        tasks.create_task(user_id, 'Write report')
+    profile.assert_max(BUDGETS['create_task'])
+
+def test_create_tasks(tasks, user_id):
+    with QueryProfile() as profile:
+        tasks.create_tasks(user_id, [(f"task {i}", 'pending') for i in range(50)])
+    profile.assert_max(BUDGETS['create_tasks'])
+
+def test_update_task(tasks, user_id):
+    task = tasks.create_task(user_id, 'Write report')
+    with QueryProfile() as profile:
+        tasks.update_task(task['id'], user_id, 'Write the report')
+    profile.assert_max(BUDGETS['update_task'])
+
+def test_update_status(tasks, user_id):
+    task = tasks.create_task(user_id, 'Write report')
+    with QueryProfile() as profile:
+        tasks.update_status(task['id'], user_id, 'completed')
+    profile.assert_max(BUDGETS['update_status'])
+
+def test_delete_task(tasks, user_id):
+    task = tasks.create_task(user_id, 'Write report')
+    with QueryProfile() as profile:
+        tasks.delete_task(task['id'], user_id)
+    profile.assert_max(BUDGETS['delete_task'])
+
+@pytest.mark.parametrize('method, args', [
+    ('update_task', ('Renamed',)),
+    ('update_status', ('completed',)),
+    ('delete_task', ()),
+])
+def test_missing_task_stops_after_the_read(tasks, user_id, method, args):
+    with QueryProfile() as profile:
+        getattr(tasks, method)(12345, user_id, *args)
+    profile.assert_max(1)
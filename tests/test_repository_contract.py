@@ -0,0 +1,290 @@
+"""
+Repository contract: the same cases against every storage backend
+Workers only see the methods and return values checked here, so a
+backend passing them can be swapped in with STORAGE_BACKEND.
+"""
+from datetime import datetime, timedelta
+import pytest
+from api.repositories import (
+    TASK_COLUMNS, get_refresh_token_repository, get_task_repository, get_user_repository
+)
+from api.repositories.task_query import TaskQuery
+from api.workers.auth_worker import AuthWorker
+
+@pytest.fixture
+def users(backend):
+    return get_user_repository()
+
+@pytest.fixture
+def tasks(backend):
+    return get_task_repository()
+
+@pytest.fixture
+def user_id(users):
+    return users.create_user('ana@example.com', 'secret1', 'Ana')
+
+@pytest.fixture
+def other_id(users):
+    return users.create_user('bia@example.com', 'secret1', 'Bia')
+
+def titles(rows):
+    return [row[1] for row in rows]
+
+def read_all_pages(tasks, user_id, limit, query=None):
+    """Every page of a list, checking the keyset handed back each time"""
+    rows, after = [], None
+    while True:
+        page, after = tasks.find_page_by_user(user_id, limit, after, query)
+        rows.extend(page)
+        if after is None:
+            return rows
+        assert len(page) == limit
+
+# Users
+
+def test_user_crud(users, user_id):
+    stored = users.find_by_email('ana@example.com')
+    assert stored['id'] == user_id
+    assert users.verify_password('secret1', stored['password'])
+    assert not users.verify_password('wrong', stored['password'])
+    assert not users.needs_rehash(stored['password'])
+    
+    public = users.find_by_id(user_id)
+    assert set(public) == {'id', 'email', 'name', 'created_at'}
+    assert isinstance(public['created_at'], datetime)
+    assert users.email_exists('ana@example.com')
+    assert not users.email_exists('nobody@example.com')
+    
+    updated = users.update_user(user_id, 'Ana Maria', 'ana.maria@example.com', 'secret2')
+    assert (updated['name'], updated['email']) == ('Ana Maria', 'ana.maria@example.com')
+    assert users.find_by_email('ana@example.com') is None
+    assert users.verify_password('secret2', users.find_by_email('ana.maria@example.com')['password'])
+
+# Tasks
+
+def test_task_crud(tasks, user_id, other_id):
+    task = tasks.create_task(user_id, 'Write report')
+    assert set(task) == set(TASK_COLUMNS)
+    assert (task['title'], task['status'], task['completed_at']) == ('Write report', 'pending', None)
+    assert tasks.find_by_id(task['id'], user_id) == task
+    assert tasks.find_by_id(task['id'], other_id) is None
+    
+    assert tasks.update_task(task['id'], other_id, 'Stolen') is None
+    assert tasks.update_task(task['id'], user_id, 'Write the report')['title'] == 'Write the report'
+    
+    done = tasks.update_status(task['id'], user_id, 'completed')
+    assert done['status'] == 'completed' and done['completed_at'] is not None
+    reopened = tasks.update_status(task['id'], user_id, 'pending')
+    assert reopened['completed_at'] is None
+    assert tasks.update_status(task['id'], other_id, 'completed') is None
+    
+    assert tasks.delete_task(task['id'], other_id) is False
+    assert tasks.delete_task(task['id'], user_id) is True
+    assert tasks.find_by_id(task['id'], user_id) is None
+    assert tasks.delete_task(task['id'], user_id) is False
+
+def test_create_tasks_returns_the_batch_in_order(tasks, user_id, other_id):
+    tasks.create_task(other_id, 'Not mine')
+    created = tasks.create_tasks(user_id, [('a', 'pending'), ('b', 'completed'), ('c', 'in_progress')])
+    assert [(task['title'], task['status']) for task in created] == [
+        ('a', 'pending'), ('b', 'completed'), ('c', 'in_progress')
+    ]
+    assert [task['id'] for task in created] == sorted(task['id'] for task in created)
+    assert all(tasks.find_by_id(task['id'], user_id) for task in created)
+
+def test_keyset_pages_newest_first(tasks, user_id, other_id):
+    created = tasks.create_tasks(user_id, [(f"task {i}", 'pending') for i in range(7)])
+    tasks.create_task(other_id, 'Not mine')
+    
+    first, after = tasks.find_page_by_user(user_id, 3)
+    assert titles(first) == ['task 6', 'task 5', 'task 4']
+    assert after == (first[-1][3], first[-1][0])
+    
+    rows = read_all_pages(tasks, user_id, 3)
+    assert [row[0] for row in rows] == [task['id'] for task in reversed(created)]
+    assert [row[0] for row in tasks.iter_all_by_user(user_id, 2)] == [row[0] for row in rows]
+
+def test_keyset_pages_with_filters_and_sorts(tasks, user_id):
+    statuses = ('pending', 'in_progress', 'completed')
+    tasks.create_tasks(user_id, [(f"task {i:02}", statuses[i % 3]) for i in range(20)])
+    
+    for query in (
+        TaskQuery(statuses=('pending', 'completed')),
+        TaskQuery(statuses=('in_progress',), descending=False),
+        TaskQuery(sort='title', descending=False),
+        TaskQuery(sort='completed_at'),
+        TaskQuery(sort='completed_at', descending=False),
+    ):
+        expected = list(tasks.iter_all_by_user(user_id, 5, query))
+        rows = read_all_pages(tasks, user_id, 4, query)
+        assert [row[0] for row in rows] == [row[0] for row in expected]
+        assert all(row[2] in (query.statuses or statuses) for row in rows)
+    
+    by_title = read_all_pages(tasks, user_id, 6, TaskQuery(sort='title', descending=False))
+    assert titles(by_title) == sorted(titles(by_title))
+
+def test_bulk_operations(tasks, user_id, other_id):
+    created = tasks.create_tasks(user_id, [('a', 'pending'), ('b', 'pending'), ('c', 'completed')])
+    theirs = tasks.create_task(other_id, 'Not mine')
+    ids = [task['id'] for task in created]
+    
+    changed = tasks.update_status_many(user_id, 'in_progress', task_ids=ids[:2] + [theirs['id']])
+    assert sorted(changed) == sorted(ids[:2])
+    assert tasks.find_by_id(theirs['id'], other_id)['status'] == 'pending'
+    assert tasks.update_status_many(user_id, 'completed', current_status='in_progress') == 2
+    assert tasks.get_statistics(user_id)['completed'] == 3
+    
+    assert sorted(tasks.delete_many(user_id, task_ids=[ids[0], theirs['id']])) == [ids[0]]
+    assert tasks.delete_many(user_id, current_status='completed') == 2
+    assert tasks.get_statistics(user_id)['total'] == 0
+    assert tasks.get_statistics(other_id)['total'] == 1
+
+def test_statistics_and_version(tasks, user_id, other_id):
+    assert tasks.get_statistics(user_id) == {'total': 0, 'pending': 0, 'in_progress': 0, 'completed': 0}
+    assert tasks.get_version(user_id) == 0
+    
+    task = tasks.create_task(user_id, 'a')
+    tasks.create_tasks(user_id, [('b', 'completed'), ('c', 'in_progress')])
+    assert tasks.get_version(user_id) == 2
+    tasks.update_status(task['id'], user_id, 'completed')
+    assert tasks.get_statistics(user_id) == {'total': 3, 'pending': 0, 'in_progress': 1, 'completed': 2}
+    assert tasks.get_version(user_id) == 3
+    
+    # Writes that change nothing leave the version alone
+    tasks.update_task(task['id'] + 1000, user_id, 'missing')
+    tasks.delete_task(task['id'], other_id)
+    assert tasks.get_version(user_id) == 3
+    assert tasks.get_version(other_id) == 0
+    
+    tasks.delete_task(task['id'], user_id)
+    assert tasks.get_statistics(user_id)['total'] == 2
+    assert tasks.rebuild_statistics(user_id) == 1
+    assert tasks.get_statistics(user_id) == {'total': 2, 'pending': 0, 'in_progress': 1, 'completed': 1}
+
+def test_search(tasks, user_id, other_id):
+    tasks.create_tasks(user_id, [
+        ('Quarterly report', 'pending'),
+        ('Report review meeting', 'pending'),
+        ('Buy groceries', 'completed'),
+    ])
+    tasks.create_task(other_id, 'Report for someone else')
+    
+    rows, has_more = tasks.search_by_user(user_id, ['report'], 10)
+    assert sorted(titles(rows)) == ['Quarterly report', 'Report review meeting']
+    assert not has_more
+    
+    rows, _ = tasks.search_by_user(user_id, ['report', 'review'], 10)
+    assert titles(rows) == ['Report review meeting']
+    
+    first, has_more = tasks.search_by_user(user_id, ['report'], 1)
+    second, _ = tasks.search_by_user(user_id, ['report'], 1, offset=1)
+    assert has_more and len(first) == len(second) == 1 and first[0][0] != second[0][0]
+    
+    rows, _ = tasks.search_by_user(user_id, ['groceries'], 10, columns=('id', 'status'))
+    assert [row[1:] for row in rows] == [('completed',)]
+
+def test_search_matches_word_prefixes(backend, tasks, user_id, monkeypatch):
+    tasks.create_tasks(user_id, [
+        ('Quarterly report', 'pending'),
+        ('Export data', 'pending'),
+        ('Reunião às 10h', 'pending'),
+        ('Fix CI (ci-cd)', 'pending'),
+        ('Go to gym', 'completed'),
+    ])
+    # Terms as parse_terms hands them over; "ex", "ci", "cd", "go", "to" are
+    # below innodb_ft_min_token_size and take the LIKE path on MySQL
+    expected = {
+        ('port',): [],
+        ('rep',): ['Quarterly report'],
+        ('ex', 'data'): ['Export data'],
+        ('reuniao', '10h'): ['Reunião às 10h'],
+        ('ci',): ['Fix CI (ci-cd)'],
+        ('cd',): ['Fix CI (ci-cd)'],
+        ('go', 'to'): ['Go to gym'],
+        ('o',): [],
+    }
+    
+    def search_all():
+        return {
+            terms: sorted(titles(tasks.search_by_user(user_id, list(terms), 10)[0]))
+            for terms in expected
+        }
+    
+    assert search_all() == expected
+    if backend == 'mysql':
+        # Same rows from the LIKE fallback as from FULLTEXT
+        monkeypatch.setattr(type(tasks), '_fulltext', False)
+        assert search_all() == expected
+        first, has_more = tasks.search_by_user(user_id, ['ci'], 1)
+        assert titles(first) == ['Fix CI (ci-cd)'] and not has_more
+
+def test_changes_since_a_version(tasks, user_id):
+    kept = tasks.create_task(user_id, 'kept')
+    removed = tasks.create_task(user_id, 'removed')
+    since = tasks.get_version(user_id)
+    
+    tasks.update_task(kept['id'], user_id, 'kept, renamed')
+    tasks.delete_task(removed['id'], user_id)
+    added = tasks.create_task(user_id, 'added')
+    upper = tasks.get_version(user_id)
+    
+    rows = tasks.find_changes(user_id, since, upper, 10)
+    # (change_seq, deleted, *columns) in change order; tombstones only carry the id
+    assert [(row[1], row[2]) for row in rows] == [(0, kept['id']), (1, removed['id']), (0, added['id'])]
+    assert rows[0][3] == 'kept, renamed'
+    assert rows[1][3:] == (None,) * (len(TASK_COLUMNS) - 1)
+    assert [row[0] for row in rows] == sorted(row[0] for row in rows)
+    
+    # Paging resumes after the last (change_seq, id) sent
+    first = tasks.find_changes(user_id, since, upper, 1)
+    assert len(first) == 2
+    rest = tasks.find_changes(user_id, since, upper, 10, after=(first[0][0], first[0][2]))
+    assert [row[2] for row in rest] == [removed['id'], added['id']]
+    
+    # A full sync lists live tasks only
+    full = tasks.find_changes(user_id, None, upper, 10)
+    assert sorted(row[2] for row in full) == sorted((kept['id'], added['id']))
+    assert tasks.find_changes(user_id, upper, upper, 10) == []
+
+# Refresh tokens
+
+def test_refresh_token_repository(backend, user_id):
+    tokens = get_refresh_token_repository()
+    expires_at = (datetime.now() + timedelta(days=1)).replace(microsecond=0)
+    token_id = tokens.create_token(user_id, 'hash-1', 'family-1', expires_at)
+    tokens.create_token(user_id, 'hash-2', 'family-1', expires_at)
+    tokens.create_token(user_id, 'hash-3', 'family-2', datetime.now() - timedelta(days=1))
+    
+    found = tokens.find_for_rotation('hash-1')
+    assert (found['id'], found['user_id'], found['family_id']) == (token_id, user_id, 'family-1')
+    assert (found['email'], found['name'], found['expires_at']) == ('ana@example.com', 'Ana', expires_at)
+    assert found['revoked_at'] is None
+    assert tokens.find_for_rotation('unknown') is None
+    
+    assert tokens.revoke_token(token_id) is True
+    assert tokens.revoke_token(token_id) is False
+    assert tokens.find_for_rotation('hash-1')['revoked_at'] is not None
+    assert tokens.revoke_family('family-1') == 1
+    assert tokens.revoke_all_for_user(user_id) == 1
+    assert tokens.delete_expired() == 1
+
+def test_refresh_token_rotation(backend):
+    auth = AuthWorker()
+    session = auth.register('ana@example.com', 'secret1', 'Ana')
+    
+    rotated = auth.refresh(session['refresh_token'])
+    assert rotated['refresh_token'] != session['refresh_token']
+    assert auth.verify_token(rotated['token'])['user_id'] == session['user']['id']
+    
+    # Reusing a rotated token revokes the whole session
+    with pytest.raises(ValueError):
+        auth.refresh(session['refresh_token'])
+    with pytest.raises(ValueError):
+        auth.refresh(rotated['refresh_token'])
+    
+    # Other sessions are untouched, a password change ends them too
+    other = auth.refresh(auth.login('ana@example.com', 'secret1')['refresh_token'])
+    changed = auth.update_profile(session['user']['id'], 'Ana', 'ana@example.com', 'secret1', 'secret2')
+    with pytest.raises(ValueError):
+        auth.refresh(other['refresh_token'])
+    assert auth.refresh(changed['refresh_token'])
@@ -0,0 +1,118 @@
+"""
+query_budget of every auth and task route, enforced
+Runs each route through the Flask test client with strict budgets: a
+view running more statements than its @query_budget raises
+QueryBudgetExceeded, which the test client re-raises. The last test
+checks that no budgeted route was left out.
+"""
+import pytest
+from api.utils.profiler import profiler
+
+BLUEPRINTS = ('auth', 'tasks')
+
+@pytest.fixture
+def client(backend, monkeypatch):
+    if backend == 'memory':
+        pytest.skip("the memory backend runs no SQL")
+    from index import app
+    monkeypatch.setattr(app, 'testing', True)
+    monkeypatch.setattr(profiler, 'strict_budgets', True)
+    return RecordingClient(app)
+
+class RecordingClient:
+    """Test client that checks each response and remembers the endpoints hit"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.client = app.test_client()
+        self.endpoints = set()
+        self.headers = {}
+    
+    def request(self, method, path, expect=None, **kwargs):
+        kwargs['headers'] = {**self.headers, **kwargs.get('headers', {})}
+        response = self.client.open(path, method=method, **kwargs)
+        response.get_data()  # streamed bodies run their queries here
+        if expect is not None:
+            assert response.status_code == expect, response.get_data(as_text=True)
+        else:
+            assert response.status_code < 400, response.get_data(as_text=True)
+        
+        endpoint, _ = self.app.url_map.bind('localhost').match(path.split('?')[0], method)
+        self.endpoints.add(endpoint)
+        return response
+    
+    def data(self, method, path, **kwargs):
+        return self.request(method, path, **kwargs).get_json()['data']
+    
+    def login(self, session):
+        self.headers = {'Authorization': f"Bearer {session['token']}"}
+        return session
+
+def budgeted_endpoints(app):
+    return {
+        endpoint for endpoint, view in app.view_functions.items()
+        if endpoint.split('.')[0] in BLUEPRINTS and hasattr(view, 'query_budget')
+    }
+
+def exercise_auth_routes(client):
+    session = client.login(client.data('POST', '/api/auth/register', expect=201, json={
+        'email': 'ana@example.com', 'password': 'secret1', 'name': 'Ana'
+    }))
+    client.data('POST', '/api/auth/login', json={'email': 'ana@example.com', 'password': 'secret1'})
+    session = client.data('POST', '/api/auth/refresh', json={'refresh_token': session['refresh_token']})
+    client.request('GET', '/api/auth/me')
+    client.request('PUT', '/api/auth/profile', json={'name': 'Ana Maria', 'email': 'ana@example.com'})
+    client.login(client.data('PUT', '/api/auth/profile', json={
+        'name': 'Ana Maria', 'email': 'ana.maria@example.com',
+        'current_password': 'secret1', 'new_password': 'secret2'
+    }))
+    other = client.data('POST', '/api/auth/login', json={'email': 'ana.maria@example.com', 'password': 'secret2'})
+    client.request('POST', '/api/auth/logout', json={'refresh_token': other['refresh_token']})
+
+def exercise_task_routes(client):
+    statuses = ('pending', 'in_progress', 'completed')
+    created = client.data('POST', '/api/tasks/batch', expect=201, json=[
+        {'title': f"Task {i}", 'status': statuses[i % 3]} for i in range(30)
+    ])['tasks']
+    task_id = client.data('POST', '/api/tasks', expect=201, json={'title': 'Write report'})['task']['id']
+    
+    # Reads: every list flavour, search, sync and single rows
+    first = client.request('GET', '/api/tasks?limit=10')
+    cursor = first.get_json()['data']['next_cursor']
+    client.request('GET', f"/api/tasks?limit=10&cursor={cursor}")
+    client.request('GET', '/api/tasks?limit=10', expect=304, headers={'If-None-Match': first.headers['ETag']})
+    client.request('GET', '/api/tasks?limit=10&status=pending,completed')
+    client.request('GET', '/api/tasks?limit=10&status=in_progress&sort=title&order=asc')
+    client.request('GET', '/api/tasks?limit=10&sort=completed_at&fields=id,status')
+    client.request('GET', '/api/tasks?stream=1')
+    client.request('GET', '/api/tasks/search?q=task&limit=5')
+    token = client.data('GET', '/api/tasks/changes')['next_token']
+    client.request('GET', f"/api/tasks/{task_id}")
+    client.request('GET', '/api/tasks/statistics')
+    
+    # Writes
+    ids = [task['id'] for task in created]
+    client.request('PUT', f"/api/tasks/{task_id}", json={'title': 'Write the report'})
+    client.request('PUT', f"/api/tasks/{task_id}/status", json={'status': 'completed'})
+    client.request('PATCH', '/api/tasks/status', json={'status': 'completed', 'ids': ids[:10]})
+    client.request('PATCH', '/api/tasks/status', json={'status': 'pending', 'filter': {'status': 'in_progress'}})
+    client.request('DELETE', f"/api/tasks/{task_id}")
+    client.request('DELETE', '/api/tasks', json={'ids': ids[10:15]})
+    client.request('DELETE', '/api/tasks', json={'filter': {'status': 'completed'}})
+    
+    changes = client.data('GET', f"/api/tasks/changes?since={token}")
+    assert task_id in changes['deleted']
+
+def test_auth_routes_stay_within_budget(client):
+    exercise_auth_routes(client)
+
+def test_task_routes_stay_within_budget(client):
+    client.login(client.data('POST', '/api/auth/register', expect=201, json={
+        'email': 'ana@example.com', 'password': 'secret1', 'name': 'Ana'
+    }))
+    exercise_task_routes(client)
+
+def test_every_budgeted_route_is_exercised(client):
+    exercise_auth_routes(client)
+    exercise_task_routes(client)
+    assert budgeted_endpoints(client.app) - client.endpoints == set()